@@ -6,7 +6,9 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[],
-    hiddenimports=['pyaudio', 'numpy', 'scipy', 'scipy.signal'],
+    # scipy is still bundled through dsp's lazy import, but only loaded for
+    # filters missing from filter_table and for resampling
+    hiddenimports=['pyaudio', 'numpy'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
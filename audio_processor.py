@@ -6,7 +6,188 @@ Handles real-time audio capture, analysis, and enhancement.
 import numpy as np
 import threading
 import time
-from scipy import signal
+
+from audio_session import AudioSession
+from classifier import CandidateClassifier, FootstepClassifier
+from direction import DirectionEstimator
+from flight_recorder import FlightRecorder, slots_for
+from pipeline import AudioPipeline
+from instrumentation import Instrumentation
+from latency_tuner import CHUNK_SIZES, LatencyTuner
+from dsp import (cached_bandpass_sos, deinterleave, resample_ratio, BlockFilter, GainEnvelope,
+                 NoiseFloorTracker, SoftClipTables, StreamingFilter, StreamingResampler)
+from spectrogram import SpectrogramAnalyzer, SpectrogramRing
+from stft_engine import STFTEngine
+from telemetry import TelemetryChannel
+
+# Available footstep detection/enhancement engines
+DETECTION_ENGINES = ('bandpass', 'stft')
+
+class DummyStream:
+    """Stand-in for a PyAudio stream that produces silence (or a supplied signal)."""
+    
+    def __init__(self, backend, channels=2, rate=44100, frames_per_buffer=1024,
+                 stream_callback=None, format=None, input=False, output=False, **kwargs):
+        self.backend = backend
+        self.input = input
+        self.output = output
+        self.channels = channels
+        self.rate = rate
+        self.frames_per_buffer = frames_per_buffer
+        self.stream_callback = stream_callback
+        self.bytes_per_sample = 4 if format == backend.paFloat32 else 2
+        self.frames_written = 0
+        self._active = False
+        self._thread = None
+        self._next_time = None
+    
+    def _pace(self, frame_count):
+        """Block like a real device would, when the backend runs in real time."""
+        if not self.backend.realtime:
+            return
+        now = time.perf_counter()
+        if self._next_time is None or self._next_time < now - 0.5:
+            self._next_time = now
+        self._next_time += frame_count / self.rate
+        time.sleep(max(0.0, self._next_time - now))
+    
+    def _input(self, frame_count):
+        """Return the next input buffer from the backend's source, or silence."""
+        if self.backend.input_source is not None:
+            return self.backend.input_source(frame_count, self.channels)
+        return b'\x00' * frame_count * self.channels * self.bytes_per_sample
+    
+    def _run_callback(self):
+        """Drive the stream callback at the real-time rate, like PortAudio would."""
+        period = self.frames_per_buffer / self.rate
+        next_time = time.perf_counter()
+        while self._active:
+            now = time.perf_counter()
+            time_info = {
+                'input_buffer_adc_time': now,
+                'current_time': now,
+                'output_buffer_dac_time': now + period,
+            }
+            in_data = self._input(self.frames_per_buffer)
+            out_data, flag = self.stream_callback(in_data, self.frames_per_buffer, time_info, 0)
+            self.write(out_data)
+            if flag != self.backend.paContinue:
+                break
+            next_time += period
+            time.sleep(max(0.0, next_time - time.perf_counter()))
+        self._active = False
+    
+    def start_stream(self):
+        self._active = True
+        if self.stream_callback is not None and self._thread is None:
+            self._thread = threading.Thread(target=self._run_callback, daemon=True)
+            self._thread.start()
+    
+    def stop_stream(self):
+        self._active = False
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+    
+    def close(self):
+        self.stop_stream()
+    
+    def is_active(self):
+        return self._active
+    
+    def is_stopped(self):
+        return not self._active
+    
+    def get_input_latency(self):
+        return 0.0
+    
+    def get_output_latency(self):
+        return 0.0
+    
+    def read(self, chunk_size, exception_on_overflow=False):
+        self._pace(chunk_size)
+        return self._input(chunk_size)
+    
+    def write(self, data, num_frames=None, exception_on_underflow=False):
+        if num_frames is None:
+            # As PyAudio: len() is taken as bytes, so an ndarray (len() in
+            # samples) written without num_frames plays only part of its frames
+            num_frames = len(data) // (self.channels * self.bytes_per_sample)
+        if not self.input and self.stream_callback is None:
+            # Output-only streams block on write; duplex streams are paced by read
+            self._pace(num_frames)
+        self.frames_written += num_frames
+
+
+class PyAudioDummy:
+    """Dummy PyAudio replacement used when PyAudio is missing or for headless runs."""
+    
+    # Same values as PortAudio so status flags can be tested the same way
+    paFloat32 = 1
+    paInt16 = 8
+    paContinue = 0
+    paComplete = 1
+    paAbort = 2
+    paInputUnderflow = 1
+    paInputOverflow = 2
+    paOutputUnderflow = 4
+    paOutputOverflow = 8
+    
+    def __init__(self, input_source=None, native_rate=44100, formats=(paFloat32, paInt16), realtime=False):
+        """
+        Args:
+            input_source: Optional callable (frame_count, channels) -> bytes
+                used as the captured audio instead of silence
+            native_rate: Default sample rate reported for the dummy device
+            formats: Sample formats the dummy device accepts
+            realtime: Make blocking read()/write() take as long as the audio
+                they carry, like a real device (callback streams always do)
+        """
+        self.input_source = input_source
+        self.realtime = realtime
+        self.native_rate = native_rate
+        self.formats = formats
+    
+    def PyAudio(self):
+        # Lets an instance stand in for the pyaudio module itself
+        return self
+    
+    def get_device_count(self):
+        return 1
+    
+    def get_device_info_by_index(self, index):
+        return {
+            'index': index,
+            'name': 'Dummy Duplex Device',
+            'hostApi': 0,
+            'maxInputChannels': 8,
+            'maxOutputChannels': 8,
+            'defaultSampleRate': float(self.native_rate),
+            'defaultLowInputLatency': 0.0,
+            'defaultLowOutputLatency': 0.0,
+        }
+    
+    def get_default_input_device_info(self):
+        return self.get_device_info_by_index(0)
+    
+    def get_default_output_device_info(self):
+        return self.get_device_info_by_index(0)
+    
+    def is_format_supported(self, rate, input_format=None, output_format=None, **kwargs):
+        for audio_format in (input_format, output_format):
+            if audio_format is not None and audio_format not in self.formats:
+                raise ValueError("Sample format not supported")
+        return True
+    
+    def open(self, **kwargs):
+        kwargs.setdefault('format', self.paInt16)
+        stream = DummyStream(self, **kwargs)
+        if kwargs.get('start', True):
+            stream.start_stream()
+        return stream
+    
+    def terminate(self):
+        pass
 
 # Try to import PyAudio, with fallback mode if it fails
 PYAUDIO_AVAILABLE = False
@@ -15,41 +196,21 @@ try:
     PYAUDIO_AVAILABLE = True
 except ImportError:
     print("WARNING: PyAudio module not found. Running in limited functionality mode.")
-    # Create a dummy PyAudio class for compatibility
-    class PyAudioDummy:
-        def __init__(self):
-            self.paInt16 = 8  # Dummy value
-            
-        def open(self, **kwargs):
-            class DummyStream:
-                def __init__(self):
-                    pass
-                def start_stream(self):
-                    pass
-                def stop_stream(self):
-                    pass
-                def close(self):
-                    pass
-                def is_active(self):
-                    return False
-                def read(self, chunk_size, exception_on_overflow=False):
-                    # Return silent audio
-                    return b'\x00' * chunk_size * 4  # 2 bytes per sample * 2 channels
-                def write(self, data):
-                    pass
-            return DummyStream()
-            
-        def terminate(self):
-            pass
-    
     # Use the dummy implementation if PyAudio isn't available
     pyaudio = PyAudioDummy()
 
 class AudioProcessor:
     """Handles the audio capture, processing, and playback for footstep enhancement."""
     
-    def __init__(self):
-        """Initialize the audio processor."""
+    def __init__(self, audio_backend=None):
+        """
+        Initialize the audio processor.
+        
+        Args:
+            audio_backend: Optional pyaudio-compatible module (e.g. a PyAudioDummy
+                instance for headless runs). Defaults to the imported pyaudio.
+        """
+        self.backend = audio_backend if audio_backend is not None else pyaudio
         self.is_running = False
         self.audio_stream = None
         self.sample_rate = 44100  # Standard audio sample rate
@@ -58,10 +219,20 @@ class AudioProcessor:
         
         # Handle different PyAudio implementations
         try:
-            self.audio_format = pyaudio.paInt16  # 16-bit integer audio
+            self.audio_format = self.backend.paInt16  # 16-bit integer audio
         except AttributeError:
             # If using the dummy implementation
-            self.audio_format = getattr(pyaudio, 'paInt16', 8)  # Use 8 as fallback value
+            self.audio_format = getattr(self.backend, 'paInt16', 8)  # Use 8 as fallback value
+        
+        # Stream negotiation: prefer float32 at the device's native rate.
+        # The processing rate follows the device unless set_sample_rate()
+        # pins it, in which case a polyphase stage converts between the two
+        self.negotiate_format = True
+        self.follow_device_rate = True
+        self.device_rate = self.sample_rate
+        self.device_chunk_size = self.chunk_size
+        self._input_resampler = None
+        self._output_resampler = None
         
         # Audio enhancement parameters
         self.enhancement_factor = 2.0
@@ -70,32 +241,654 @@ class AudioProcessor:
         self.detection_threshold = 0.05  # Threshold for footstep detection
         self.processing_thread = None
         
-        # Initialize PyAudio
-        self.p = pyaudio.PyAudio()
+        # Callback (non-blocking) I/O mode: processing runs inside the PortAudio
+        # callback and writes into a small preallocated ring of output blocks
+        self.use_callback = False
+        self.ring_slots = 4
         
-        # Create butterworth bandpass filter for footstep frequency range
-        self.b, self.a = self._create_bandpass_filter()
+        # Pipeline mode: capture, DSP and playback in separate threads joined
+        # by ring buffers (see pipeline.AudioPipeline)
+        self.use_pipeline = False
+        self.pipeline_slots = 8
+        self.pipeline_prefill = 2
+        self.pipeline = None
+        
+        # Adaptive latency (blocking I/O only): the chunk size starts small
+        # and follows the measured processing headroom while running
+        self.adaptive_latency = False
+        self.adaptive_initial_chunk_size = 256
+        self.latency_tuner = None
+        
+        # Per-channel detection: every channel is detected, held and boosted
+        # on its own (surround mixes) instead of as one combined signal.
+        # channel_enhancement optionally limits which channels may be
+        # boosted at all; None boosts every channel
+        self.per_channel_detection = False
+        self.channel_enhancement = None
+        
+        # Preallocated mode: every step of the hot loop writes into scratch
+        # buffers owned by the processor instead of allocating new arrays
+        self.use_preallocated_buffers = False
+        self._allocate_buffers()
+        
+        # Integer fast path: enhanced chunks go int16 -> int16 through a
+        # tanh lookup table instead of float multiply/tanh/re-encode
+        self.use_soft_clip_table = False
+        self.soft_clip_tables = SoftClipTables()
+        
+        # One PortAudio context and stream for the life of the processor;
+        # stop() pauses the stream instead of re-initializing PortAudio
+        self.session = AudioSession(self.backend)
+        self._start_requested = None
+        
+        # Create butterworth bandpass filter for footstep frequency range.
+        # The filter keeps its state per channel across chunks.
+        self.filter_order = 4
+        self.sos = self._create_bandpass_filter()
+        self.footstep_filter = self._create_footstep_filter()
+        
+        # Detection engine: 'bandpass' (RMS gate, broadband gain) or 'stft'
+        # (multiband spectral detector, gain only in the footstep bins)
+        self.detection_engine = 'bandpass'
+        self.stft_engine = None
+        
+        # Direction of detected footsteps from inter-channel level and time
+        # differences; runs only on detected chunks of multichannel streams
+        self.direction_estimation = True
+        self.direction_estimator = self._create_direction_estimator()
+        self.azimuth = None       # Degrees of the latest estimate, None before the first
+        self.direction_count = 0  # Estimates made, so readers can spot new ones
+        
+        # Spectrogram view: while open, every chunk adds one magnitude column
+        # to the ring the GUI renders from
+        self.spectrogram_ring = SpectrogramRing()
+        self.spectrogram = None
+        
+        # Optional second stage (bandpass engine with per-chunk switching):
+        # candidates of the RMS gate are kept only if the learned classifier
+        # agrees; None keeps the gate alone
+        self.footstep_classifier = None
+        
+        # Optional sample-accurate attack/hold/release gain (bandpass engine);
+        # None keeps the per-chunk switching
+        self.gain_envelope = None
+        
+        # Optional adaptive threshold; None uses the fixed detection_threshold
+        self.noise_floor_tracker = None
         
         # Stats for UI updates
         self.current_level = 0.0
         self.footstep_detected = False
         self.current_enhancement = 1.0
+        self.noise_floor = 0.0       # Tracked background level (adaptive threshold only)
+        self.measured_latency = 0.0  # Input-to-output latency in seconds
+        self._device_latency = 0.0   # Part of it reported by the device, without the chunk
+        self.xrun_count = 0          # Overflows/underflows reported by PortAudio
+        self.start_latency = 0.0     # Seconds from start() to the first processed chunk
+        
+        # Non-blocking channel the GUI polls for the stats above
+        self.telemetry = TelemetryChannel()
+        
+        # Per-stage timing histograms and counters (off by default)
+        self.instrumentation = Instrumentation()
+        
+        # Optional flight recorder: raw input and decisions in a ring file.
+        # The file is opened at start(), once the stream layout is known
+        self.recorder_path = None
+        self.recorder_seconds = 60.0
+        self.recorder = None
         
         # Callbacks to be registered
         self.on_level_change = None
         self.on_status_change = None
         self.on_footstep_detected = None
+        self.on_direction_change = None  # Called with the azimuth (degrees) of each estimate
         
+    @property
+    def p(self):
+        """The PortAudio context owned by the session."""
+        return self.session.pa
+    
     def _create_bandpass_filter(self):
-        """Create a bandpass filter for the footstep frequency range."""
-        nyquist = 0.5 * self.sample_rate
-        low = self.footstep_freq_low / nyquist
-        high = self.footstep_freq_high / nyquist
-        b, a = signal.butter(4, [low, high], btype='band')
-        return b, a
+        """Create a bandpass filter (as second-order sections) for the footstep frequency range."""
+        return cached_bandpass_sos(
+            float(self.footstep_freq_low),
+            float(self.footstep_freq_high),
+            int(self.sample_rate),
+            int(self.filter_order)
+        )
+    
+    def _create_footstep_filter(self):
+        """Create the streaming footstep-band filter for the current mode and layout."""
+        if self.use_preallocated_buffers:
+            return BlockFilter(self.sos, self.channels, self.chunk_size)
+        return StreamingFilter(self.sos, self.channels)
+    
+    def _allocate_buffers(self):
+        """Preallocate the scratch buffers and the callback-mode output ring for one chunk."""
+        samples = self.chunk_size * self.channels
+        self._float_scratch = np.zeros(samples, dtype=np.float32)
+        self._int16_scratch = np.zeros(samples, dtype=np.int16)
+        ring_dtype = np.float32 if self._is_float_stream() else np.int16
+        self._output_ring = np.zeros((self.ring_slots, samples), dtype=ring_dtype)
+        self._ring_index = 0
+        
+        # Per-channel levels, decisions and gains of the current chunk
+        channels = self.channels
+        self._channel_power = np.zeros(channels)
+        self._channel_levels = np.zeros(channels)
+        self._channel_detected = np.zeros(channels, dtype=bool)
+        self._channel_enhanced = np.zeros(channels, dtype=bool)
+        self._channel_passthrough = np.zeros(channels, dtype=bool)
+        self._channel_gains = np.ones(channels, dtype=np.float32)
+        self._channel_split = False
+        self._channel_mask = self._build_channel_mask()
+    
+    def _build_channel_mask(self):
+        """Per-channel bools from channel_enhancement; channels beyond the list stay enabled."""
+        mask = np.ones(self.channels, dtype=bool)
+        if self.channel_enhancement is not None:
+            listed = min(self.channels, len(self.channel_enhancement))
+            mask[:listed] = self.channel_enhancement[:listed]
+        return mask
+    
+    def configure_stream(self, sample_rate=None, channels=None, chunk_size=None):
+        """
+        Change the stream layout while stopped.
+        
+        Redesigns the bandpass filter for the new sample rate and resizes the
+        per-channel filter state and output buffers.
+        """
+        if self.is_running:
+            raise RuntimeError("Cannot reconfigure the stream while processing is running")
+        
+        if sample_rate is not None:
+            self.sample_rate = int(sample_rate)
+        if channels is not None:
+            self.channels = int(channels)
+        if chunk_size is not None:
+            self.chunk_size = int(chunk_size)
+        
+        self.sos = self._create_bandpass_filter()
+        self.footstep_filter = self._create_footstep_filter()
+        if self.stft_engine is not None:
+            self.stft_engine = self._create_stft_engine()
+        self.direction_estimator = self._create_direction_estimator()
+        if self.spectrogram is not None:
+            self.spectrogram = self._create_spectrogram()
+        if self.footstep_classifier is not None:
+            self.footstep_classifier = CandidateClassifier(
+                self.footstep_classifier.model, self.sample_rate, self.channels)
+        if self.gain_envelope is not None:
+            self.gain_envelope = self._create_gain_envelope(self.gain_envelope)
+        if self.noise_floor_tracker is not None:
+            tracker = self.noise_floor_tracker
+            self.set_adaptive_threshold(False)
+            self.set_adaptive_threshold(True, tracker.margin_db, tracker.hysteresis_db)
+        self._allocate_buffers()
+    
+    def set_footstep_band(self, low_hz, high_hz):
+        """
+        Change the footstep frequency band, also while processing is running.
+        
+        Coefficients come from an LRU cache, so switching between game
+        presets does not redesign the filter; the audio thread swaps them in
+        between two chunks and keeps the filter state.
+        """
+        sos = cached_bandpass_sos(float(low_hz), float(high_hz), int(self.sample_rate), int(self.filter_order))
+        self.footstep_freq_low = low_hz
+        self.footstep_freq_high = high_hz
+        self._swap_filter_coefficients(sos)
+        if self.stft_engine is not None:
+            self.stft_engine.set_band(low_hz, high_hz)
+        if self.direction_estimator is not None:
+            self.direction_estimator.set_band(low_hz, high_hz)
+        if self.spectrogram is not None:
+            self.spectrogram.set_band(low_hz, high_hz)
+    
+    def set_filter_order(self, order):
+        """Change the Butterworth order of the footstep filter, also while running."""
+        sos = cached_bandpass_sos(
+            float(self.footstep_freq_low), float(self.footstep_freq_high), int(self.sample_rate), int(order))
+        self.filter_order = int(order)
+        self._swap_filter_coefficients(sos)
+    
+    def set_sample_rate(self, sample_rate):
+        """
+        Pin the processing sample rate, or pass None to follow the device again.
+        
+        The stream has to be reopened at the new rate, so a running processor
+        is restarted; the filters are redesigned (from the cache) to match.
+        If the device runs at a different native rate, the stream stays at
+        the native rate and the audio is resampled on the way in and out.
+        """
+        was_running = self.is_running
+        if was_running:
+            self.stop()
+        self.follow_device_rate = sample_rate is None
+        self.configure_stream(sample_rate=sample_rate)
+        if was_running:
+            self.start()
+    
+    def _swap_filter_coefficients(self, sos):
+        """Queue new coefficients; the filter installs them at the next chunk boundary."""
+        self.sos = sos
+        self.footstep_filter.set_sos(sos)
+    
+    def set_preallocated_mode(self, enabled):
+        """
+        Enable or disable the allocation-free processing mode.
+        
+        The footstep filter is swapped for its allocation-free counterpart;
+        the filter state is handed over so the switch is seamless.
+        """
+        self.use_preallocated_buffers = bool(enabled)
+        previous_filter = self.footstep_filter
+        new_filter = self._create_footstep_filter()
+        new_filter.zi = previous_filter.zi
+        self.footstep_filter = new_filter
+    
+    def _create_stft_engine(self):
+        """Create the STFT engine for the current stream layout and footstep band."""
+        return STFTEngine(
+            self.sample_rate,
+            self.channels,
+            self.chunk_size,
+            band=(self.footstep_freq_low, self.footstep_freq_high),
+            per_channel=self.per_channel_detection
+        )
+    
+    def _create_direction_estimator(self):
+        """Create the direction estimator for the current layout, or None if it cannot run."""
+        if not self.direction_estimation or self.channels < 2:
+            return None
+        return DirectionEstimator(
+            self.sample_rate, self.channels, self.chunk_size,
+            band=(self.footstep_freq_low, self.footstep_freq_high))
+    
+    def set_direction_estimation(self, enabled):
+        """Enable or disable the azimuth estimate of detected footsteps."""
+        self.direction_estimation = bool(enabled)
+        self.direction_estimator = self._create_direction_estimator()
+    
+    def _create_spectrogram(self):
+        """Create the spectrogram analyzer for the current layout, feeding spectrogram_ring."""
+        return SpectrogramAnalyzer(
+            self.sample_rate, self.channels, self.chunk_size, self.spectrogram_ring,
+            band=(self.footstep_freq_low, self.footstep_freq_high))
+    
+    def set_spectrogram(self, enabled):
+        """
+        Start or stop feeding the spectrogram ring (the GUI's spectrogram view).
+        
+        Off by default, so the audio thread only pays for the column FFT
+        while the view is open.
+        """
+        self.spectrogram = self._create_spectrogram() if enabled else None
+    
+    def set_footstep_classifier(self, model):
+        """
+        Enable the second-stage footstep classifier, or disable it with None.
+        
+        The classifier runs only on chunks the RMS gate of _detect_footstep
+        accepts, and may reject them. The gain envelope and the STFT engine
+        make their own decisions and do not use it; a warning is printed
+        while the classifier is on together with either of them.
+        
+        Args:
+            model: Path of a model saved by train_classifier.py, or a FootstepClassifier
+        """
+        if model is None:
+            self.footstep_classifier = None
+            return
+        if not isinstance(model, FootstepClassifier):
+            model = FootstepClassifier.load(model)
+        self.footstep_classifier = CandidateClassifier(model, self.sample_rate, self.channels)
+        self._warn_unused_classifier()
+    
+    def _warn_unused_classifier(self):
+        """Warn if the classifier is on but the current detection path ignores it."""
+        if self.footstep_classifier is None:
+            return
+        if self.detection_engine == 'stft':
+            print("Warning: the footstep classifier is not used by the STFT engine")
+        elif self.gain_envelope is not None:
+            print("Warning: the footstep classifier is not used with the gain envelope")
+    
+    def _create_gain_envelope(self, previous=None, attack_ms=5.0, release_ms=80.0, hold_ms=50.0):
+        """Create the gain envelope for the current layout, keeping the times of `previous`."""
+        if previous is not None:
+            attack_ms, release_ms, hold_ms = previous.attack_ms, previous.release_ms, previous.hold_ms
+        return GainEnvelope(
+            self.sample_rate, attack_ms, release_ms, hold_ms,
+            follower_ms=previous.follower_ms if previous is not None else 5.0,
+            channels=self.channels if self.per_channel_detection else 1)
+    
+    def set_channels(self, channels):
+        """
+        Request a channel count (e.g. 6 for 5.1, 8 for 7.1), or None for stereo.
+        
+        The stream is reopened with the new layout; if the device has fewer
+        channels, negotiation at start() reduces the count to what it offers.
+        A running processor is restarted.
+        """
+        was_running = self.is_running
+        if was_running:
+            self.stop()
+        self.configure_stream(channels=2 if channels is None else channels)
+        if was_running:
+            self.start()
+    
+    def set_per_channel_detection(self, enabled):
+        """
+        Detect and enhance every channel on its own instead of the combined mix.
+        
+        A footstep on one surround channel then boosts only that channel.
+        The chunk still counts as a footstep when any channel detects one.
+        """
+        self.per_channel_detection = bool(enabled)
+        if self.stft_engine is not None:
+            self.stft_engine = self._create_stft_engine()
+        if self.gain_envelope is not None:
+            self.gain_envelope = self._create_gain_envelope(self.gain_envelope)
+    
+    def set_channel_enhancement(self, enabled_channels):
+        """
+        Choose which channels may be boosted.
+        
+        Args:
+            enabled_channels: Sequence of bools, one per channel in stream
+                order (missing entries count as enabled), or None to boost
+                every channel
+        """
+        if enabled_channels is not None:
+            enabled_channels = [bool(enabled) for enabled in enabled_channels]
+        self.channel_enhancement = enabled_channels
+        # Rebound rather than filled, so the audio thread sees the old or the new mask
+        self._channel_mask = self._build_channel_mask()
+    
+    def set_detection_engine(self, name):
+        """Select the detection/enhancement engine ('bandpass' or 'stft')."""
+        if name not in DETECTION_ENGINES:
+            raise ValueError(f"Unknown detection engine: {name!r} (expected one of {DETECTION_ENGINES})")
+        if name == 'stft' and self.stft_engine is None:
+            self.stft_engine = self._create_stft_engine()
+        self.detection_engine = name
+        self._warn_unused_classifier()
+    
+    def set_gain_envelope(self, enabled, attack_ms=5.0, release_ms=80.0, hold_ms=50.0):
+        """
+        Enable a smoothed, sample-accurate gain envelope instead of per-chunk switching.
+        
+        Args:
+            enabled: True to use the envelope, False for per-chunk switching
+            attack_ms: Time for the gain to rise towards the enhancement factor
+            release_ms: Time for the gain to fall back to unity
+            hold_ms: How long the gain is held after the band energy drops
+        """
+        if not enabled:
+            self.gain_envelope = None
+        elif self.gain_envelope is None:
+            self.gain_envelope = self._create_gain_envelope(None, attack_ms, release_ms, hold_ms)
+        else:
+            self.gain_envelope.set_times(attack_ms, release_ms, hold_ms)
+        self._warn_unused_classifier()
+    
+    def set_adaptive_threshold(self, enabled, margin_db=12.0, hysteresis_db=3.0):
+        """
+        Track the background level and detect relative to it instead of detection_threshold.
+        
+        Args:
+            enabled: True for the adaptive threshold, False for the fixed one
+            margin_db: How far above the noise floor a chunk must be to detect
+            hysteresis_db: How much lower the level may drop before detection ends
+        """
+        if not enabled:
+            self.noise_floor_tracker = None
+            self.noise_floor = 0.0
+        elif self.noise_floor_tracker is None:
+            self.noise_floor_tracker = NoiseFloorTracker(
+                self.chunk_size / self.sample_rate, margin_db, hysteresis_db)
+        else:
+            self.noise_floor_tracker.margin_db = float(margin_db)
+            self.noise_floor_tracker.hysteresis_db = float(hysteresis_db)
+    
+    def _threshold(self):
+        """Detection threshold for the next chunk (fixed or adaptive)."""
+        if self.noise_floor_tracker is None:
+            return self.detection_threshold
+        return self.noise_floor_tracker.threshold
+    
+    def _track_noise_floor(self, rms):
+        """Advance the adaptive threshold with a chunk's level; returns its decision."""
+        is_above = self.noise_floor_tracker.update(rms)
+        self.noise_floor = self.noise_floor_tracker.floor
+        return is_above
+    
+    def set_format_negotiation(self, enabled):
+        """
+        Enable or disable stream negotiation (takes effect at the next start).
+        
+        Disabled, the stream is opened as int16 at sample_rate, as before.
+        """
+        self.negotiate_format = bool(enabled)
+    
+    def _is_float_stream(self):
+        """Whether the stream delivers float32 samples."""
+        return self.audio_format == getattr(self.backend, 'paFloat32', 1)
+    
+    def stream_format_name(self):
+        """Name of the negotiated sample format, for display."""
+        return 'float32' if self._is_float_stream() else 'int16'
+    
+    def _negotiate_stream(self):
+        """Choose the stream format, rate and channel count, and set up rate conversion."""
+        self._input_resampler = None
+        self._output_resampler = None
+        int16_format = getattr(self.backend, 'paInt16', 8)
+        
+        if not self.negotiate_format:
+            self.audio_format = int16_format
+            rate = self.sample_rate
+        else:
+            formats = (getattr(self.backend, 'paFloat32', 1), int16_format)
+            self.audio_format, rate, channels = self.session.negotiate(self.channels, self.sample_rate, formats)
+            if channels != self.channels:
+                self.configure_stream(channels=channels)
+            if rate != self.sample_rate and self.follow_device_rate:
+                self.configure_stream(sample_rate=rate)
+        
+        self.device_rate = rate
+        self.device_chunk_size = self.chunk_size
+        if rate != self.sample_rate:
+            # The processing chunk must map to a whole number of device frames
+            up, down = resample_ratio(self.sample_rate, rate)
+            chunk_size = max(down, int(round(self.chunk_size / down)) * down)
+            if chunk_size != self.chunk_size:
+                print(f"Using {chunk_size}-frame chunks for {self.sample_rate} <-> {rate} Hz conversion")
+                self.configure_stream(chunk_size=chunk_size)
+            self.device_chunk_size = chunk_size * up // down
+            self._input_resampler = StreamingResampler(rate, self.sample_rate, self.channels, self.device_chunk_size)
+            self._output_resampler = StreamingResampler(self.sample_rate, rate, self.channels, chunk_size)
+        self._allocate_buffers()
+    
+    def set_pipeline_mode(self, enabled, slots=8, prefill=2):
+        """
+        Enable or disable the threaded capture/DSP/playback pipeline (takes effect at the next start).
+        
+        Args:
+            enabled: Use the pipeline instead of the duplex stream
+            slots: Blocks held by each ring buffer
+            prefill: Blocks queued before playback starts; each adds one chunk of latency
+        """
+        if not 1 <= prefill <= slots:
+            raise ValueError(f"prefill must be between 1 and slots ({slots}), got {prefill}")
+        self.use_pipeline = bool(enabled)
+        self.pipeline_slots = int(slots)
+        self.pipeline_prefill = int(prefill)
+    
+    def set_adaptive_latency(self, enabled, initial_chunk_size=256):
+        """
+        Let the chunk size follow the measured processing headroom.
+        
+        Processing starts at initial_chunk_size and moves between the sizes
+        in latency_tuner.CHUNK_SIZES while it runs (see LatencyTuner). The
+        stream stays open and is only read in differently sized blocks, so a
+        switch has no gap. Applies to blocking I/O; callback and pipeline
+        streams keep the chunk size they were opened with. Turning it off
+        keeps the current chunk size.
+        """
+        self.adaptive_latency = bool(enabled)
+        self.adaptive_initial_chunk_size = int(initial_chunk_size)
+        self.latency_tuner = self._create_latency_tuner() if self.is_running else None
+    
+    def _adaptive_latency_applies(self):
+        """Whether adaptive latency is on and the I/O mode can re-block a running stream."""
+        return self.adaptive_latency and not self.use_callback and not self.use_pipeline
+    
+    def _create_latency_tuner(self):
+        """Create the tuner for the negotiated stream, starting from the current chunk size."""
+        if not self._adaptive_latency_applies():
+            return None
+        sizes = CHUNK_SIZES
+        if self._input_resampler is not None:
+            # Every size must map to a whole number of device frames
+            up, down = resample_ratio(self.sample_rate, self.device_rate)
+            sizes = [max(down, int(round(size / down)) * down) for size in CHUNK_SIZES]
+        tuner = LatencyTuner(self.sample_rate, sizes, self.adaptive_initial_chunk_size)
+        tuner.reset(self.chunk_size)
+        return tuner
+    
+    def _resize_chunks(self, chunk_size):
+        """
+        Switch the running stream to a new chunk size between two chunks (audio thread).
+        
+        Everything sized by the chunk is rebuilt and handed the state of
+        what it replaces (filter memory, STFT overlap, resampler history,
+        noise floor), so the output continues without a gap.
+        """
+        device_chunk_size = chunk_size
+        if self._input_resampler is not None:
+            up, down = resample_ratio(self.sample_rate, self.device_rate)
+            device_chunk_size = chunk_size * up // down
+            self._input_resampler.resize(device_chunk_size)
+            self._output_resampler.resize(chunk_size)
+        self.chunk_size = chunk_size
+        self.device_chunk_size = device_chunk_size
+        
+        if isinstance(self.footstep_filter, BlockFilter):
+            footstep_filter = self._create_footstep_filter()
+            footstep_filter.zi = self.footstep_filter.zi
+            self.footstep_filter = footstep_filter
+        if self.stft_engine is not None:
+            stft_engine = self._create_stft_engine()
+            stft_engine.continue_from(self.stft_engine)
+            self.stft_engine = stft_engine
+        if self.direction_estimator is not None:
+            self.direction_estimator = self._create_direction_estimator()
+        if self.spectrogram is not None:
+            self.spectrogram = self._create_spectrogram()
+        if self.noise_floor_tracker is not None:
+            self.noise_floor_tracker.set_chunk_seconds(chunk_size / self.sample_rate)
+        self._allocate_buffers()
+        self.measured_latency = self._device_latency + chunk_size / self.sample_rate
+        if self.recorder is not None:
+            # A recording holds one chunk layout, so the ring starts over at the new size
+            self._open_recorder()
+    
+    def set_instrumentation(self, enabled, reset=False):
+        """Enable or disable per-stage timing, optionally clearing what was collected."""
+        if reset:
+            self.instrumentation.reset()
+        self.instrumentation.enabled = bool(enabled)
+    
+    def instrumentation_snapshot(self):
+        """Return the instrumentation counters and per-stage latency summaries."""
+        return self.instrumentation.snapshot()
+    
+    def dump_instrumentation(self, path):
+        """Write the instrumentation histograms to a .json or .csv file."""
+        self.instrumentation.dump(path)
+        return path
+    
+    def set_flight_recorder(self, path, seconds=60.0):
+        """
+        Record the raw input and the per-chunk decisions into a ring file (takes effect at the next start).
+        
+        Args:
+            path: Ring file holding the last `seconds` of audio; None turns recording off
+            seconds: How much audio the ring keeps, which bounds the file size
+        """
+        self.recorder_path = path
+        self.recorder_seconds = float(seconds)
+        if path is None:
+            self._close_recorder()
+    
+    def _recorder_metadata(self):
+        """Stream layout and detector settings a replay needs to reproduce the decisions."""
+        envelope = self.gain_envelope
+        tracker = self.noise_floor_tracker
+        return {
+            'sample_rate': self.sample_rate,
+            'device_rate': self.device_rate,
+            'channels': self.channels,
+            'chunk_size': self.chunk_size,
+            'device_chunk_size': self.device_chunk_size,
+            'stream_format': self.stream_format_name(),
+            'band': (float(self.footstep_freq_low), float(self.footstep_freq_high)),
+            'filter_order': self.filter_order,
+            'detection_engine': self.detection_engine,
+            'gain_envelope': (None if envelope is None
+                              else (envelope.attack_ms, envelope.release_ms, envelope.hold_ms)),
+            'adaptive_threshold': None if tracker is None else (tracker.margin_db, tracker.hysteresis_db),
+            'preallocated': self.use_preallocated_buffers,
+            'soft_clip_table': self.use_soft_clip_table,
+            'per_channel_detection': self.per_channel_detection,
+            'channel_enhancement': self.channel_enhancement,
+            'footstep_classifier': (None if self.footstep_classifier is None
+                                    else self.footstep_classifier.model.parameters()),
+        }
+    
+    def _open_recorder(self):
+        """Open the flight recorder for the negotiated stream, continuing the ring if nothing changed."""
+        if self.recorder_path is None:
+            return
+        dtype = np.float32 if self._is_float_stream() else np.int16
+        samples = self.device_chunk_size * self.channels
+        metadata = self._recorder_metadata()
+        slots = slots_for(self.recorder_seconds, self.device_rate, self.device_chunk_size)
+        recorder = self.recorder
+        if recorder is not None and recorder.slots == slots and recorder.matches(
+                self.recorder_path, samples, dtype, metadata):
+            return
+        self._close_recorder()
+        try:
+            self.recorder = FlightRecorder(self.recorder_path, slots, samples, dtype, metadata)
+        except Exception as e:
+            print(f"Error opening flight recorder: {e}")
+    
+    def _close_recorder(self):
+        """Flush and close the flight recorder file."""
+        recorder = self.recorder
+        self.recorder = None
+        if recorder is not None:
+            recorder.close()
+    
+    def set_callback_mode(self, enabled):
+        """Choose callback-driven (True) or blocking read/write (False) I/O; takes effect on start."""
+        self.use_callback = bool(enabled)
+    
+    def set_soft_clip_table(self, enabled):
+        """Enable or disable the lookup-table soft clip for enhanced chunks."""
+        if enabled:
+            self.soft_clip_tables.get(self.enhancement_factor)
+        self.use_soft_clip_table = bool(enabled)
     
     def set_enhancement_factor(self, value):
         """Update the enhancement factor."""
+        if self.use_soft_clip_table:
+            # Build the table here (GUI thread) rather than on the audio thread
+            self.soft_clip_tables.get(float(value))
         self.enhancement_factor = float(value)
     
     def set_detection_threshold(self, value):
@@ -103,12 +896,28 @@ class AudioProcessor:
         self.detection_threshold = float(value)
     
     def start(self):
-        """Start audio processing in a separate thread."""
+        """Start audio processing in a separate thread, or via the stream callback."""
         if not self.is_running:
+            if self._adaptive_latency_applies() and self.chunk_size != self.adaptive_initial_chunk_size:
+                # Adaptive latency starts from a small chunk every time
+                self.configure_stream(chunk_size=self.adaptive_initial_chunk_size)
+            try:
+                self._negotiate_stream()
+            except Exception as e:
+                print(f"Error negotiating audio stream: {e}")
+                return False
+            self.latency_tuner = self._create_latency_tuner()
+            self._open_recorder()
             self.is_running = True
+            self._start_requested = time.perf_counter()
             if self.on_status_change:
                 self.on_status_change("Running")
             
+            if self.use_pipeline:
+                return self._start_pipeline()
+            if self.use_callback:
+                return self._start_callback_stream()
+            
             self.processing_thread = threading.Thread(target=self._process_audio)
             self.processing_thread.daemon = True
             self.processing_thread.start()
@@ -125,108 +934,713 @@ class AudioProcessor:
             # Wait for processing thread to finish
             if self.processing_thread and self.processing_thread.is_alive():
                 self.processing_thread.join(timeout=1.0)
+            self.telemetry.reset()
             
-            # Close audio stream
-            if self.audio_stream:
-                try:
-                    if self.audio_stream.is_active():
-                        self.audio_stream.stop_stream()
-                    self.audio_stream.close()
-                except Exception as e:
-                    print(f"Error closing audio stream: {e}")
+            if self.pipeline is not None:
+                self.pipeline.stop()
             
-            # Terminate PyAudio
-            try:
-                self.p.terminate()
-                # Reinitialize more safely
-                try:
-                    self.p = pyaudio.PyAudio()
-                except Exception as e:
-                    print(f"Warning: Could not reinitialize PyAudio: {e}")
-            except Exception as e:
-                print(f"Error terminating PyAudio: {e}")
-                
+            # Pause the stream; the session keeps it open for the next start
+            self.session.pause()
             return True
         return False
     
+    def close(self):
+        """Stop processing and release the audio device (application exit)."""
+        self.stop()
+        self._close_recorder()
+        self.session.terminate()
+        self.audio_stream = None
+    
     def _detect_footstep(self, audio_data):
         """
         Analyze audio to detect potential footstep sounds.
         
         Uses a combination of bandpass filtering to isolate frequencies typical
         of footsteps, and energy detection to identify transient sounds.
+        
+        audio_data may be an interleaved buffer or a (frames, channels) array;
+        each channel is filtered separately with state carried across chunks.
+        The per-channel decisions are left in _channel_detected.
         """
         # Apply bandpass filter to isolate potential footstep frequencies
-        filtered_audio = signal.lfilter(self.b, self.a, audio_data)
+        instrumentation = self.instrumentation
+        frames = deinterleave(audio_data, self.channels)
+        filtered_audio = self.footstep_filter.process(frames)
+        if instrumentation.enabled:
+            instrumentation.lap('filter')
+        
+        rms = self._measure_levels(filtered_audio)
+        
+        # Check if the energy exceeds our threshold. The adaptive tracker
+        # moves its threshold for the next chunk, so read this chunk's first
+        threshold = self._threshold()
+        if self.noise_floor_tracker is None:
+            is_footstep = rms > threshold
+        else:
+            is_footstep = self._track_noise_floor(rms)
+        if self.per_channel_detection:
+            # Every channel against the same threshold, all at once
+            np.greater(self._channel_levels, threshold, out=self._channel_detected)
+            is_footstep = bool(self._channel_detected.any())
+        else:
+            self._channel_detected.fill(is_footstep)
+        if instrumentation.enabled:
+            instrumentation.lap('detect')
+        
+        classifier = self.footstep_classifier
+        if classifier is not None:
+            classifier.push(frames)
+            if is_footstep and not classifier.classify():
+                is_footstep = False
+                self._channel_detected.fill(False)
+            if instrumentation.enabled:
+                instrumentation.lap('classify')
+        
+        self._update_detection(rms, is_footstep)
+        self._push_spectrogram(frames, is_footstep)
+        if is_footstep:
+            self._estimate_direction(frames)
+        return is_footstep
+    
+    def _measure_levels(self, filtered_audio):
+        """
+        Compute the RMS level of a filtered (frames, channels) block.
         
-        # Calculate RMS of the filtered audio
-        rms = np.sqrt(np.mean(filtered_audio**2))
+        In per-channel mode the level of every channel is also left in
+        _channel_levels, computed for all channels at once.
+        """
+        # vdot avoids a squared temporary
+        flat = filtered_audio.reshape(-1)
+        rms = np.sqrt(np.vdot(flat, flat) / flat.size)
+        if self.per_channel_detection:
+            power = self._channel_power
+            np.vecdot(filtered_audio.T, filtered_audio.T, out=power)
+            np.multiply(power, 1.0 / filtered_audio.shape[0], out=power)
+            np.sqrt(power, out=self._channel_levels)
+        return rms
+    
+    def _select_enhanced_channels(self):
+        """
+        Combine the chunk's per-channel decisions with the channel mask.
+        
+        Returns:
+            The number of channels to boost. When that is some but not all
+            of them, _channel_split is set and _channel_gains and
+            _channel_passthrough describe the split.
+        """
+        enhanced = np.logical_and(self._channel_detected, self._channel_mask, out=self._channel_enhanced)
+        count = int(np.count_nonzero(enhanced))
+        self._channel_split = 0 < count < enhanced.size
+        if self._channel_split:
+            self._channel_gains.fill(1.0)
+            np.copyto(self._channel_gains, np.float32(self.enhancement_factor), where=enhanced)
+            np.logical_not(enhanced, out=self._channel_passthrough)
+        return count
+    
+    def _apply_channel_gains(self, frames, out):
+        """Boost and soft clip the selected channels of a (frames, channels) block into `out`."""
+        # Unity gain copies the other channels exactly, so only tanh needs the mask
+        np.multiply(frames, self._channel_gains, out=out)
+        np.tanh(out, out=out, where=self._channel_enhanced)
+    
+    def _restore_passthrough(self, audio_array, out):
+        """Copy the unboosted channels of a split chunk back bit-exact (int16 outputs)."""
+        if self._channel_split:
+            np.copyto(deinterleave(out, self.channels), deinterleave(audio_array, self.channels),
+                      where=self._channel_passthrough)
+    
+    def _estimate_direction(self, frames):
+        """
+        Estimate the azimuth of a detected chunk and notify listeners.
+        
+        frames is the unfiltered (frames, channels) block; the estimator
+        restricts itself to the footstep band in the frequency domain.
+        """
+        estimator = self.direction_estimator
+        if estimator is None:
+            return
+        self.azimuth = estimator.process(frames)
+        self.direction_count += 1
+        if self.instrumentation.enabled:
+            self.instrumentation.lap('direction')
+        if self.on_direction_change:
+            self.on_direction_change(self.azimuth)
+    
+    def _push_spectrogram(self, frames, is_footstep):
+        """Add the chunk's column to the spectrogram ring, while the view is open."""
+        spectrogram = self.spectrogram
+        if spectrogram is None:
+            return
+        spectrogram.process(frames, is_footstep)
+        if self.instrumentation.enabled:
+            self.instrumentation.lap('spectrogram')
+    
+    def _update_detection(self, rms, is_footstep):
+        """Record the level and detection result of a chunk and notify listeners."""
         self.current_level = rms
         
         # Update UI with current level
         if self.on_level_change:
             self.on_level_change(rms)
         
-        # Check if the energy exceeds our threshold
-        is_footstep = rms > self.detection_threshold
-        
         # Only notify UI if footstep state has changed
         if is_footstep != self.footstep_detected:
             self.footstep_detected = is_footstep
             if self.on_footstep_detected:
                 self.on_footstep_detected(is_footstep)
+    
+    def _open_stream(self, stream_callback=None):
+        """Open the duplex audio stream and record its reported latency."""
+        kwargs = {}
+        if stream_callback is not None:
+            kwargs['stream_callback'] = stream_callback
         
-        return is_footstep
+        self.audio_stream = self.session.open_stream(
+            format=self.audio_format,
+            channels=self.channels,
+            rate=self.device_rate,
+            input=True,
+            output=True,
+            frames_per_buffer=self.device_chunk_size,
+            **kwargs
+        )
+        self._reset_stream_state()
+        
+        # Best estimate until the callback reports measured timestamps
+        try:
+            self._device_latency = self.audio_stream.get_input_latency() + self.audio_stream.get_output_latency()
+        except Exception:
+            self._device_latency = self.chunk_size / self.sample_rate
+        self.measured_latency = self._device_latency + self.chunk_size / self.sample_rate
+        
+        print("Audio stream started.")
+    
+    def _reset_stream_state(self):
+        """Start from a clean filter state for a new stream."""
+        self.footstep_filter.reset()
+        if self.stft_engine is not None:
+            self.stft_engine.reset()
+        if self.gain_envelope is not None:
+            self.gain_envelope.reset()
+        if self.noise_floor_tracker is not None:
+            self.noise_floor_tracker.reset()
+        if self.direction_estimator is not None:
+            self.direction_estimator.reset()
+        if self.footstep_classifier is not None:
+            self.footstep_classifier.reset()
+        self.azimuth = None
+        for resampler in (self._input_resampler, self._output_resampler):
+            if resampler is not None:
+                resampler.reset()
+        self.xrun_count = 0
+    
+    def _mark_first_sample(self):
+        """Record start-to-first-sample latency on the first chunk after start()."""
+        if self._start_requested is not None:
+            self.start_latency = time.perf_counter() - self._start_requested
+            self._start_requested = None
+    
+    def _process_stream_buffer(self, in_data, out=None):
+        """
+        Process one buffer in the stream's sample format and rate.
+        
+        With the flight recorder on, the raw buffer is copied into the ring
+        before processing and the decisions are committed after it.
+        
+        Returns:
+            The buffer to play: in_data itself when passed through untouched
+        """
+        recorder = self.recorder
+        if recorder is None:
+            return self._process_device_buffer(in_data, out)
+        recorded = recorder.begin(in_data, time.perf_counter())
+        threshold = self._threshold()
+        output = self._process_device_buffer(in_data, out)
+        if recorded:
+            recorder.commit(time.perf_counter(), self.current_level, self.footstep_detected,
+                            self.current_enhancement, threshold, self.enhancement_factor,
+                            self.detection_threshold)
+        return output
+    
+    def _process_device_buffer(self, in_data, out=None):
+        """
+        Detect and enhance one buffer in the stream's sample format and rate.
+        
+        int16 streams at the processing rate go through _process_chunk. A
+        float32 stream is read through a zero-copy view; with rate
+        conversion the chunk is resampled to the processing rate and back.
+        
+        Returns:
+            The buffer to play: in_data itself when passed through untouched
+        """
+        is_float = self._is_float_stream()
+        if not is_float and self._input_resampler is None:
+            return self._process_chunk(in_data, out)
+        
+        instrumentation = self.instrumentation
+        if is_float:
+            audio_float = np.frombuffer(in_data, dtype=np.float32)
+        else:
+            audio_float = np.frombuffer(in_data, dtype=np.int16).astype(np.float32) / 32767.0
+        
+        if self._input_resampler is None:
+            if (self.use_preallocated_buffers and self.detection_engine == 'bandpass'
+                    and self.gain_envelope is None and audio_float.size == self._float_scratch.size):
+                if instrumentation.enabled:
+                    instrumentation.lap('convert')
+                return self._process_float_in_place(in_data, audio_float, out)
+        else:
+            resampled = self._input_resampler.process(deinterleave(audio_float, self.channels))
+            audio_float = resampled.astype(np.float32).reshape(-1)
+        if instrumentation.enabled:
+            instrumentation.lap('convert')
+        
+        enhanced = self.enhance_block(audio_float)
+        if enhanced is None:
+            if self._input_resampler is None:
+                return in_data
+            enhanced = audio_float
+        
+        if self._output_resampler is not None:
+            enhanced = self._output_resampler.process(deinterleave(enhanced, self.channels)).reshape(-1)
+        if is_float:
+            output = np.asarray(enhanced, dtype=np.float32)
+        else:
+            output = (np.clip(enhanced, -1.0, 1.0) * 32767.0).astype(np.int16)
+        if instrumentation.enabled:
+            instrumentation.lap('encode')
+        return output
+    
+    def _process_float_in_place(self, in_data, audio_float, out=None):
+        """Allocation-free processing of a float32 chunk at the processing rate."""
+        if not self._detect_footstep(audio_float) or not self._select_enhanced_channels():
+            self.current_enhancement = 1.0
+            self._publish_telemetry()
+            return in_data
+        
+        if out is None:
+            out = self._float_scratch
+        if self._channel_split:
+            self._apply_channel_gains(deinterleave(audio_float, self.channels), deinterleave(out, self.channels))
+        else:
+            np.multiply(audio_float, np.float32(self.enhancement_factor), out=out)
+            np.tanh(out, out=out)
+        if self.instrumentation.enabled:
+            self.instrumentation.lap('enhance')
+        
+        self.current_enhancement = self.enhancement_factor
+        self._publish_telemetry()
+        return out
+    
+    def _process_chunk(self, audio_data, out=None):
+        """
+        Detect and enhance one chunk of interleaved int16 audio.
+        
+        Args:
+            audio_data: Raw bytes read from the stream
+            out: Optional preallocated int16 array receiving enhanced samples
+        
+        Returns:
+            The output buffer: audio_data itself when passed through untouched,
+            otherwise the enhanced int16 samples
+        """
+        # Convert to numpy array for processing (a view, no copy)
+        audio_array = np.frombuffer(audio_data, dtype=np.int16)
+        
+        if (self.use_preallocated_buffers and self.detection_engine == 'bandpass'
+                and self.gain_envelope is None and audio_array.size == self._float_scratch.size):
+            return self._process_chunk_in_place(audio_data, audio_array, out)
+        
+        # Normalize to float (-1.0 to 1.0)
+        audio_float = audio_array.astype(np.float32) / 32767.0
+        instrumentation = self.instrumentation
+        if instrumentation.enabled:
+            instrumentation.lap('convert')
+        
+        if self._can_use_soft_clip_table():
+            if not self._detect_footstep(audio_float) or not self._select_enhanced_channels():
+                self.current_enhancement = 1.0
+                self._publish_telemetry()
+                return audio_data
+            output = np.empty_like(audio_array) if out is None else out[:audio_array.size]
+            self._soft_clip_with_table(audio_array, output)
+            return output.tobytes() if out is None else output
+        
+        enhanced_audio = self.enhance_block(audio_float)
+        
+        if enhanced_audio is not None:
+            # Convert back to int16 format
+            if out is None:
+                output = (enhanced_audio * 32767.0).astype(np.int16)
+                self._restore_passthrough(audio_array, output)
+                out = output.tobytes()
+            else:
+                out = out[:audio_array.size]
+                np.multiply(enhanced_audio, 32767.0, out=out, casting='unsafe')
+                self._restore_passthrough(audio_array, out)
+            if instrumentation.enabled:
+                instrumentation.lap('encode')
+            return out
+        
+        # Pass through original audio
+        return audio_data
+    
+    def _process_chunk_in_place(self, audio_data, audio_array, out=None):
+        """
+        Allocation-free variant of _process_chunk.
+        
+        Every step writes into the preallocated scratch buffers with out= ufuncs.
+        The returned int16 array can be handed to PyAudio directly, since
+        numpy arrays expose a plain buffer.
+        """
+        audio_float = self._float_scratch
+        
+        # Normalize to float (-1.0 to 1.0); copy first so the int16 -> float32
+        # cast does not go through a temporary ufunc buffer
+        np.copyto(audio_float, audio_array)
+        np.multiply(audio_float, np.float32(1.0 / 32767.0), out=audio_float)
+        instrumentation = self.instrumentation
+        if instrumentation.enabled:
+            instrumentation.lap('convert')
+        
+        if not self._detect_footstep(audio_float) or not self._select_enhanced_channels():
+            # Pass through original audio
+            self.current_enhancement = 1.0
+            self._publish_telemetry()
+            return audio_data
+        
+        if out is None:
+            out = self._int16_scratch
+        
+        if self.use_soft_clip_table:
+            self._soft_clip_with_table(audio_array, out)
+            return out
+        
+        # Enhance, soft clip and scale back to the int16 range in place
+        if self._channel_split:
+            frames = deinterleave(audio_float, self.channels)
+            self._apply_channel_gains(frames, frames)
+        else:
+            np.multiply(audio_float, np.float32(self.enhancement_factor), out=audio_float)
+            np.tanh(audio_float, out=audio_float)
+        if instrumentation.enabled:
+            instrumentation.lap('enhance')
+        np.multiply(audio_float, np.float32(32767.0), out=audio_float)
+        np.copyto(out, audio_float, casting='unsafe')
+        self._restore_passthrough(audio_array, out)
+        if instrumentation.enabled:
+            instrumentation.lap('encode')
+        
+        self.current_enhancement = self.enhancement_factor
+        self._publish_telemetry()
+        return out
+    
+    def _can_use_soft_clip_table(self):
+        """The table replaces the broadband gain + tanh, so only that path can use it."""
+        return (self.use_soft_clip_table and self.detection_engine == 'bandpass'
+                and self.gain_envelope is None)
+    
+    def _soft_clip_with_table(self, audio_array, out):
+        """Enhance int16 samples straight into `out` through the cached tanh table."""
+        table = self.soft_clip_tables.get(self.enhancement_factor)
+        SoftClipTables.apply(table, audio_array, out)
+        self._restore_passthrough(audio_array, out)
+        if self.instrumentation.enabled:
+            # The table does enhance and encode in one step
+            self.instrumentation.lap('enhance')
+        self.current_enhancement = self.enhancement_factor
+        self._publish_telemetry()
+    
+    def enhance_block(self, audio_float):
+        """
+        Detect footsteps in a block of float audio (-1.0 to 1.0) and enhance it.
+        
+        Returns:
+            The enhanced block, or None if no footstep was detected and the
+            input should be passed through unchanged
+        """
+        self._channel_split = False
+        if self.detection_engine == 'stft':
+            return self._enhance_block_stft(audio_float)
+        if self.gain_envelope is not None:
+            return self._enhance_block_envelope(audio_float)
+        
+        # Detect footstep in audio
+        footstep_detected = self._detect_footstep(audio_float)
+        
+        if footstep_detected and self._select_enhanced_channels():
+            if self._channel_split:
+                # Only some channels are boosted
+                enhanced_audio = np.empty_like(audio_float)
+                self._apply_channel_gains(deinterleave(audio_float, self.channels),
+                                          deinterleave(enhanced_audio, self.channels))
+            else:
+                # Enhance the footstep sound
+                enhanced_audio = audio_float * self.enhancement_factor
+                
+                # Apply soft clipping to avoid harsh distortion
+                enhanced_audio = np.tanh(enhanced_audio)
+            if self.instrumentation.enabled:
+                self.instrumentation.lap('enhance')
+            
+            # Update current enhancement level for UI
+            self.current_enhancement = self.enhancement_factor
+            self._publish_telemetry()
+            return enhanced_audio
+        
+        self.current_enhancement = 1.0
+        self._publish_telemetry()
+        return None
+    
+    def _enhance_block_stft(self, audio_float):
+        """
+        Detect and enhance a block with the STFT engine.
+        
+        The engine delays the signal by its overlap, so its output is always
+        returned (never None), even when nothing was enhanced.
+        """
+        frames = deinterleave(audio_float, self.channels)
+        length = frames.shape[0]
+        if length != self.chunk_size:
+            # Short final block (offline processing): pad to a full chunk
+            padded = np.zeros((self.chunk_size, self.channels), dtype=frames.dtype)
+            padded[:length] = frames
+            frames = padded
+        
+        instrumentation = self.instrumentation
+        engine = self.stft_engine
+        output, is_footstep, level = engine.process(
+            frames, self.enhancement_factor, self._threshold(),
+            channel_mask=None if self.channel_enhancement is None else self._channel_mask)
+        if self.noise_floor_tracker is not None:
+            self._track_noise_floor(level)
+        if self.per_channel_detection:
+            np.copyto(self._channel_levels, engine.last_channel_levels)
+        self._channel_detected[:] = engine.last_channel_detected
+        self._update_detection(level, is_footstep)
+        if instrumentation.enabled:
+            # Analysis, detection and bin gains happen together in the engine
+            instrumentation.lap('detect')
+        self._push_spectrogram(frames[:length], is_footstep)
+        if is_footstep:
+            self._estimate_direction(frames[:length])
+        
+        boosted = np.logical_and(self._channel_detected, self._channel_mask, out=self._channel_enhanced)
+        if is_footstep and boosted.all():
+            # Apply soft clipping to avoid harsh distortion
+            output = np.tanh(output)
+            self.current_enhancement = self.enhancement_factor
+        else:
+            output = output.copy()
+            if boosted.any():
+                np.tanh(output, out=output, where=boosted)
+                self.current_enhancement = self.enhancement_factor
+            else:
+                self.current_enhancement = 1.0
+        if instrumentation.enabled:
+            instrumentation.lap('enhance')
+        self._publish_telemetry()
+        
+        return output[:length].reshape(audio_float.shape)
+    
+    def _enhance_block_envelope(self, audio_float):
+        """
+        Detect and enhance a block with the smoothed gain envelope.
+        
+        current_enhancement reports the largest gain actually applied in the block.
+        """
+        instrumentation = self.instrumentation
+        frames = deinterleave(audio_float, self.channels)
+        filtered_audio = self.footstep_filter.process(frames)
+        if instrumentation.enabled:
+            instrumentation.lap('filter')
+        rms = self._measure_levels(filtered_audio)
+        
+        # gains is (frames, 1), or (frames, channels) per channel
+        gains, active = self.gain_envelope.process(
+            filtered_audio, self.enhancement_factor, self._threshold())
+        if self.noise_floor_tracker is not None:
+            self._track_noise_floor(rms)
+        self._channel_detected[:] = active
+        if self.channel_enhancement is not None:
+            gains = np.where(self._channel_mask, gains, 1.0)
+        is_footstep = bool(active.any())
+        self._update_detection(rms, is_footstep)
+        if instrumentation.enabled:
+            instrumentation.lap('detect')
+        self._push_spectrogram(frames, is_footstep)
+        if is_footstep:
+            self._estimate_direction(frames)
+        
+        peak_gain = float(gains.max())
+        if peak_gain <= 1.0 + 1e-4:
+            # Pass through original audio
+            self.current_enhancement = 1.0
+            self._publish_telemetry()
+            return None
+        
+        # Blend towards the soft-clipped signal in proportion to the gain,
+        # so unity gain is exactly the original and there is no click
+        clipped = np.tanh(frames * gains)
+        if self.enhancement_factor > 1.0:
+            mix = (gains - 1.0) / (self.enhancement_factor - 1.0)
+            enhanced = frames + (clipped - frames) * mix
+        else:
+            enhanced = clipped
+        if instrumentation.enabled:
+            instrumentation.lap('enhance')
+        
+        self.current_enhancement = peak_gain
+        self._publish_telemetry()
+        return enhanced.astype(np.float32).reshape(audio_float.shape)
+    
+    def _publish_telemetry(self):
+        """Publish the stats of the chunk just processed to the telemetry channel."""
+        if self.instrumentation.enabled:
+            self.instrumentation.count_chunk(
+                self.footstep_detected, self.current_enhancement != 1.0, self.xrun_count)
+        self.telemetry.publish(
+            self.current_level,
+            self.footstep_detected,
+            self.current_enhancement,
+            noise_floor=self.noise_floor,
+            threshold=self._threshold(),
+            latency=self.measured_latency,
+            xruns=self.xrun_count,
+            start_latency=self.start_latency,
+            stream_format=self.stream_format_name(),
+            device_rate=self.device_rate,
+            sample_rate=self.sample_rate,
+            target_latency=self.chunk_size / self.sample_rate,
+            chunk_size=self.chunk_size,
+            azimuth=self.azimuth,
+            direction_count=self.direction_count,
+            pipeline=self.pipeline.stats() if self.use_pipeline and self.pipeline is not None else None,
+            channel_levels=self._channel_levels.tolist() if self.per_channel_detection else None,
+            channel_footsteps=self._channel_detected.tolist() if self.per_channel_detection else None
+        )
+    
+    def _start_pipeline(self):
+        """Start the capture, DSP and playback threads on separate input and output streams."""
+        self.processing_thread = None
+        try:
+            self.pipeline = AudioPipeline(self, self.pipeline_slots, self.pipeline_prefill)
+            self._reset_stream_state()
+            self.pipeline.start()
+            self.audio_stream = self.pipeline.output_stream
+            
+            # The jitter buffer holds prefill chunks on top of the device buffers
+            period = self.device_chunk_size / self.device_rate
+            try:
+                self.measured_latency = (
+                    self.pipeline.input_stream.get_input_latency()
+                    + self.pipeline.output_stream.get_output_latency()
+                    + (self.pipeline_prefill + 1) * period
+                )
+            except Exception:
+                self.measured_latency = (self.pipeline_prefill + 2) * period
+            print("Audio pipeline started.")
+            return True
+        except Exception as e:
+            print(f"Error opening audio streams: {e}")
+            self.is_running = False
+            if self.on_status_change:
+                self.on_status_change("Error")
+            return False
+    
+    def _start_callback_stream(self):
+        """Open the stream in callback mode; PortAudio drives the processing."""
+        self.processing_thread = None
+        try:
+            self._allocate_buffers()
+            self._open_stream(stream_callback=self._audio_callback)
+            return True
+        except Exception as e:
+            print(f"Error opening audio stream: {e}")
+            self.is_running = False
+            if self.on_status_change:
+                self.on_status_change("Error")
+            return False
+    
+    def _audio_callback(self, in_data, frame_count, time_info, status_flags):
+        """PortAudio stream callback: process one chunk without blocking."""
+        xrun_flags = (
+            getattr(self.backend, 'paInputUnderflow', 1)
+            | getattr(self.backend, 'paInputOverflow', 2)
+            | getattr(self.backend, 'paOutputUnderflow', 4)
+            | getattr(self.backend, 'paOutputOverflow', 8)
+        )
+        if status_flags & xrun_flags:
+            self.xrun_count += 1
+        
+        # Round trip from the ADC timestamp of this input to the DAC time of its output
+        if time_info:
+            latency = time_info.get('output_buffer_dac_time', 0) - time_info.get('input_buffer_adc_time', 0)
+            if latency > 0:
+                self.measured_latency = latency
+        
+        self._mark_first_sample()
+        if self.instrumentation.enabled:
+            self.instrumentation.start()
+        try:
+            out = self._output_ring[self._ring_index]
+            self._ring_index = (self._ring_index + 1) % self.ring_slots
+            output = self._process_stream_buffer(in_data, out)
+            if not isinstance(output, bytes) and not self.use_preallocated_buffers:
+                output = output.tobytes()
+        except Exception as e:
+            print(f"Error during audio processing: {e}")
+            output = in_data
+        
+        if self.is_running:
+            return (output, getattr(self.backend, 'paContinue', 0))
+        return (output, getattr(self.backend, 'paComplete', 1))
     
     def _process_audio(self):
         """Process the audio stream in real-time."""
         try:
             # Open audio stream
-            self.audio_stream = self.p.open(
-                format=self.audio_format,
-                channels=self.channels,
-                rate=self.sample_rate,
-                input=True,
-                output=True,
-                frames_per_buffer=self.chunk_size
-            )
-            
-            print("Audio stream started.")
+            self._open_stream()
             
             # Main processing loop
             while self.is_running:
                 try:
                     # Read audio chunk
-                    audio_data = self.audio_stream.read(self.chunk_size, exception_on_overflow=False)
+                    instrumentation = self.instrumentation
+                    if instrumentation.enabled:
+                        instrumentation.start()
+                    audio_data = self.audio_stream.read(self.device_chunk_size, exception_on_overflow=False)
+                    self._mark_first_sample()
+                    if instrumentation.enabled:
+                        instrumentation.lap('read')
                     
-                    # Convert to numpy array for processing
-                    audio_array = np.frombuffer(audio_data, dtype=np.int16)
-                    
-                    # Normalize to float (-1.0 to 1.0)
-                    audio_float = audio_array.astype(np.float32) / 32767.0
-                    
-                    # Detect footstep in audio
-                    footstep_detected = self._detect_footstep(audio_float)
-                    
-                    if footstep_detected:
-                        # Enhance the footstep sound
-                        enhanced_audio = audio_float * self.enhancement_factor
-                        
-                        # Apply soft clipping to avoid harsh distortion
-                        enhanced_audio = np.tanh(enhanced_audio)
-                        
-                        # Convert back to int16 format
-                        output_audio = (enhanced_audio * 32767.0).astype(np.int16).tobytes()
-                        
-                        # Update current enhancement level for UI
-                        self.current_enhancement = self.enhancement_factor
-                    else:
-                        # Pass through original audio
-                        output_audio = audio_data
-                        self.current_enhancement = 1.0
+                    # Detect footsteps and enhance them
+                    tuner = self.latency_tuner
+                    started = time.perf_counter()
+                    output_audio = self._process_stream_buffer(audio_data)
+                    elapsed = time.perf_counter() - started
                     
                     # Output the processed audio
-                    self.audio_stream.write(output_audio)
+                    if instrumentation.enabled:
+                        instrumentation.start()
+                    xrun = False
+                    try:
+                        # Enhanced chunks are ndarrays, whose len() PyAudio would
+                        # take for bytes; give the frame count explicitly
+                        self.audio_stream.write(output_audio, self.device_chunk_size,
+                                                exception_on_underflow=True)
+                    except IOError:
+                        # The device ran dry before this block arrived; it was still queued
+                        self.xrun_count += 1
+                        xrun = True
+                    if instrumentation.enabled:
+                        instrumentation.lap('write')
+                    
+                    # Re-block the open stream if the headroom calls for another chunk size
+                    if tuner is not None:
+                        chunk_size = tuner.update(elapsed, xrun)
+                        if chunk_size is not None:
+                            self._resize_chunks(chunk_size)
                     
                 except Exception as e:
                     print(f"Error during audio processing: {e}")
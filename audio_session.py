@@ -0,0 +1,205 @@
+"""
+Audio Session Module for Footstep Sound Enhancer
+Keeps one PortAudio context and its duplex stream alive for the life of the process.
+"""
+
+import time
+
+
+class AudioSession:
+    """
+    Owns the PortAudio context, the device list and the open streams.
+
+    PortAudio is initialized once. Stopping processing pauses the streams
+    instead of closing them and terminating PortAudio, so the next start
+    only has to restart them. Streams are kept per role ('duplex', or
+    'input' and 'output' for the pipeline mode), and a stream is reopened
+    only when its parameters (format, rate, channels, buffer size or
+    callback) change.
+    Device information and format-support queries are cached, because
+    PortAudio scans the devices once at initialization and the answers
+    cannot change until it is initialized again (see refresh_devices).
+    """
+
+    def __init__(self, backend):
+        """
+        Initialize PortAudio through `backend`.
+
+        Args:
+            backend: pyaudio module or a PyAudioDummy instance
+        """
+        self.backend = backend
+        start = time.perf_counter()
+        self.pa = backend.PyAudio()
+        self.init_seconds = time.perf_counter() - start
+
+        self._devices = None
+        self._format_support = {}
+        self._streams = {}  # role -> (stream, parameter key)
+
+        # Counters for diagnostics and the benchmark
+        self.contexts_created = 1
+        self.streams_opened = 0
+        self.streams_resumed = 0
+
+    def devices(self):
+        """Return the cached list of device info dicts."""
+        if self._devices is None:
+            try:
+                count = self.pa.get_device_count()
+                self._devices = [self.pa.get_device_info_by_index(i) for i in range(count)]
+            except Exception as e:
+                print(f"Error enumerating audio devices: {e}")
+                self._devices = []
+        return self._devices
+
+    def refresh_devices(self):
+        """
+        Re-initialize PortAudio to pick up added or removed devices.
+
+        Only possible while no stream is open; returns False otherwise.
+        """
+        if self._streams:
+            return False
+        try:
+            self.pa.terminate()
+        except Exception as e:
+            print(f"Error terminating PyAudio: {e}")
+        start = time.perf_counter()
+        self.pa = self.backend.PyAudio()
+        self.init_seconds = time.perf_counter() - start
+        self.contexts_created += 1
+        self._devices = None
+        self._format_support.clear()
+        return True
+
+    def default_devices(self):
+        """Return the (input, output) default device info dicts, or None where unavailable."""
+        devices = []
+        for query in ('get_default_input_device_info', 'get_default_output_device_info'):
+            try:
+                devices.append(getattr(self.pa, query)())
+            except Exception:
+                devices.append(None)
+        return tuple(devices)
+
+    def negotiate(self, channels, sample_rate, formats):
+        """
+        Pick the stream format, rate and channel count for the default duplex devices.
+
+        The device's native rate (its default sample rate) is tried first so
+        the OS mixer does not resample, then `sample_rate`. For each rate the
+        formats are tried in order of preference.
+
+        Args:
+            channels: Requested channel count; reduced to what both devices offer
+            sample_rate: Fallback rate when the native rate is not usable
+            formats: PortAudio sample formats, most preferred first
+
+        Returns:
+            (format, rate, channels); the last format at `sample_rate` if
+            nothing was reported as supported, leaving the final word to open()
+        """
+        input_info, output_info = self.default_devices()
+        input_device = output_device = None
+        rates = [sample_rate]
+        if input_info is not None and output_info is not None:
+            input_device = input_info['index']
+            output_device = output_info['index']
+            channels = max(1, min(channels, input_info['maxInputChannels'], output_info['maxOutputChannels']))
+            native_rate = int(input_info['defaultSampleRate'])
+            if native_rate != sample_rate:
+                rates.insert(0, native_rate)
+
+        for rate in rates:
+            for audio_format in formats:
+                if self.is_format_supported(rate, channels, audio_format, input_device, output_device):
+                    return audio_format, rate, channels
+        return formats[-1], sample_rate, channels
+
+    def is_format_supported(self, rate, channels, audio_format, input_device=None, output_device=None):
+        """Return whether a duplex stream with these parameters can be opened (cached)."""
+        key = (rate, channels, audio_format, input_device, output_device)
+        supported = self._format_support.get(key)
+        if supported is None:
+            try:
+                supported = bool(self.pa.is_format_supported(
+                    rate,
+                    input_device=input_device, input_channels=channels, input_format=audio_format,
+                    output_device=output_device, output_channels=channels, output_format=audio_format,
+                ))
+            except ValueError:
+                # PyAudio reports unsupported combinations by raising
+                supported = False
+            except AttributeError:
+                # Backends without the query; let open() decide
+                supported = True
+            self._format_support[key] = supported
+        return supported
+
+    def open_stream(self, stream_callback=None, role='duplex', **params):
+        """
+        Start the stream for `role`, reusing the paused one when its parameters match.
+
+        Opening a duplex stream closes the input and output streams and vice
+        versa, so the device is never opened twice.
+
+        Args:
+            stream_callback: Optional PortAudio callback (callback mode)
+            role: 'duplex', 'input' or 'output'
+            **params: Keyword arguments for pyaudio.PyAudio.open
+
+        Returns:
+            The running stream
+        """
+        key = (stream_callback, tuple(sorted(params.items())))
+        stream, stream_key = self._streams.get(role, (None, None))
+        if stream is not None and key == stream_key:
+            try:
+                stream.start_stream()
+                self.streams_resumed += 1
+                return stream
+            except Exception as e:
+                print(f"Error resuming audio stream, reopening: {e}")
+        self.close_stream(role)
+        for other in (('input', 'output') if role == 'duplex' else ('duplex',)):
+            self.close_stream(other)
+
+        if stream_callback is not None:
+            params['stream_callback'] = stream_callback
+        stream = self.pa.open(**params)
+        self._streams[role] = (stream, key)
+        self.streams_opened += 1
+        return stream
+
+    def pause(self):
+        """Stop the streams but keep them open for a fast restart."""
+        for role, (stream, _) in list(self._streams.items()):
+            try:
+                # A callback stream that returned paComplete is inactive but not stopped
+                is_stopped = getattr(stream, 'is_stopped', None)
+                if is_stopped is None or not is_stopped():
+                    stream.stop_stream()
+            except Exception as e:
+                print(f"Error stopping audio stream: {e}")
+                self.close_stream(role)
+
+    def close_stream(self, role=None):
+        """Close the stream for `role` (all streams if None), e.g. before its parameters change."""
+        roles = list(self._streams) if role is None else [role]
+        for name in roles:
+            stream, _ = self._streams.pop(name, (None, None))
+            if stream is None:
+                continue
+            try:
+                stream.close()
+            except Exception as e:
+                print(f"Error closing audio stream: {e}")
+
+    def terminate(self):
+        """Close the streams and shut PortAudio down (application exit only)."""
+        self.close_stream()
+        try:
+            self.pa.terminate()
+        except Exception as e:
+            print(f"Error terminating PyAudio: {e}")
@@ -0,0 +1,1827 @@
+"""
+Benchmark Module for Footstep Sound Enhancer
+Measures the per-chunk cost of the real-time processing chain without an audio device.
+
+Usage:
+    python benchmark.py                          # sweep, JSON report on stdout
+    python benchmark.py -o results.json          # write the report to a file
+    python benchmark.py --input capture.wav      # use a recording instead of synthetic audio
+    python benchmark.py --compare baseline.json  # fail if p99 regressed against a saved report
+    python benchmark.py --check-allocations      # fail if the preallocated hot loop allocates sample buffers
+    python benchmark.py --telemetry              # audio-thread cost of GUI updates
+    python benchmark.py --engines                # bandpass vs STFT engine: CPU and added latency
+    python benchmark.py --stft-chunk-sizes       # STFT engine at chunk sizes that are not a power of two
+    python benchmark.py --multichannel           # cost at 2, 6 and 8 channels, combined and per channel
+    python benchmark.py --stream-formats         # int16 vs float32 vs resampled float32 stream
+    python benchmark.py --stream-writes          # every processed frame reaches the output stream
+    python benchmark.py --pipeline               # threaded pipeline under injected DSP stalls
+    python benchmark.py --worker                 # GUI-load latency: thread vs worker process
+    python benchmark.py --instrumentation        # cost and stage breakdown of the instrumentation
+    python benchmark.py --session                # stop/start cycles reuse one PortAudio session
+    python benchmark.py --soft-clip              # int16 lookup table vs float soft clip
+    python benchmark.py --flight-recorder        # record/replay round trip and audio-thread cost
+    python benchmark.py --direction              # azimuth estimate accuracy and cost
+    python benchmark.py --adaptive-latency       # chunk sizes the latency tuner settles on, gapless switches
+    python benchmark.py --spectrogram            # spectrogram column placement, audio-thread and render cost
+    python benchmark.py --daemon                 # invalid requests refused; chunk latency with socket subscribers
+    python benchmark.py --classifier             # second-stage classifier cost per candidate and per batch
+    python benchmark.py --startup                # import and start-up time from source
+    python benchmark.py --startup --frozen dist/FootstepSoundEnhancer.exe  # ... and of the frozen build
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import scipy
+from scipy import signal
+
+from audio_processor import AudioProcessor, PyAudioDummy
+from classifier import CandidateClassifier, compute_features, FEATURE_NAMES, FootstepClassifier, window_size
+from direction import DirectionEstimator
+from dsp import design_bandpass_sos, SoftClipTables, StreamingFilter, StreamingResampler
+from flight_recorder import FlightRecorder, replay
+from latency_tuner import LatencyTuner
+from spectrogram import frequency_row, SpectrogramAnalyzer, SpectrogramImage, SpectrogramRing
+from stft_engine import STFTEngine
+from telemetry import TelemetryChannel
+
+DEFAULT_CHUNK_SIZES = (256, 512, 1024, 2048)
+DEFAULT_SAMPLE_RATES = (44100, 48000)
+DEFAULT_CHANNELS = (1, 2, 6)
+
+
+def _synthetic_audio(frames, channels, sample_rate, seed=0):
+    """Generate float32 (frames, channels) noise with periodic footstep-band bursts."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(frames) / sample_rate
+    audio = 0.02 * rng.standard_normal((frames, channels))
+    burst = 0.3 * np.sin(2 * np.pi * 400 * t) * (np.sin(2 * np.pi * 2 * t) > 0.9)
+    audio += burst[:, None]
+    return audio.astype(np.float32)
+
+
+def _synthetic_chunks(num_chunks, chunk_size, channels, sample_rate, seed=0):
+    """Split synthetic audio into interleaved float32 chunks."""
+    audio = _synthetic_audio(num_chunks * chunk_size, channels, sample_rate, seed)
+    return [audio[i * chunk_size:(i + 1) * chunk_size].reshape(-1) for i in range(num_chunks)]
+
+
+def _recorded_audio(path, frames, channels):
+    """
+    Load up to `frames` frames of a WAV recording as float32 (frames, channels).
+
+    The recording is looped if it is too short, and its channels are
+    repeated or dropped to match the requested layout.
+    """
+    from offline_processor import read_wav_info
+
+    info = read_wav_info(path)
+    data = np.memmap(path, dtype=info.dtype, mode='r', offset=info.data_offset,
+                     shape=(info.frames, info.channels))
+    audio = np.resize(np.asarray(data[:frames]), (frames, info.channels)).astype(np.float32)
+    if info.dtype.kind != 'f':
+        audio /= 32767.0
+    channel_map = np.arange(channels) % info.channels
+    return audio[:, channel_map]
+
+
+def _time_per_chunk(func, chunks):
+    """Run func over every chunk and return the per-chunk durations in seconds."""
+    durations = np.empty(len(chunks))
+    for i, chunk in enumerate(chunks):
+        start = time.perf_counter()
+        func(chunk)
+        durations[i] = time.perf_counter() - start
+    return durations
+
+
+def benchmark_filter(chunk_size=1024, channels=2, sample_rate=44100, num_chunks=2000):
+    """
+    Compare the stateless interleaved lfilter, scipy's streaming sosfilt and
+    the numpy-only StreamingFilter kernel, which the filter uses until
+    scipy.signal is loaded.
+
+    Returns:
+        dict mapping implementation name to mean microseconds per chunk
+    """
+    chunks = _synthetic_chunks(num_chunks, chunk_size, channels, sample_rate)
+    nyquist = 0.5 * sample_rate
+    b, a = signal.butter(4, [200 / nyquist, 800 / nyquist], btype='band')
+    sos = design_bandpass_sos(200, 800, sample_rate)
+    streaming = StreamingFilter(sos, channels, use_scipy=False)
+    zi = np.zeros((sos.shape[0], 2, channels))
+
+    def legacy(chunk):
+        signal.lfilter(b, a, chunk)
+
+    def scipy_streaming(chunk):
+        nonlocal zi
+        _, zi = signal.sosfilt(sos, chunk.reshape(-1, channels), axis=0, zi=zi)
+
+    def numpy_streaming(chunk):
+        streaming.process(chunk.reshape(-1, channels))
+
+    return {
+        "lfilter (stateless, interleaved)": _time_per_chunk(legacy, chunks).mean() * 1e6,
+        "sosfilt (streaming, per-channel)": _time_per_chunk(scipy_streaming, chunks).mean() * 1e6,
+        "numpy block kernel (until scipy loads)": _time_per_chunk(numpy_streaming, chunks).mean() * 1e6,
+    }
+
+
+def _make_processor(chunk_size, sample_rate, channels, audio, preallocated=False, engine='bandpass',
+                    envelope=False):
+    """
+    Build a headless AudioProcessor whose dummy stream replays `audio` as int16 chunks.
+    """
+    pcm = (np.clip(audio, -1.0, 1.0) * 32767.0).astype(np.int16)
+    position = [0]
+
+    def source(frame_count, source_channels):
+        start = position[0]
+        position[0] = (start + frame_count) % (len(pcm) - frame_count + 1)
+        return pcm[start:start + frame_count].tobytes()
+
+    processor = AudioProcessor(audio_backend=PyAudioDummy(input_source=source))
+    processor.configure_stream(sample_rate=sample_rate, channels=channels, chunk_size=chunk_size)
+    processor.set_preallocated_mode(preallocated)
+    processor.set_detection_engine(engine)
+    processor.set_gain_envelope(envelope)
+    return processor
+
+
+def benchmark_chain(chunk_size=1024, sample_rate=44100, channels=2, num_chunks=1000,
+                    warmup_chunks=50, input_path=None, preallocated=False, engine='bandpass',
+                    envelope=False):
+    """
+    Time read -> convert -> detect -> enhance -> encode -> write for each chunk.
+
+    This mirrors one iteration of AudioProcessor._process_audio, driven by
+    the PyAudioDummy stream so no audio device is needed.
+
+    Returns:
+        dict with latency percentiles (microseconds), the chunk deadline,
+        headroom against it, allocation statistics and the enhanced ratio
+    """
+    frames = (num_chunks + warmup_chunks + 1) * chunk_size
+    if input_path:
+        audio = _recorded_audio(input_path, frames, channels)
+    else:
+        audio = _synthetic_audio(frames, channels, sample_rate)
+
+    processor = _make_processor(chunk_size, sample_rate, channels, audio, preallocated, engine, envelope)
+    stream = processor.p.open(format=processor.audio_format, channels=channels,
+                              rate=sample_rate, input=True, output=True,
+                              frames_per_buffer=chunk_size)
+
+    def iteration():
+        audio_data = stream.read(chunk_size, exception_on_overflow=False)
+        output_audio = processor._process_chunk(audio_data)
+        stream.write(output_audio, chunk_size)
+        return processor.current_enhancement != 1.0
+
+    for _ in range(warmup_chunks):
+        iteration()
+
+    # Timing pass
+    durations = np.empty(num_chunks, dtype=np.int64)
+    enhanced = 0
+    blocks_before = sys.getallocatedblocks()
+    for i in range(num_chunks):
+        start = time.perf_counter_ns()
+        enhanced += iteration()
+        durations[i] = time.perf_counter_ns() - start
+    retained_blocks = sys.getallocatedblocks() - blocks_before
+
+    # Allocation pass, separate so tracing overhead does not skew the timings
+    alloc_chunks = min(num_chunks, 200)
+    tracemalloc.start()
+    peaks = np.empty(alloc_chunks, dtype=np.int64)
+    for i in range(alloc_chunks):
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        iteration()
+        _, peak = tracemalloc.get_traced_memory()
+        peaks[i] = peak - baseline
+    tracemalloc.stop()
+
+    micros = durations / 1e3
+    deadline_us = chunk_size / sample_rate * 1e6
+    p99 = float(np.percentile(micros, 99))
+    return {
+        'chunk_size': chunk_size,
+        'sample_rate': sample_rate,
+        'channels': channels,
+        'preallocated': preallocated,
+        'engine': engine,
+        'gain_envelope': envelope,
+        'added_latency_ms': _engine_latency_frames(processor) / sample_rate * 1e3,
+        'chunks': num_chunks,
+        'p50_us': float(np.percentile(micros, 50)),
+        'p99_us': p99,
+        'max_us': float(micros.max()),
+        'mean_us': float(micros.mean()),
+        'deadline_us': deadline_us,
+        'headroom': 1.0 - p99 / deadline_us,
+        'alloc_peak_bytes_per_chunk': float(np.median(peaks)),
+        'retained_blocks_per_chunk': retained_blocks / num_chunks,
+        'enhanced_ratio': enhanced / num_chunks,
+    }
+
+
+def _engine_latency_frames(processor):
+    """Frames of latency the detection engine adds on top of the stream buffering."""
+    if processor.detection_engine == 'stft':
+        return processor.stft_engine.latency_frames
+    return 0
+
+
+def benchmark_engines(chunk_size=1024, sample_rate=44100, channels=2, num_chunks=1000):
+    """
+    Compare the bandpass and STFT engines through the full processing chain.
+
+    Returns:
+        dict mapping engine name to (p50_us, p99_us, added_latency_ms)
+    """
+    results = {}
+    for engine in ('bandpass', 'stft'):
+        result = benchmark_chain(chunk_size, sample_rate, channels, num_chunks=num_chunks, engine=engine)
+        results[engine] = (result['p50_us'], result['p99_us'], result['added_latency_ms'])
+    return results
+
+
+def check_stft_chunk_sizes(chunk_sizes=(1024, 1029, 1000), sample_rate=44100, channels=2, num_chunks=500,
+                           max_cost_ratio=2.0):
+    """
+    Run the STFT engine at chunk sizes the hop does not divide.
+
+    1029 frames is what _negotiate_stream picks for a 44.1k <-> 48k
+    stream. Each size must keep the 512-point frame and a non-empty
+    footstep band, detect the synthetic bursts, reconstruct the input
+    exactly at unity gain after latency_frames, and cost about the same
+    per frame as the first size.
+
+    Returns:
+        dict of chunk size -> dict with fft_size, latency_frames, p50_us,
+        enhanced_ratio and reconstruction_error
+
+    Raises:
+        AssertionError: If any chunk size fails one of the checks
+    """
+    audio = _synthetic_audio(sample_rate, channels, sample_rate).astype(np.float64)
+    results = {}
+    for chunk_size in chunk_sizes:
+        engine = STFTEngine(sample_rate, channels, chunk_size)
+        if engine.fft_size != 512 or engine._band.stop <= engine._band.start:
+            raise AssertionError(f"{chunk_size} frames: {engine.fft_size}-point frames, "
+                                 f"{engine._band.stop - engine._band.start} band bins")
+        blocks = [engine.process(audio[i:i + chunk_size], 1.0, 10.0)[0].copy()
+                  for i in range(0, len(audio) - chunk_size + 1, chunk_size)]
+        output = np.concatenate(blocks)
+        latency = engine.latency_frames
+        error = float(np.max(np.abs(output[latency:] - audio[:len(output) - latency])))
+
+        chain = benchmark_chain(chunk_size, sample_rate, channels, num_chunks=num_chunks, engine='stft')
+        results[chunk_size] = {
+            'fft_size': engine.fft_size,
+            'latency_frames': latency,
+            'p50_us': chain['p50_us'],
+            'enhanced_ratio': chain['enhanced_ratio'],
+            'reconstruction_error': error,
+        }
+        if error > 1e-9:
+            raise AssertionError(f"{chunk_size} frames: output differs from the input by {error:.3g}")
+        if chain['enhanced_ratio'] == 0.0:
+            raise AssertionError(f"{chunk_size} frames: no chunk was enhanced")
+
+    reference = chunk_sizes[0]
+    per_frame = results[reference]['p50_us'] / reference
+    for chunk_size, result in results.items():
+        ratio = result['p50_us'] / chunk_size / per_frame
+        if ratio > max_cost_ratio:
+            raise AssertionError(f"{chunk_size} frames cost {ratio:.1f}x as much per frame as {reference}")
+    return results
+
+
+def benchmark_stream_formats(chunk_size=1024, channels=2, num_chunks=1000, preallocated=False):
+    """
+    Compare the per-chunk cost of the negotiated stream formats.
+
+    Each configuration runs _process_stream_buffer on buffers as the device
+    would deliver them: int16 and float32 at the processing rate, and
+    float32 from a 48 kHz device converted to a pinned 44.1 kHz.
+
+    Returns:
+        dict mapping configuration name -> (p50_us, p99_us)
+    """
+    configurations = (
+        ('int16 @ 44100', 44100, (PyAudioDummy.paInt16,), None),
+        ('float32 @ 44100', 44100, (PyAudioDummy.paFloat32,), None),
+        ('float32 48000 -> 44100', 48000, (PyAudioDummy.paFloat32,), 44100),
+    )
+    results = {}
+    for name, native_rate, formats, pinned_rate in configurations:
+        processor = AudioProcessor(audio_backend=PyAudioDummy(native_rate=native_rate, formats=formats))
+        processor.configure_stream(channels=channels, chunk_size=chunk_size)
+        processor.set_preallocated_mode(preallocated)
+        if pinned_rate is not None:
+            processor.set_sample_rate(pinned_rate)
+        processor._negotiate_stream()
+
+        audio = _synthetic_audio((num_chunks + 50) * processor.device_chunk_size, channels, processor.device_rate)
+        if processor.stream_format_name() == 'int16':
+            audio = (np.clip(audio, -1.0, 1.0) * 32767.0).astype(np.int16)
+        size = processor.device_chunk_size
+        chunks = [audio[i * size:(i + 1) * size].tobytes() for i in range(num_chunks + 50)]
+
+        for chunk in chunks[:50]:
+            processor._process_stream_buffer(chunk)
+        durations = _time_per_chunk(processor._process_stream_buffer, chunks[50:])
+        results[name] = (float(np.percentile(durations, 50)) * 1e6, float(np.percentile(durations, 99)) * 1e6)
+    return results
+
+
+def benchmark_channels(channel_counts=(2, 6, 8), chunk_size=1024, sample_rate=44100, num_chunks=1000):
+    """
+    Time detection and enhancement of int16 chunks for growing channel counts.
+
+    The footstep bursts are on the first channel only, so per-channel
+    detection boosts that channel and passes the others through.
+
+    Returns:
+        dict mapping mode name to {channels: mean microseconds per chunk}
+    """
+    modes = (
+        ('combined', False, False),
+        ('per-channel', True, False),
+        ('per-channel, preallocated', True, True),
+    )
+    results = {}
+    for name, per_channel, preallocated in modes:
+        timings = {}
+        for channels in channel_counts:
+            frames = (num_chunks + 50) * chunk_size
+            audio = 0.02 * np.random.default_rng(1).standard_normal((frames, channels))
+            audio[:, 0] = _synthetic_audio(frames, 1, sample_rate)[:, 0]
+            pcm = (np.clip(audio, -1.0, 1.0) * 32767.0).astype(np.int16)
+            chunks = [pcm[i * chunk_size:(i + 1) * chunk_size].tobytes() for i in range(num_chunks + 50)]
+
+            processor = AudioProcessor(audio_backend=PyAudioDummy())
+            processor.configure_stream(sample_rate=sample_rate, channels=channels, chunk_size=chunk_size)
+            processor.set_preallocated_mode(preallocated)
+            processor.set_per_channel_detection(per_channel)
+            for chunk in chunks[:50]:
+                processor._process_stream_buffer(chunk)
+            durations = _time_per_chunk(processor._process_stream_buffer, chunks[50:])
+            timings[channels] = float(durations.mean() * 1e6)
+            processor.close()
+        results[name] = timings
+    return results
+
+
+def benchmark_instrumentation(chunk_size=1024, sample_rate=44100, channels=2, num_chunks=2000):
+    """
+    Measure what per-stage instrumentation adds to a chunk.
+
+    Returns:
+        dict with the median chunk time with instrumentation off and on
+        (microseconds), and the stage summaries collected while on
+    """
+    audio = _synthetic_audio((num_chunks + 50) * chunk_size, channels, sample_rate)
+    pcm = (np.clip(audio, -1.0, 1.0) * 32767.0).astype(np.int16)
+    chunks = [pcm[i * chunk_size:(i + 1) * chunk_size].tobytes() for i in range(num_chunks + 50)]
+    processor = _make_processor(chunk_size, sample_rate, channels, audio, preallocated=True)
+    instrumentation = processor.instrumentation
+
+    def iteration(chunk):
+        if instrumentation.enabled:
+            instrumentation.start()
+        processor._process_chunk(chunk)
+
+    results = {}
+    for enabled in (False, True, False, True):
+        processor.set_instrumentation(enabled, reset=True)
+        for chunk in chunks[:50]:
+            iteration(chunk)
+        durations = _time_per_chunk(iteration, chunks[50:])
+        results['on_us' if enabled else 'off_us'] = float(np.median(durations)) * 1e6
+    results['stages'] = processor.instrumentation_snapshot()['stages']
+    return results
+
+
+def _allocation_peak(chunk_size, sample_rate, channels, num_chunks):
+    """Largest tracemalloc peak of one steady-state _process_chunk call, in bytes."""
+    audio = _synthetic_audio((num_chunks + 20) * chunk_size, channels, sample_rate)
+    pcm = (np.clip(audio, -1.0, 1.0) * 32767.0).astype(np.int16)
+    chunks = [pcm[i * chunk_size:(i + 1) * chunk_size].tobytes() for i in range(num_chunks + 20)]
+    processor = _make_processor(chunk_size, sample_rate, channels, audio, preallocated=True)
+
+    # Warm up caches (BLAS, ufunc loops) before measuring
+    for chunk in chunks[:20]:
+        processor._process_chunk(chunk)
+
+    tracemalloc.start()
+    worst = 0
+    for chunk in chunks[20:]:
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        processor._process_chunk(chunk)
+        _, peak = tracemalloc.get_traced_memory()
+        worst = max(worst, peak - baseline)
+    tracemalloc.stop()
+    return worst
+
+
+def check_steady_state_allocations(chunk_size=1024, sample_rate=44100, channels=2,
+                                   num_chunks=200, limit_bytes=2048, reference_chunk_size=64):
+    """
+    Verify that the preallocated hot loop allocates no sample buffers.
+
+    Chunks are fed straight to _process_chunk (PyAudio itself allocates the
+    bytes it returns from read(), which is outside our control).
+
+    "Nothing" is not reachable from Python: every chunk still creates a few
+    short-lived interpreter objects (the telemetry snapshot dict published
+    for the GUI, numpy scalars returned by reductions, array views, call
+    arguments). They come from CPython's small-object pools, are freed or
+    replaced by the next chunk, and do not grow with the chunk: about 1 KB
+    mono and 1.8 KB with more channels. So they are measured at
+    reference_chunk_size first and allowed. On top of that, a chunk may
+    allocate less than half its int16 buffer, so even a small chunk's
+    leaked buffer is caught, and never more than limit_bytes in total.
+
+    Returns:
+        (worst, limit): the largest per-chunk allocation peak and the limit it
+        was checked against, in bytes
+
+    Raises:
+        AssertionError: If any steady-state chunk exceeded the limit
+    """
+    reference = _allocation_peak(reference_chunk_size, sample_rate, channels, num_chunks)
+    limit = min(limit_bytes, reference + chunk_size * channels)
+    worst = _allocation_peak(chunk_size, sample_rate, channels, num_chunks)
+    if worst > limit:
+        raise AssertionError(f"steady-state chunk allocated {worst} bytes (limit {limit})")
+    return worst, limit
+
+
+def check_soft_clip_accuracy(gains=(1.0, 1.5, 2.0, 3.0, 5.0, 10.0), max_error_lsb=1):
+    """
+    Compare the int16 soft-clip tables against the float32 tanh path.
+
+    Every one of the 65536 input values is checked for each gain.
+
+    Returns:
+        dict of gain -> largest difference in LSBs
+
+    Raises:
+        AssertionError: If any output differs by more than max_error_lsb
+    """
+    samples = np.arange(-32768, 32768, dtype=np.int32).astype(np.int16)
+    tables = SoftClipTables()
+    errors = {}
+    for gain in gains:
+        reference = (np.tanh(samples.astype(np.float32) / 32767.0 * np.float32(gain))
+                     * 32767.0).astype(np.int16)
+        result = np.empty_like(samples)
+        SoftClipTables.apply(tables.get(gain), samples, result)
+        error = int(np.abs(result.astype(np.int32) - reference).max())
+        if error > max_error_lsb:
+            raise AssertionError(f"gain {gain}: table differs by {error} LSB")
+        errors[gain] = error
+    return errors
+
+
+def benchmark_soft_clip(chunk_size=1024, channels=2, num_chunks=2000, gain=2.0):
+    """
+    Compare the float and lookup-table soft clip of one enhanced chunk.
+
+    Returns:
+        dict mapping implementation name -> microseconds per chunk
+    """
+    rng = np.random.default_rng(0)
+    chunks = [rng.integers(-32768, 32768, size=(chunk_size * channels), dtype=np.int16)
+              for _ in range(num_chunks)]
+    scratch = np.empty(chunk_size * channels, dtype=np.float32)
+    out = np.empty(chunk_size * channels, dtype=np.int16)
+    tables = SoftClipTables()
+    table = tables.get(gain)
+
+    def float_path(chunk):
+        np.copyto(scratch, chunk)
+        np.multiply(scratch, np.float32(gain / 32767.0), out=scratch)
+        np.tanh(scratch, out=scratch)
+        np.multiply(scratch, np.float32(32767.0), out=scratch)
+        np.copyto(out, scratch, casting='unsafe')
+
+    def table_path(chunk):
+        SoftClipTables.apply(table, chunk, out)
+
+    start = time.perf_counter()
+    tables.get(gain + tables.step)
+    build_us = (time.perf_counter() - start) * 1e6
+
+    results = {}
+    for name, func in (('float32 tanh', float_path), ('int16 lookup table', table_path)):
+        for chunk in chunks[:50]:
+            func(chunk)
+        times = _time_per_chunk(func, chunks)
+        results[name] = float(np.median(times)) * 1e6
+    results['table build (once per gain)'] = build_us
+    return results
+
+
+def benchmark_telemetry(num_updates=2000):
+    """
+    Compare the audio-thread cost of publishing stats to the GUI.
+
+    The legacy path redrew the Tk level meter directly from the audio
+    thread on every chunk (delete + create_rectangle); the telemetry path
+    only publishes a snapshot for the Tk timer to pick up.
+
+    Returns:
+        dict mapping path name to mean microseconds per chunk; the legacy
+        path is None when no display is available for Tk
+    """
+    levels = np.abs(np.random.default_rng(0).normal(0.05, 0.03, num_updates))
+
+    channel = TelemetryChannel()
+    start = time.perf_counter()
+    for level in levels:
+        channel.publish(level, level > 0.05, 1.0, latency=0.0, xruns=0)
+    publish_us = (time.perf_counter() - start) / num_updates * 1e6
+
+    legacy_us = None
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+        root.withdraw()
+        canvas = tk.Canvas(root, width=200, height=20)
+        start = time.perf_counter()
+        for level in levels:
+            canvas.delete("bar")
+            width = int(min(1.0, level * 10) * canvas.winfo_width())
+            canvas.create_rectangle(0, 0, width, canvas.winfo_height(), fill="#ffff00",
+                                    outline="", tags="bar")
+        legacy_us = (time.perf_counter() - start) / num_updates * 1e6
+        root.destroy()
+    except Exception as e:
+        print(f"Tk not available, skipping the legacy measurement: {e}", file=sys.stderr)
+
+    return {
+        "Tk redraw on audio thread": legacy_us,
+        "telemetry publish": publish_us,
+    }
+
+
+class _CountingBackend(PyAudioDummy):
+    """PyAudioDummy that counts PortAudio initializations and stream opens."""
+
+    def __init__(self, input_source=None):
+        super().__init__(input_source)
+        self.contexts = 0
+        self.opens = 0
+
+    def PyAudio(self):
+        self.contexts += 1
+        return self
+
+    def open(self, **kwargs):
+        self.opens += 1
+        return super().open(**kwargs)
+
+
+def check_session_reuse(cycles=10, callback=False, chunk_size=256, sample_rate=44100):
+    """
+    Start and stop the processor repeatedly against the dummy backend.
+
+    Verifies that PortAudio is initialized once and the stream opened once
+    across all cycles, and reports how long each cycle took.
+
+    Returns:
+        dict with the median and worst start-to-first-sample latency and
+        stop() duration, in milliseconds
+
+    Raises:
+        AssertionError: If a cycle re-initialized PortAudio or reopened the stream
+    """
+    backend = _CountingBackend()
+    processor = AudioProcessor(audio_backend=backend)
+    processor.configure_stream(sample_rate=sample_rate, channels=2, chunk_size=chunk_size)
+    processor.set_callback_mode(callback)
+
+    start_latencies = []
+    stop_times = []
+    for _ in range(cycles):
+        processor.start()
+        deadline = time.perf_counter() + 1.0
+        while processor._start_requested is not None and time.perf_counter() < deadline:
+            time.sleep(0.0005)
+        start_latencies.append(processor.start_latency)
+        start = time.perf_counter()
+        processor.stop()
+        stop_times.append(time.perf_counter() - start)
+    processor.close()
+
+    assert backend.contexts == 1, f"PortAudio initialized {backend.contexts} times"
+    assert backend.opens == 1, f"stream opened {backend.opens} times"
+    return {
+        'start_to_first_sample_p50_ms': float(np.median(start_latencies)) * 1e3,
+        'start_to_first_sample_max_ms': float(np.max(start_latencies)) * 1e3,
+        'stop_p50_ms': float(np.median(stop_times)) * 1e3,
+        'stop_max_ms': float(np.max(stop_times)) * 1e3,
+    }
+
+
+def check_stream_writes(chunk_size=1024, channels=2, seconds=0.3):
+    """
+    Check that every processed frame reaches the output stream.
+
+    The dummy stream counts frames like PyAudio: without num_frames, len()
+    of the data is taken as bytes, so an ndarray chunk only counts its
+    samples / (channels * width). The blocking loop is then run in each
+    output path (float32 stream, int16, int16 preallocated) and must write
+    as many frames as it read, enhanced chunks included.
+
+    Returns:
+        dict of path name -> (frames read, frames written, footstep onsets)
+
+    Raises:
+        AssertionError: If the dummy miscounts or a path loses frames
+    """
+    backend = PyAudioDummy()
+    stream = backend.open(format=PyAudioDummy.paFloat32, channels=channels, rate=44100, output=True,
+                          frames_per_buffer=chunk_size)
+    chunk = np.zeros(chunk_size * channels, dtype=np.float32)  # interleaved, as the processor writes
+    for data, num_frames, expected in ((chunk, None, chunk_size // 4), (chunk, chunk_size, chunk_size),
+                                       (chunk.tobytes(), None, chunk_size)):
+        before = stream.frames_written
+        stream.write(data, num_frames)
+        consumed = stream.frames_written - before
+        if consumed != expected:
+            raise AssertionError(f"dummy write of {type(data).__name__} consumed {consumed} frames, "
+                                 f"PyAudio would consume {expected}")
+    stream.close()
+
+    results = {}
+    audio = _synthetic_audio(int(seconds * 44100) + chunk_size, channels, 44100)
+    for name, formats, preallocated in (('float32', (PyAudioDummy.paFloat32,), False),
+                                        ('int16', (PyAudioDummy.paInt16,), False),
+                                        ('int16 preallocated', (PyAudioDummy.paInt16,), True)):
+        position = [0]
+        read = [0]
+
+        def source(frame_count, source_channels, pcm=name.startswith('int16')):
+            start = position[0] % (len(audio) - frame_count)
+            position[0] = start + frame_count
+            read[0] += frame_count
+            block = audio[start:start + frame_count]
+            return (block * 32767.0).astype(np.int16).tobytes() if pcm else block.tobytes()
+
+        onsets = []
+        processor = AudioProcessor(audio_backend=PyAudioDummy(input_source=source, formats=formats))
+        processor.configure_stream(sample_rate=44100, channels=channels, chunk_size=chunk_size)
+        processor.set_preallocated_mode(preallocated)
+        processor.on_footstep_detected = lambda detected: detected and onsets.append(1)
+        processor.start()
+        time.sleep(seconds)
+        stream = processor.audio_stream
+        processor.stop()
+        processor.close()
+        results[name] = (read[0], stream.frames_written, len(onsets))
+        if not onsets:
+            raise AssertionError(f"{name}: no chunk was enhanced")
+        if stream.frames_written != read[0]:
+            raise AssertionError(f"{name}: read {read[0]} frames but wrote {stream.frames_written}")
+    return results
+
+
+def check_pipeline(seconds=2.0, chunk_size=256, stall_every=50, stall_seconds=0.04, slots=8, prefill=2):
+    """
+    Run the capture/DSP/playback pipeline against a real-time dummy device with DSP stalls.
+
+    Every `stall_every` chunks the DSP stage sleeps for `stall_seconds`
+    (several chunk periods). The capture ring has to absorb each stall
+    without dropping input; playback conceals the gaps instead.
+
+    Returns:
+        The pipeline's per-stage stats
+
+    Raises:
+        AssertionError: If capture overflowed or playback did not keep the device fed
+    """
+    rng = np.random.default_rng(0)
+
+    def source(frame_count, source_channels):
+        return (0.2 * rng.standard_normal((frame_count, source_channels))).astype(np.float32).tobytes()
+
+    processor = AudioProcessor(audio_backend=PyAudioDummy(input_source=source, realtime=True))
+    processor.configure_stream(chunk_size=chunk_size)
+    processor.set_pipeline_mode(True, slots=slots, prefill=prefill)
+
+    process = processor._process_stream_buffer
+    calls = [0]
+
+    def stalling_process(in_data, out=None):
+        calls[0] += 1
+        if calls[0] % stall_every == 0:
+            time.sleep(stall_seconds)
+        return process(in_data, out)
+
+    processor._process_stream_buffer = stalling_process
+    processor.start()
+    time.sleep(seconds)
+    stats = processor.pipeline.stats()
+    processor.close()
+
+    expected_blocks = seconds * processor.device_rate / processor.device_chunk_size
+    assert stats['capture']['overflows'] == 0, f"capture dropped {stats['capture']['overflows']} blocks"
+    assert stats['playback']['blocks'] >= 0.9 * expected_blocks, "playback did not keep up with the device"
+    return stats
+
+
+def _noise_source(frame_count, channels):
+    """Dummy-device input: float32 noise with footstep-band bursts."""
+    return _synthetic_audio(frame_count, channels, 44100, seed=int(time.perf_counter_ns()) & 0xffff).tobytes()
+
+
+def _realtime_dummy_backend():
+    """Backend factory for the worker process (must be a picklable top-level function)."""
+    return PyAudioDummy(input_source=_noise_source, realtime=True)
+
+
+def _install_chunk_timer(processor):
+    """Record the wall time of every processed chunk, GIL waits included."""
+    process = processor._process_stream_buffer
+    durations = []
+
+    def timed_process(in_data, out=None):
+        start = time.perf_counter_ns()
+        result = process(in_data, out)
+        durations.append(time.perf_counter_ns() - start)
+        return result
+
+    processor._process_stream_buffer = timed_process
+    processor.chunk_timings = lambda: list(durations)
+    processor.configure_stream(chunk_size=256)
+
+
+def _synthetic_gui_load(seconds):
+    """Hold the GIL the way Tk redraws and slider callbacks do: short bursts of Python work."""
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        items = {i: str(i) for i in range(5000)}
+        sorted(items.values())
+
+
+def benchmark_worker(seconds=3.0):
+    """
+    Compare chunk processing latency with the processor in a thread and in a worker process.
+
+    The GUI process runs a synthetic Python load for `seconds` while the
+    real-time dummy device streams 256-frame chunks.
+
+    Returns:
+        dict mapping mode name -> (p50_us, p99_us, max_us)
+    """
+    from dsp_worker import WorkerAudioProcessor
+
+    results = {}
+
+    processor = AudioProcessor(audio_backend=_realtime_dummy_backend())
+    _install_chunk_timer(processor)
+    processor.start()
+    _synthetic_gui_load(seconds)
+    processor.stop()
+    processor.close()
+    results['thread'] = np.array(processor.chunk_timings()[10:])
+
+    worker = WorkerAudioProcessor(backend_factory=_realtime_dummy_backend, setup=_install_chunk_timer)
+    try:
+        worker.start()
+        _synthetic_gui_load(seconds)
+        results['process'] = np.array(worker.call('chunk_timings')[10:])
+        worker.stop()
+    finally:
+        worker.close()
+
+    return {
+        mode: (float(np.percentile(ns, 50)) / 1e3, float(np.percentile(ns, 99)) / 1e3, float(ns.max()) / 1e3)
+        for mode, ns in results.items()
+    }
+
+
+def _record_session(path, audio, chunk_size, ring_seconds, setup=None):
+    """
+    Run the blocking loop over `audio` with the flight recorder writing to `path`.
+
+    Returns:
+        The number of candidates the second-stage classifier rejected, if `setup` enabled it
+    """
+    position = [0]
+
+    def source(frame_count, channels):
+        block = audio[position[0]:position[0] + frame_count]
+        position[0] += frame_count
+        if len(block) < frame_count:
+            block = np.zeros((frame_count, channels), dtype=np.float32)
+        return block.tobytes()
+
+    processor = AudioProcessor(audio_backend=PyAudioDummy(input_source=source))
+    processor.configure_stream(sample_rate=44100, channels=audio.shape[1], chunk_size=chunk_size)
+    processor.set_flight_recorder(path, ring_seconds)
+    if setup is not None:
+        setup(processor)
+    processor.start()
+    deadline = time.perf_counter() + 30.0
+    while position[0] < len(audio) and time.perf_counter() < deadline:
+        time.sleep(0.01)
+    processor.stop()
+    processor.close()
+    classifier = processor.footstep_classifier
+    return 0 if classifier is None else classifier.rejected
+
+
+def check_flight_recorder(seconds=8.0, chunk_size=512, channels=2):
+    """
+    Record a synthetic session and replay it.
+
+    With the recorded settings the replay must reproduce every decision
+    exactly; the wrapped ring (2 s of a longer session) starts with a cold
+    filter, so it is compared after the warm-up chunks and its levels only
+    have to agree to rounding. A session recorded with a second-stage
+    classifier (rejecting decays under 100 ms) must replay with it. A
+    replay with the STFT engine shows a detector diff.
+
+    Returns:
+        dict of replay summaries: 'full', 'wrapped', 'classifier' and 'stft'
+
+    Raises:
+        AssertionError: If a replay with unchanged settings differs
+    """
+    audio = _synthetic_audio(int(seconds * 44100), channels, 44100)
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        full = os.path.join(directory, 'full.fsr')
+        wrapped = os.path.join(directory, 'wrapped.fsr')
+        _record_session(full, audio, chunk_size, ring_seconds=seconds + 5.0)
+        _record_session(wrapped, audio, chunk_size, ring_seconds=2.0)
+        classified = os.path.join(directory, 'classifier.fsr')
+        features = len(FEATURE_NAMES)
+        decay = np.eye(features)[FEATURE_NAMES.index('decay_ms')]
+        model = FootstepClassifier(decay * 100.0, np.full(features, 10.0), decay, 0.0)
+        rejected = _record_session(classified, audio, chunk_size, ring_seconds=seconds + 5.0,
+                                   setup=lambda processor: processor.set_footstep_classifier(model))
+
+        results['full'], _ = replay(full)
+        results['wrapped'], _ = replay(wrapped)
+        results['classifier'], _ = replay(classified)
+        results['classifier']['classifier_rejected'] = rejected
+        results['stft'], _ = replay(full, setup=lambda processor: processor.set_detection_engine('stft'))
+
+    assert rejected > 0, "classifier: the test model rejected no candidates"
+    for name, tolerance in (('full', 0.0), ('wrapped', 1e-9), ('classifier', 0.0)):
+        summary = results[name]
+        assert summary['recorded_footsteps'] > 0, f"{name}: no footsteps recorded"
+        assert not (summary['newly_detected'] or summary['no_longer_detected'] or summary['gain_changed']), \
+            f"{name}: replay differs from the recorded decisions: {summary}"
+        assert summary['max_rms_delta'] <= tolerance, f"{name}: replayed levels differ: {summary}"
+    return results
+
+
+def benchmark_flight_recorder(chunk_size=1024, channels=2, num_chunks=2000):
+    """
+    Audio-thread cost of the flight recorder.
+
+    Returns:
+        dict with the begin+commit cost alone and the chunk cost with and
+        without recording, in microseconds
+    """
+    chunks = [chunk.tobytes() for chunk in _synthetic_chunks(num_chunks, chunk_size, channels, 44100)]
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        recorder = FlightRecorder(os.path.join(directory, 'ring.fsr'), 512, chunk_size * channels,
+                                  np.float32, {})
+
+        def record(chunk):
+            recorder.begin(chunk, time.perf_counter())
+            recorder.commit(time.perf_counter(), 0.1, True, 2.0, 0.05, 2.0, 0.05)
+
+        results['recorder_us'] = float(np.median(_time_per_chunk(record, chunks))) * 1e6
+        recorder.close()
+
+        processor = AudioProcessor(audio_backend=PyAudioDummy())
+        processor.configure_stream(sample_rate=44100, channels=channels, chunk_size=chunk_size)
+        processor._negotiate_stream()
+        results['chunk_off_us'] = float(np.median(_time_per_chunk(processor._process_stream_buffer, chunks))) * 1e6
+        processor.set_flight_recorder(os.path.join(directory, 'session.fsr'))
+        processor._open_recorder()
+        results['chunk_on_us'] = float(np.median(_time_per_chunk(processor._process_stream_buffer, chunks))) * 1e6
+        processor.close()
+    return results
+
+
+def check_direction(chunk_size=1024, sample_rate=44100, azimuths=(-90, -60, -30, 0, 30, 60, 90)):
+    """
+    Estimate the azimuth of footstep-band bursts placed by level and by delay.
+
+    Level placement uses the tangent panning law, delay placement a
+    whole-sample interaural delay, so the expected angles are exact. The
+    level cue is repeated on 128-frame chunks with a 400-410 Hz band,
+    which falls between two FFT bins.
+
+    Returns:
+        list of (cue, expected degrees, estimated degrees)
+
+    Raises:
+        AssertionError: If a level-placed burst is off by more than a degree
+    """
+    rng = np.random.default_rng(3)
+    burst = signal.sosfilt(design_bandpass_sos(200, 800, sample_rate), rng.standard_normal(chunk_size + 200))
+    estimator = DirectionEstimator(sample_rate, 2, chunk_size)
+    max_lag = estimator.max_lag
+    results = []
+    for azimuth in azimuths:
+        pan = np.tan(np.radians(azimuth) / 2.0)
+        frames = np.column_stack((1.0 - pan, 1.0 + pan)) * burst[100:100 + chunk_size, None]
+        results.append(('level', float(azimuth), estimator.process(frames)))
+
+        delay = int(round(-np.sin(np.radians(azimuth)) * max_lag))
+        frames = np.column_stack((burst[100:100 + chunk_size], burst[100 - delay:100 - delay + chunk_size]))
+        expected = -np.degrees(np.arcsin(delay / max_lag))
+        results.append(('delay', float(expected), estimator.process(frames)))
+
+    narrow = DirectionEstimator(sample_rate, 2, 128, band=(400, 410))
+    for azimuth in azimuths:
+        pan = np.tan(np.radians(azimuth) / 2.0)
+        frames = np.column_stack((1.0 - pan, 1.0 + pan)) * burst[100:228, None]
+        results.append(('narrow', float(azimuth), narrow.process(frames)))
+
+    for cue, expected, estimated in results:
+        if cue != 'delay' and abs(estimated - expected) > 1.0:
+            raise AssertionError(f"{cue} burst at {expected:g} deg estimated at {estimated:.1f} deg")
+    return results
+
+
+def benchmark_direction(chunk_size=1024, channels=2, num_chunks=2000):
+    """
+    Audio-thread cost of the direction estimate.
+
+    Returns:
+        dict with the estimate alone (per detected chunk), the mean chunk
+        cost with and without estimation and the chunk deadline, in
+        microseconds, and the share of chunks detected
+    """
+    chunks = [chunk.tobytes() for chunk in _synthetic_chunks(num_chunks, chunk_size, channels, 44100)]
+    estimator = DirectionEstimator(44100, channels, chunk_size)
+    frames = _synthetic_audio(chunk_size, channels, 44100)
+    results = {
+        'estimate_us': float(np.median(_time_per_chunk(estimator.process, [frames] * num_chunks))) * 1e6,
+        'deadline_us': chunk_size / 44100 * 1e6,
+    }
+    for name, enabled in (('chunk_off_us', False), ('chunk_on_us', True)):
+        processor = AudioProcessor(audio_backend=PyAudioDummy())
+        processor.configure_stream(sample_rate=44100, channels=channels, chunk_size=chunk_size)
+        processor.set_direction_estimation(enabled)
+        processor._negotiate_stream()
+        results[name] = float(np.mean(_time_per_chunk(processor._process_stream_buffer, chunks))) * 1e6
+        results['detected_ratio'] = processor.telemetry.latest()['footstep_count'] / num_chunks
+        processor.close()
+    return results
+
+
+# Simulated machines for the latency tuner: (fixed seconds, seconds per frame, stall every n chunks, stall seconds)
+TUNER_MACHINES = {
+    'fast': (50e-6, 0.1e-6, 0, 0.0),
+    'medium': (2e-3, 1e-6, 0, 0.0),
+    'slow': (8e-3, 1e-6, 0, 0.0),
+    'fast, stalls': (50e-6, 0.1e-6, 500, 8e-3),
+}
+
+
+def check_latency_tuner(seconds=300.0, sample_rate=44100):
+    """
+    Drive the latency tuner with simulated machines and report where each settles.
+
+    A chunk costs fixed + per-frame time, plus a stall every n chunks, with
+    10% jitter; a chunk that takes longer than its duration is an xrun.
+
+    Returns:
+        dict of machine -> dict with the settled chunk size, the switches
+        and xruns, and the chunk size over time (one entry per switch)
+    """
+    rng = np.random.default_rng(4)
+    results = {}
+    for name, (fixed, per_frame, stall_every, stall) in TUNER_MACHINES.items():
+        tuner = LatencyTuner(sample_rate)
+        elapsed = 0.0
+        chunks = 0
+        xruns = 0
+        trace = [(0.0, tuner.chunk_size)]
+        while elapsed < seconds:
+            chunk_seconds = tuner.chunk_size / sample_rate
+            cost = (fixed + per_frame * tuner.chunk_size) * rng.uniform(0.9, 1.1)
+            if stall_every and chunks % stall_every == stall_every - 1:
+                cost += stall
+            xrun = cost > chunk_seconds
+            xruns += xrun
+            elapsed += chunk_seconds
+            chunks += 1
+            if tuner.update(cost, xrun) is not None:
+                trace.append((round(elapsed, 1), tuner.chunk_size))
+        results[name] = {'chunk_size': tuner.chunk_size, 'switches': tuner.switches, 'xruns': xruns,
+                         'trace': trace}
+    return results
+
+
+def check_gapless_resize(sample_rate=44100, channels=2):
+    """
+    Change the chunk size mid-stream and compare with a fixed chunk size.
+
+    Covers the STFT engine below threshold (overlap carried), the
+    sample-accurate gain envelope on the allocation-free band filter
+    (filter and envelope state carried), and the resampler (history
+    carried); all three are independent of the chunk size, so any gap or
+    restarted state shows up as a difference.
+
+    Returns:
+        dict of path -> largest absolute sample difference
+    """
+    audio = _synthetic_audio(2 * sample_rate, channels, sample_rate)
+    results = {}
+
+    def run(sizes, configure):
+        processor = AudioProcessor(audio_backend=PyAudioDummy())
+        processor.configure_stream(sample_rate=sample_rate, channels=channels, chunk_size=sizes[0])
+        configure(processor)
+        blocks = []
+        position = 0
+        for size in itertools.cycle(sizes):
+            if position + size > len(audio):
+                break
+            if size != processor.chunk_size:
+                processor._resize_chunks(size)
+            block = audio[position:position + size].reshape(-1)
+            enhanced = processor.enhance_block(block)
+            blocks.append(block if enhanced is None else np.asarray(enhanced).reshape(-1))
+            position += size
+        processor.close()
+        return np.concatenate(blocks)
+
+    sizes = [256, 512, 1024, 256, 2048, 512]
+    def stft(processor):
+        processor.set_detection_engine('stft')
+        processor.set_detection_threshold(10.0)
+
+    def envelope(processor):
+        processor.set_preallocated_mode(True)
+        processor.set_gain_envelope(True)
+
+    for name, configure in (('stft', stft), ('envelope, preallocated', envelope)):
+        fixed = run([256], configure)
+        resized = run(sizes, configure)
+        length = min(len(fixed), len(resized))
+        results[name] = float(np.max(np.abs(fixed[:length] - resized[:length])))
+
+    resampler = StreamingResampler(48000, sample_rate, channels, 160)
+    fixed = np.concatenate([resampler.process(audio[i:i + 160]) for i in range(0, 160 * 500, 160)])
+    resampler = StreamingResampler(48000, sample_rate, channels, 160)
+    blocks = []
+    position = 0
+    for size in itertools.cycle([160, 320, 640, 160, 1280]):
+        if position + size > 160 * 500:
+            break
+        if size != resampler.chunk_size:
+            resampler.resize(size)
+        blocks.append(resampler.process(audio[position:position + size]))
+        position += size
+    resized = np.concatenate(blocks)
+    length = min(len(fixed), len(resized))
+    results['resampler'] = float(np.max(np.abs(fixed[:length] - resized[:length])))
+    return results
+
+
+def benchmark_adaptive_latency(seconds=10.0):
+    """
+    Run the blocking I/O loop in adaptive mode on a real-time dummy device.
+
+    Returns:
+        dict with the chunk size and target latency reached, the switches,
+        xruns, and the load (processing time / chunk duration) of the last chunk
+    """
+    processor = AudioProcessor(audio_backend=_realtime_dummy_backend())
+    processor.set_adaptive_latency(True)
+    processor.start()
+    time.sleep(seconds)
+    tuner = processor.latency_tuner
+    snapshot = processor.telemetry.latest()
+    results = {
+        'chunk_size': processor.chunk_size,
+        'target_latency_ms': snapshot['target_latency'] * 1e3,
+        'switches': tuner.switches,
+        'xruns': processor.xrun_count,
+        'load': tuner.last_load,
+    }
+    processor.close()
+    return results
+
+
+def check_spectrogram(chunk_size=256, sample_rate=48000, frequencies=(100, 250, 500, 1000, 2000, 4000)):
+    """
+    Feed sine tones to the spectrogram analyzer and read back the newest column.
+
+    Each tone plays long enough to fill the analysis window. Rows narrower
+    than a bin share its value, so the check compares the level in the
+    tone's row with the brightest level of the column.
+
+    Returns:
+        list of (frequency, row, level in that row, brightest level, detection mark)
+    """
+    ring = SpectrogramRing()
+    analyzer = SpectrogramAnalyzer(sample_rate, 2, chunk_size, ring)
+    chunks = analyzer.fft_size // chunk_size + 1
+    t = np.arange(chunks * chunk_size) / sample_rate
+    results = []
+    for i, frequency in enumerate(frequencies):
+        tone = np.repeat(0.3 * np.sin(2 * np.pi * frequency * t)[:, None], 2, axis=1)
+        for block in np.split(tone, chunks):
+            analyzer.process(block, i % 2 == 1)
+        column = ring.values[(ring.written - 1) % ring.columns]
+        row = frequency_row(frequency)
+        results.append((frequency, row, int(column[row]), int(column.max()),
+                        bool(ring.marks[(ring.written - 1) % ring.columns])))
+    return results
+
+
+def benchmark_spectrogram(chunk_size=256, sample_rate=48000, channels=2, num_chunks=2000):
+    """
+    Audio-thread and GUI-side cost of the spectrogram view.
+
+    Returns:
+        dict with the analyzer alone, the mean preallocated chunk with the
+        view off and on and the chunk deadline (microseconds), the largest
+        per-chunk allocation with the view on (bytes), and the time to
+        build one frame of the image (milliseconds)
+    """
+    frames = _synthetic_audio(chunk_size, channels, sample_rate)
+    ring = SpectrogramRing()
+    analyzer = SpectrogramAnalyzer(sample_rate, channels, chunk_size, ring)
+    results = {
+        'analyzer_us': float(np.median(_time_per_chunk(
+            lambda block: analyzer.process(block, False), [frames] * num_chunks))) * 1e6,
+        'deadline_us': chunk_size / sample_rate * 1e6,
+    }
+
+    audio = _synthetic_audio(num_chunks * chunk_size, channels, sample_rate)
+    pcm = (np.clip(audio, -1.0, 1.0) * 32767.0).astype(np.int16)
+    chunks = [pcm[i * chunk_size:(i + 1) * chunk_size].tobytes() for i in range(num_chunks)]
+    for name, enabled in (('chunk_off_us', False), ('chunk_on_us', True)):
+        processor = _make_processor(chunk_size, sample_rate, channels, audio, preallocated=True)
+        processor.set_spectrogram(enabled)
+        results[name] = float(np.mean(_time_per_chunk(processor._process_chunk, chunks))) * 1e6
+
+    # Steady-state allocations with the view on, as in check_steady_state_allocations
+    tracemalloc.start()
+    worst = 0
+    for chunk in chunks[:200]:
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        processor._process_chunk(chunk)
+        _, peak = tracemalloc.get_traced_memory()
+        worst = max(worst, peak - baseline)
+    tracemalloc.stop()
+    results['allocated_bytes'] = worst
+
+    image = SpectrogramImage(processor.spectrogram_ring)
+    renders = []
+    for chunk in chunks[:200]:
+        processor._process_chunk(chunk)
+        start = time.perf_counter()
+        image.render()
+        renders.append(time.perf_counter() - start)
+    results['render_ms'] = float(np.median(renders)) * 1e3
+    results['image'] = f"{image.width}x{image.height}"
+    processor.close()
+    return results
+
+
+def _subscriber(path, rate, stop, received, reading=True):
+    """Subscribe to the daemon's telemetry; count events until `stop` is set (or never read them)."""
+    import socket
+
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.connect(path)
+    client.sendall(json.dumps({'command': 'subscribe', 'rate': rate}).encode() + b'\n')
+    client.settimeout(0.2)
+    while not stop.is_set():
+        if not reading:
+            stop.wait(0.2)
+            continue
+        try:
+            data = client.recv(65536)
+        except socket.timeout:
+            continue
+        if not data:
+            break
+        received.append(data.count(b'\n'))
+    client.close()
+
+
+def check_daemon_requests():
+    """
+    Send out-of-range and non-finite values to the daemon's request handler.
+
+    The requests are decoded from JSON text, which Python's json reads
+    NaN and Infinity from. Each must be refused without subscribing or
+    changing a setting; an over-fast rate is clamped to MAX_RATE instead.
+
+    Returns:
+        list of (request line, reply)
+
+    Raises:
+        AssertionError: If a request gets an unexpected reply
+    """
+    import asyncio
+    from daemon import EnhancerDaemon, MAX_RATE
+
+    rejected = (
+        '{"command": "subscribe", "rate": NaN}',
+        '{"command": "subscribe", "rate": Infinity}',
+        '{"command": "subscribe", "rate": "fast"}',
+        '{"command": "subscribe", "rate": true}',
+        '{"command": "set", "enhancement_factor": NaN}',
+        '{"command": "set", "detection_threshold": 1.0}',
+    )
+    clamped = '{"command": "subscribe", "rate": 1000}'
+    processor = AudioProcessor(audio_backend=PyAudioDummy())
+    daemon = EnhancerDaemon(processor, os.devnull)
+    settings = dict(daemon.settings)
+    results = []
+
+    async def send(line, subscription):
+        reply = await daemon.handle_request(json.loads(line), subscription)
+        results.append((line, reply))
+        return reply
+
+    async def run():
+        for line in rejected:
+            subscription = {'writer': None}
+            reply = await send(line, subscription)
+            if reply['ok'] or 'task' in subscription or daemon.settings != settings:
+                if 'task' in subscription:
+                    subscription['task'].cancel()
+                raise AssertionError(f"{line} was accepted: {reply}")
+        subscription = {'writer': None}
+        reply = await send(clamped, subscription)
+        # Cancelled before it first runs, so the missing writer is never used
+        await send('{"command": "unsubscribe"}', subscription)
+        if not reply['ok'] or reply['rate'] != MAX_RATE:
+            raise AssertionError(f"{clamped} was not clamped to {MAX_RATE}: {reply}")
+
+    try:
+        asyncio.run(run())
+    finally:
+        daemon._executor.shutdown()
+        processor.close()
+    return results
+
+
+def benchmark_daemon(seconds=4.0, readers=4, rate=100.0):
+    """
+    Chunk processing latency of the real-time dummy device while the daemon serves telemetry.
+
+    Three phases of `seconds` each: no clients; `readers` subscribers at
+    `rate` events per second; the same plus one subscriber that never reads.
+
+    Returns:
+        dict mapping phase -> (p50_us, p99_us, max_us), plus the events
+        the readers received per second and the events dropped for the stuck client
+    """
+    import asyncio
+    import threading
+    from daemon import EnhancerDaemon, request
+
+    processor = AudioProcessor(audio_backend=_realtime_dummy_backend())
+    _install_chunk_timer(processor)
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'daemon.sock')
+        daemon = EnhancerDaemon(processor, path)
+        server = threading.Thread(target=lambda: asyncio.run(daemon.serve()), daemon=True)
+        server.start()
+        deadline = time.perf_counter() + 5.0
+        while not os.path.exists(path) and time.perf_counter() < deadline:
+            time.sleep(0.01)
+        request({'command': 'start'}, path)
+        time.sleep(0.5)
+
+        stop = threading.Event()
+        received = []
+        clients = []
+        phases = (('idle', 0, False), ('readers', readers, False), ('readers + stuck', 0, True))
+        for name, new_readers, stuck in phases:
+            for _ in range(new_readers):
+                clients.append(threading.Thread(target=_subscriber, args=(path, rate, stop, received)))
+                clients[-1].start()
+            if stuck:
+                clients.append(threading.Thread(target=_subscriber, args=(path, rate, stop, [], False)))
+                clients[-1].start()
+            first = len(processor.chunk_timings())
+            events = sum(received)
+            time.sleep(seconds)
+            ns = np.array(processor.chunk_timings()[first:])
+            results[name] = (float(np.percentile(ns, 50)) / 1e3, float(np.percentile(ns, 99)) / 1e3,
+                             float(ns.max()) / 1e3)
+            if name == 'readers':
+                results['events_per_second'] = (sum(received) - events) / seconds / readers
+
+        results['dropped_events'] = request({'command': 'status'}, path)['dropped_events']
+        stop.set()
+        for client in clients:
+            client.join()
+        request({'command': 'shutdown'}, path)
+        server.join(timeout=10.0)
+    return results
+
+
+def benchmark_classifier(chunk_sizes=(256, 1024, 2048), sample_rate=44100, channels=2, num_candidates=2000):
+    """
+    Cost of the second-stage classifier.
+
+    The model weights do not change the cost, so an untrained model is used.
+
+    Returns:
+        dict with, per chunk size, the push cost per chunk and the median
+        and worst classification cost per candidate (microseconds) next to
+        the chunk deadline, and the per-window cost of batched feature
+        extraction as used for training
+    """
+    features = len(FEATURE_NAMES)
+    model = FootstepClassifier(np.zeros(features), np.ones(features), np.zeros(features), 0.0)
+    results = {'chunks': {}}
+    for chunk_size in chunk_sizes:
+        candidate = CandidateClassifier(model, sample_rate, channels)
+        frames = _synthetic_audio(chunk_size, channels, sample_rate)
+        for _ in range(20):
+            candidate.push(frames)
+            candidate.classify()
+        push = _time_per_chunk(candidate.push, [frames] * num_candidates)
+        classify = _time_per_chunk(lambda _: candidate.classify(), range(num_candidates))
+        results['chunks'][chunk_size] = {
+            'push_us': float(np.median(push)) * 1e6,
+            'classify_us': float(np.median(classify)) * 1e6,
+            'classify_p99_us': float(np.percentile(classify, 99)) * 1e6,
+            'deadline_us': chunk_size / sample_rate * 1e6,
+        }
+
+    windows = _synthetic_audio(num_candidates * window_size(sample_rate), 1, sample_rate)
+    windows = windows.reshape(num_candidates, -1)
+    start = time.perf_counter()
+    compute_features(windows, sample_rate)
+    results['batch_us_per_window'] = (time.perf_counter() - start) / num_candidates * 1e6
+    results['window'] = window_size(sample_rate)
+    return results
+
+
+def _importtime(code):
+    """
+    Run `code` in a fresh interpreter with -X importtime.
+
+    Returns:
+        dict mapping each imported module to its cumulative import time in ms
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            capture_output=True, text=True, cwd=here, check=True)
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = int(cumulative) / 1e3
+    return modules
+
+
+def _startup_runs(command, runs):
+    """
+    Launch `command` --startup-check `runs` times.
+
+    Returns:
+        (wall-clock ms per launch, the last start-up report)
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    walls = []
+    report = None
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'startup.json')
+        for _ in range(runs):
+            start = time.perf_counter()
+            subprocess.run(command + ['--startup-check', path], cwd=here, check=True,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            walls.append((time.perf_counter() - start) * 1e3)
+            with open(path) as f:
+                report = json.load(f)
+    return walls, report
+
+
+def benchmark_startup(runs=5, frozen=None):
+    """
+    Measure start-up cost from source and, optionally, of a frozen build.
+
+    The source run breaks the import of audio_processor down with
+    -X importtime and puts it next to what importing scipy.signal alone
+    costs. Each launch (source: `python main.py`, frozen: the executable)
+    runs with --startup-check, which initializes the audio processor
+    without the GUI and reports its own import and init times; the wall
+    clock around it also covers interpreter start and, for a one-file
+    build, unpacking the bundle.
+
+    Returns:
+        dict with 'imports' and one entry per launched build
+    """
+    modules = _importtime('import audio_processor')
+    scipy_signal = _importtime('import scipy.signal')
+    results = {
+        'imports': {
+            'audio_processor_ms': modules['audio_processor'],
+            'scipy_imported': any(name.split('.')[0] == 'scipy' for name in modules),
+            'slowest': sorted(((ms, name) for name, ms in modules.items()
+                               if name not in ('audio_processor', 'encodings')), reverse=True)[:5],
+            'scipy_signal_alone_ms': scipy_signal['scipy.signal'],
+        },
+    }
+    launches = [('source', [sys.executable, 'main.py'])]
+    if frozen:
+        launches.append(('frozen', [os.path.abspath(frozen)]))
+    for name, command in launches:
+        walls, report = _startup_runs(command, runs)
+        report['wall_p50_ms'] = float(np.median(walls))
+        report['wall_max_ms'] = max(walls)
+        results[name] = report
+    return results
+
+
+def run_sweep(chunk_sizes=DEFAULT_CHUNK_SIZES, sample_rates=DEFAULT_SAMPLE_RATES,
+              channels=DEFAULT_CHANNELS, num_chunks=1000, input_path=None, preallocated=False,
+              engine='bandpass', envelope=False):
+    """Run benchmark_chain over every combination and return a machine-readable report."""
+    results = []
+    for chunk_size, sample_rate, channel_count in itertools.product(chunk_sizes, sample_rates, channels):
+        results.append(benchmark_chain(chunk_size, sample_rate, channel_count, num_chunks=num_chunks,
+                                       input_path=input_path, preallocated=preallocated,
+                                       engine=engine, envelope=envelope))
+    return {
+        'environment': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'scipy': scipy.__version__,
+            'platform': platform.platform(),
+            'machine': platform.machine(),
+        },
+        'signal': input_path or 'synthetic',
+        'results': results,
+    }
+
+
+def compare_reports(baseline, current, tolerance=0.10):
+    """
+    Compare p99 latency per configuration against a baseline report.
+
+    Returns:
+        list of (configuration, baseline_p99_us, current_p99_us) that
+        regressed by more than `tolerance` (a fraction)
+    """
+    def key(result):
+        return (result['chunk_size'], result['sample_rate'], result['channels'],
+                result.get('preallocated', False), result.get('engine', 'bandpass'),
+                result.get('gain_envelope', False))
+
+    previous = {key(result): result for result in baseline['results']}
+    regressions = []
+    for result in current['results']:
+        old = previous.get(key(result))
+        if old and result['p99_us'] > old['p99_us'] * (1.0 + tolerance):
+            regressions.append((key(result), old['p99_us'], result['p99_us']))
+    return regressions
+
+
+def _int_list(value):
+    return [int(item) for item in value.split(',')]
+
+
+def main(argv=None):
+    """Run the benchmark sweep from the command line."""
+    parser = argparse.ArgumentParser(description="Benchmark the real-time processing chain.")
+    parser.add_argument('--chunk-sizes', type=_int_list, default=list(DEFAULT_CHUNK_SIZES))
+    parser.add_argument('--sample-rates', type=_int_list, default=list(DEFAULT_SAMPLE_RATES))
+    parser.add_argument('--channels', type=_int_list, default=list(DEFAULT_CHANNELS))
+    parser.add_argument('--chunks', type=int, default=1000, help="Timed chunks per configuration")
+    parser.add_argument('--input', help="WAV recording to use instead of synthetic audio")
+    parser.add_argument('-o', '--output', help="Write the JSON report to this file")
+    parser.add_argument('--compare', help="Baseline JSON report to check for p99 regressions")
+    parser.add_argument('--tolerance', type=float, default=0.10, help="Allowed p99 regression (fraction)")
+    parser.add_argument('--filter', action='store_true', help="Only compare the filter implementations")
+    parser.add_argument('--preallocated', action='store_true', help="Benchmark the allocation-free mode")
+    parser.add_argument('--engine', choices=('bandpass', 'stft'), default='bandpass',
+                        help="Detection engine to benchmark")
+    parser.add_argument('--envelope', action='store_true',
+                        help="Benchmark with the smoothed attack/hold/release gain envelope")
+    parser.add_argument('--engines', action='store_true',
+                        help="Compare CPU per chunk and added latency of the detection engines")
+    parser.add_argument('--stft-chunk-sizes', action='store_true',
+                        help="Fail if the STFT engine loses its frame length, band or output at odd chunk sizes")
+    parser.add_argument('--multichannel', action='store_true',
+                        help="Per-chunk cost at 2, 6 and 8 channels, combined and per-channel detection")
+    parser.add_argument('--telemetry', action='store_true',
+                        help="Measure the audio-thread cost of GUI updates")
+    parser.add_argument('--check-allocations', action='store_true',
+                        help="Fail if the preallocated hot loop allocates a sample buffer per chunk "
+                             "(small interpreter objects, about 1-2 KB, are allowed)")
+    parser.add_argument('--stream-formats', action='store_true',
+                        help="Compare int16, float32 and resampled float32 streams "
+                             "(1024 frames x 2 channels, or the first --chunk-sizes/--channels entry)")
+    parser.add_argument('--stream-writes', action='store_true',
+                        help="Check that enhanced chunks are written in full, as PyAudio counts frames")
+    parser.add_argument('--pipeline', action='store_true',
+                        help="Run the threaded pipeline with injected DSP stalls")
+    parser.add_argument('--worker', action='store_true',
+                        help="Chunk latency under GUI load: processing thread vs worker process")
+    parser.add_argument('--instrumentation', action='store_true',
+                        help="Cost of per-stage instrumentation, and the stage breakdown")
+    parser.add_argument('--session', action='store_true',
+                        help="Check that stop/start reuses the PortAudio session")
+    parser.add_argument('--soft-clip', action='store_true',
+                        help="Check and time the int16 lookup-table soft clip")
+    parser.add_argument('--flight-recorder', action='store_true',
+                        help="Check the record/replay round trip and time the recorder")
+    parser.add_argument('--direction', action='store_true',
+                        help="Check the azimuth estimate on placed bursts and time it")
+    parser.add_argument('--adaptive-latency', action='store_true',
+                        help="Simulate the latency tuner, check gapless chunk size switches and run it live")
+    parser.add_argument('--spectrogram', action='store_true',
+                        help="Check spectrogram column placement and time the analyzer and frame build")
+    parser.add_argument('--daemon', action='store_true',
+                        help="Check that invalid requests are refused, then time chunk processing "
+                             "while the daemon serves telemetry subscribers")
+    parser.add_argument('--classifier', action='store_true',
+                        help="Time the second-stage classifier per candidate and in batches")
+    parser.add_argument('--startup', action='store_true',
+                        help="Measure import and start-up time (python -X importtime and launches)")
+    parser.add_argument('--frozen', help="With --startup: also launch this PyInstaller build")
+    args = parser.parse_args(argv)
+
+    if args.flight_recorder:
+        for name, summary in check_flight_recorder().items():
+            print(f"  replay {name:<10} {summary['compared']:4d}/{summary['chunks']} chunks compared  "
+                  f"footsteps recorded {summary['recorded_footsteps']:3d}  replayed {summary['replayed_footsteps']:3d} "
+                  f"(+{summary['newly_detected']} / -{summary['no_longer_detected']})")
+        cost = benchmark_flight_recorder()
+        print(f"Recorder, 1024 frames x 2 channels: {cost['recorder_us']:.1f} us per chunk; "
+              f"chunk {cost['chunk_off_us']:.1f} us off, {cost['chunk_on_us']:.1f} us recording")
+        return 0
+
+    if args.direction:
+        try:
+            results = check_direction()
+        except AssertionError as e:
+            print(f"  FAIL: {e}")
+            return 1
+        for cue, expected, estimated in results:
+            print(f"  {cue:<6} expected {expected:6.1f} deg  estimated {estimated:6.1f} deg")
+        cost = benchmark_direction()
+        print(f"Direction, 1024 frames x 2 channels: {cost['estimate_us']:.1f} us per detected chunk "
+              f"({cost['estimate_us'] / cost['deadline_us'] * 100:.2f}% of the {cost['deadline_us'] / 1e3:.1f} ms "
+              f"deadline); mean chunk {cost['chunk_off_us']:.1f} us off, {cost['chunk_on_us']:.1f} us on "
+              f"({cost['detected_ratio'] * 100:.0f}% of chunks detected)")
+        return 0
+
+    if args.adaptive_latency:
+        for name, result in check_latency_tuner().items():
+            trace = " -> ".join(f"{size}@{at:g}s" for at, size in result['trace'])
+            print(f"  {name:<13} settles at {result['chunk_size']:4d} frames  "
+                  f"{result['switches']} switches, {result['xruns']} xruns: {trace}")
+        for name, difference in check_gapless_resize().items():
+            print(f"  resize {name:<23} max difference vs fixed chunks {difference:.3g}")
+            if difference > 1e-9:
+                print("  FAIL: the output changed across a chunk size switch")
+                return 1
+        live = benchmark_adaptive_latency()
+        print(f"Live, real-time dummy device: {live['chunk_size']} frames ({live['target_latency_ms']:.1f} ms) "
+              f"after {live['switches']} switches, {live['xruns']} xruns, load {live['load'] * 100:.1f}%")
+        return 0
+
+    if args.spectrogram:
+        for frequency, row, level, brightest, marked in check_spectrogram():
+            print(f"  {frequency:5d} Hz  row {row:3d} level {level:3d}  brightest {brightest:3d}  "
+                  f"marked {'yes' if marked else 'no'}")
+            if level < brightest - 6:
+                print("  FAIL: the tone is not drawn in its row")
+                return 1
+        cost = benchmark_spectrogram()
+        print(f"Spectrogram, 256 frames x 2 channels @ 48000 Hz: analyzer {cost['analyzer_us']:.1f} us per chunk "
+              f"({cost['analyzer_us'] / cost['deadline_us'] * 100:.2f}% of the {cost['deadline_us'] / 1e3:.2f} ms "
+              f"deadline); mean chunk {cost['chunk_off_us']:.1f} us off, {cost['chunk_on_us']:.1f} us on; "
+              f"max {cost['allocated_bytes']} bytes allocated per chunk")
+        print(f"Frame build ({cost['image']}): {cost['render_ms']:.2f} ms")
+        if cost['allocated_bytes'] > 2048:
+            print("  FAIL: the spectrogram allocates on the audio thread")
+            return 1
+        return 0
+
+    if args.daemon:
+        try:
+            requests = check_daemon_requests()
+        except AssertionError as e:
+            print(f"  FAIL: {e}")
+            return 1
+        for line, reply in requests:
+            print(f"  {line:<48} -> {reply.get('error', reply)}")
+        result = benchmark_daemon()
+        print("Chunk latency while the daemon serves telemetry, 256 frames x 2 channels")
+        for phase in ('idle', 'readers', 'readers + stuck'):
+            p50, p99, worst = result[phase]
+            print(f"  {phase:<16} p50 {p50:8.1f} us  p99 {p99:8.1f} us  max {worst:8.1f} us")
+        print(f"  each reader received {result['events_per_second']:.1f} events/s; "
+              f"{result['dropped_events']} events dropped for the stuck subscriber")
+        return 0
+
+    if args.classifier:
+        result = benchmark_classifier()
+        print(f"Second-stage classifier, {result['window']}-sample window x 2 channels @ 44100 Hz")
+        for chunk_size, cost in result['chunks'].items():
+            print(f"  {chunk_size:5d} frames: push {cost['push_us']:6.1f} us per chunk, classify "
+                  f"{cost['classify_us']:6.1f} us (p99 {cost['classify_p99_us']:6.1f} us) per candidate, "
+                  f"{cost['classify_us'] / cost['deadline_us'] * 100:.1f}% of the "
+                  f"{cost['deadline_us'] / 1e3:.1f} ms deadline")
+        print(f"  batched features (training): {result['batch_us_per_window']:.1f} us per window")
+        return 0
+
+    if args.startup:
+        result = benchmark_startup(frozen=args.frozen)
+        imports = result['imports']
+        print(f"import audio_processor: {imports['audio_processor_ms']:.1f} ms "
+              f"(scipy imported: {imports['scipy_imported']}; "
+              f"import scipy.signal alone: {imports['scipy_signal_alone_ms']:.1f} ms)")
+        for ms, name in imports['slowest']:
+            print(f"  {name:<32} {ms:8.1f} ms")
+        for name in ('source', 'frozen'):
+            if name in result:
+                launch = result[name]
+                print(f"{name:<7} launch p50 {launch['wall_p50_ms']:7.1f} ms (max {launch['wall_max_ms']:7.1f})  "
+                      f"imports {launch['import_ms']:7.1f} ms  init {launch['init_ms']:6.1f} ms  "
+                      f"scipy loaded: {launch['scipy_loaded']}")
+        return 0
+
+    if args.engines:
+        print("Detection engines, 1024 frames x 2 channels @ 44100 Hz")
+        for name, (p50, p99, latency) in benchmark_engines().items():
+            print(f"  {name:<10} p50 {p50:8.1f} us  p99 {p99:8.1f} us  added latency {latency:5.2f} ms")
+        return 0
+
+    if args.stft_chunk_sizes:
+        print("STFT engine, 2 channels @ 44100 Hz")
+        try:
+            results = check_stft_chunk_sizes()
+        except AssertionError as e:
+            print(f"  FAIL: {e}")
+            return 1
+        for chunk_size, result in results.items():
+            print(f"  {chunk_size:5d} frames  FFT {result['fft_size']}  latency {result['latency_frames']:3d} frames  "
+                  f"p50 {result['p50_us']:7.1f} us  enhanced {result['enhanced_ratio'] * 100:4.1f}%  "
+                  f"reconstruction error {result['reconstruction_error']:.2g}")
+        return 0
+
+    if args.multichannel:
+        print("Multichannel, 1024 frames @ 44100 Hz, mean per chunk")
+        for name, timings in benchmark_channels().items():
+            counts = sorted(timings)
+            per_channel, fixed = np.polyfit(counts, [timings[c] for c in counts], 1)
+            columns = "  ".join(f"{c} ch {timings[c]:7.1f} us ({timings[c] / c:5.1f}/ch)" for c in counts)
+            print(f"  {name:<26} {columns}  fit {fixed:6.1f} us + {per_channel:5.1f} us/ch")
+        return 0
+
+    if args.telemetry:
+        for name, micros in benchmark_telemetry().items():
+            value = "n/a" if micros is None else f"{micros:8.2f} us/chunk"
+            print(f"  {name:<28} {value}")
+        return 0
+
+    if args.stream_formats:
+        # One configuration: 1024 x 2 unless --chunk-sizes/--channels is given (its first entry)
+        chunk_size = args.chunk_sizes[0] if args.chunk_sizes != list(DEFAULT_CHUNK_SIZES) else 1024
+        channels = args.channels[0] if args.channels != list(DEFAULT_CHANNELS) else 2
+        print(f"Stream formats, {chunk_size} frames x {channels} channels")
+        for name, (p50, p99) in benchmark_stream_formats(chunk_size, channels,
+                                                         preallocated=args.preallocated).items():
+            print(f"  {name:<24} p50 {p50:8.1f} us  p99 {p99:8.1f} us")
+        return 0
+
+    if args.stream_writes:
+        try:
+            results = check_stream_writes()
+        except AssertionError as e:
+            print(f"  FAIL: {e}")
+            return 1
+        for name, (read, written, onsets) in results.items():
+            print(f"  {name:<20} read {read:7d} frames  written {written:7d}  footstep onsets {onsets:3d}")
+        return 0
+
+    if args.pipeline:
+        for stage, stats in check_pipeline().items():
+            print(f"  {stage:<9} blocks {stats['blocks']:5d}  fill {stats['fill']}/{stats['capacity']} "
+                  f"(peak {stats['peak_fill']})  overflows {stats['overflows']:3d}  "
+                  f"underflows {stats['underflows']:3d}")
+        return 0
+
+    if args.worker:
+        cpus = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count()
+        print(f"Chunk latency under synthetic GUI load, 256 frames x 2 channels ({cpus} CPUs)")
+        for mode, (p50, p99, worst) in benchmark_worker().items():
+            print(f"  {mode:<8} p50 {p50:8.1f} us  p99 {p99:8.1f} us  max {worst:8.1f} us")
+        return 0
+
+    if args.instrumentation:
+        result = benchmark_instrumentation()
+        print(f"Chunk time, 1024 frames x 2 channels: {result['off_us']:.1f} us off, "
+              f"{result['on_us']:.1f} us with instrumentation")
+        for stage, summary in result['stages'].items():
+            if summary['count']:
+                print(f"  {stage:<8} p50 {summary['p50_us']:8.1f} us  p99 {summary['p99_us']:8.1f} us")
+        return 0
+
+    if args.session:
+        for callback in (False, True):
+            mode = "callback" if callback else "blocking"
+            stats = check_session_reuse(callback=callback)
+            print(f"  {mode:<9} start-to-first-sample p50 {stats['start_to_first_sample_p50_ms']:6.2f} ms "
+                  f"(max {stats['start_to_first_sample_max_ms']:6.2f})  "
+                  f"stop p50 {stats['stop_p50_ms']:6.2f} ms (max {stats['stop_max_ms']:6.2f})")
+        return 0
+
+    if args.soft_clip:
+        try:
+            errors = check_soft_clip_accuracy()
+        except AssertionError as e:
+            print(f"  FAIL: {e}")
+            return 1
+        for gain, error in errors.items():
+            print(f"  gain {gain:5.2f}: max error {error} LSB vs float path")
+        print("Soft clip, 1024 frames x 2 channels")
+        for name, micros in benchmark_soft_clip().items():
+            print(f"  {name:<28} {micros:8.1f} us")
+        return 0
+
+    if args.check_allocations:
+        for chunk_size, sample_rate, channels in itertools.product(
+                args.chunk_sizes, args.sample_rates, args.channels):
+            try:
+                worst, limit = check_steady_state_allocations(chunk_size, sample_rate, channels)
+            except AssertionError as e:
+                print(f"{chunk_size} frames @ {sample_rate} Hz x {channels} ch: FAIL: {e}")
+                return 1
+            print(f"{chunk_size} frames @ {sample_rate} Hz x {channels} ch: "
+                  f"max {worst} bytes allocated per chunk (limit {limit})")
+        return 0
+
+    if args.filter:
+        print(f"Filter stage, 1024 frames x 2 channels @ 44100 Hz (Python {platform.python_version()})")
+        timings = benchmark_filter()
+        for name, micros in timings.items():
+            print(f"  {name:<36} {micros:8.1f} us/chunk")
+        ratio = timings["numpy block kernel (until scipy loads)"] / timings["sosfilt (streaming, per-channel)"]
+        print(f"  The numpy kernel costs {ratio:.2f}x sosfilt per chunk; StreamingFilter uses it only "
+              f"until scipy.signal is imported")
+        return 0
+
+    report = run_sweep(args.chunk_sizes, args.sample_rates, args.channels,
+                       num_chunks=args.chunks, input_path=args.input,
+                       preallocated=args.preallocated, engine=args.engine,
+                       envelope=args.envelope)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare_reports(baseline, report, args.tolerance)
+        for (chunk_size, sample_rate, channels, *_), old, new in regressions:
+            print(f"REGRESSION {chunk_size} frames @ {sample_rate} Hz x {channels} ch: "
+                  f"p99 {old:.1f} -> {new:.1f} us", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -105,9 +105,7 @@ def build_executable():
             "--noconsole",
             "--clean",
             "--hidden-import=pyaudio",
-            "--hidden-import=numpy", 
-            "--hidden-import=scipy",
-            "--hidden-import=scipy.signal"
+            "--hidden-import=numpy"
         ]
         
         if os.path.exists(icon_path):
@@ -0,0 +1,243 @@
+"""
+Classifier Module for Footstep Sound Enhancer
+Second-stage check of footstep candidates: a compact feature vector scored by a small linear model.
+"""
+
+import time
+from functools import lru_cache
+
+import numpy as np
+
+# Audio the features look at, ending with the newest chunk (seconds; rounded up to a power of
+# two). Longer windows dilute the transient with the background around it.
+WINDOW_SECONDS = 0.02
+
+# Band energy edges (Hz); one feature per band, as its share of the energy between the outer edges
+BAND_EDGES = (50.0, 200.0, 400.0, 800.0, 1600.0, 3200.0, 8000.0)
+
+# Envelope segments per window for the onset slope and decay time
+SEGMENTS = 16
+
+# Decay times are capped here (ms); flat or still-rising envelopes get the cap
+MAX_DECAY_MS = 200.0
+
+FEATURE_NAMES = tuple(
+    [f"band_{int(low)}_{int(high)}" for low, high in zip(BAND_EDGES[:-1], BAND_EDGES[1:])]
+    + ['centroid', 'crest', 'onset_slope', 'decay_ms']
+)
+
+
+def window_size(sample_rate, seconds=WINDOW_SECONDS):
+    """Samples per feature window: a power of two, a multiple of SEGMENTS."""
+    return max(SEGMENTS, 1 << (int(np.ceil(seconds * sample_rate)) - 1).bit_length())
+
+
+@lru_cache(maxsize=8)
+def _spectrum_plan(size, sample_rate):
+    """Hann window, bin frequencies up to the top band edge, and band start bins for one window size."""
+    frequencies = np.fft.rfftfreq(size, 1.0 / sample_rate)
+    edges = np.searchsorted(frequencies, BAND_EDGES)
+    return np.hanning(size), frequencies[:edges[-1]], edges
+
+
+def compute_features(windows, sample_rate):
+    """
+    Feature vectors of a batch of mono windows, all at once.
+
+    Features (see FEATURE_NAMES):
+        band_*: log10 share of the energy in each BAND_EDGES band
+        centroid: log2 of the spectral centroid in kHz
+        crest: peak to RMS ratio in dB
+        onset_slope: rise from the quietest envelope segment before the
+            peak to the peak, in dB per ms
+        decay_ms: time to fall 10 dB at the average slope after the peak
+
+    Args:
+        windows: (n, samples) array; samples must be a multiple of SEGMENTS
+        sample_rate: Sample rate in Hz
+
+    Returns:
+        (n, len(FEATURE_NAMES)) float64 array
+    """
+    windows = np.asarray(windows, dtype=np.float64)
+    count, size = windows.shape
+    rows = np.arange(count)
+
+    hann, frequencies, edges = _spectrum_plan(size, sample_rate)
+    power = np.square(np.abs(np.fft.rfft(windows * hann, axis=1)[:, :edges[-1]]))
+    bands = np.add.reduceat(power, edges[:-1], axis=1)
+    total = bands.sum(axis=1, keepdims=True) + 1e-20
+    shares = np.log10(bands / total + 1e-6)
+    centroid = (power @ frequencies) / (power.sum(axis=1) + 1e-20)
+    centroid = np.log2(centroid / 1000.0 + 1e-3)
+
+    energy = np.mean(np.square(windows), axis=1)
+    crest = 20.0 * np.log10(np.abs(windows).max(axis=1) / np.sqrt(energy + 1e-20) + 1e-12)
+
+    envelope = 10.0 * np.log10(np.mean(np.square(windows.reshape(count, SEGMENTS, -1)), axis=2) + 1e-12)
+    segment_ms = size / SEGMENTS / sample_rate * 1000.0
+    peak = envelope.argmax(axis=1)
+    peak_db = envelope[rows, peak]
+    before = np.where(np.arange(SEGMENTS) <= peak[:, None], envelope, np.inf)
+    quietest = before.argmin(axis=1)
+    onset_slope = (peak_db - before[rows, quietest]) / ((peak - quietest + 1) * segment_ms)
+
+    after = SEGMENTS - 1 - peak
+    fall_rate = (peak_db - envelope[:, -1]) / (np.maximum(after, 1) * segment_ms)
+    decay_ms = np.where(after > 0, 10.0 / np.maximum(fall_rate, 10.0 / MAX_DECAY_MS), MAX_DECAY_MS)
+
+    return np.column_stack((shares, centroid, crest, onset_slope, decay_ms))
+
+
+def _sigmoid(x):
+    return 0.5 * (1.0 + np.tanh(0.5 * x))
+
+
+class FootstepClassifier:
+    """
+    Logistic model over compute_features().
+
+    The model is a handful of plain arrays (feature mean and scale,
+    weights, bias, decision threshold), saved as .npz and scored with
+    numpy alone. train_classifier.py fits it on recorded clips.
+    """
+
+    def __init__(self, mean, scale, weights, bias, threshold=0.5, window_seconds=WINDOW_SECONDS):
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.bias = float(bias)
+        self.threshold = float(threshold)
+        self.window_seconds = float(window_seconds)
+
+    def probability(self, features):
+        """Footstep probability of each row of `features`."""
+        return _sigmoid(((features - self.mean) / self.scale) @ self.weights + self.bias)
+
+    def accept(self, features):
+        """Whether each row of `features` is classified as a footstep."""
+        return self.probability(features) >= self.threshold
+
+    @classmethod
+    def fit(cls, features, labels, l2=1e-3, iterations=2000, learning_rate=1.0, window_seconds=WINDOW_SECONDS):
+        """
+        Fit the model by full-batch gradient descent on the logistic loss.
+
+        The classes are weighted equally, so a candidate set dominated by
+        one of them still gives a usable model.
+
+        Args:
+            features: (n, len(FEATURE_NAMES)) feature vectors
+            labels: (n,) booleans, True for footsteps
+            l2: Weight decay
+            iterations: Gradient steps
+            learning_rate: Step size on the standardized features
+            window_seconds: Window the features were computed over
+        """
+        features = np.asarray(features, dtype=np.float64)
+        labels = np.asarray(labels, dtype=np.float64)
+        mean = features.mean(axis=0)
+        scale = features.std(axis=0) + 1e-9
+        x = (features - mean) / scale
+        positive = max(labels.mean(), 1e-9)
+        sample_weight = np.where(labels > 0, 0.5 / positive, 0.5 / max(1.0 - positive, 1e-9)) / len(labels)
+
+        weights = np.zeros(x.shape[1])
+        bias = 0.0
+        for _ in range(iterations):
+            error = (_sigmoid(x @ weights + bias) - labels) * sample_weight
+            weights -= learning_rate * (x.T @ error + l2 * weights)
+            bias -= learning_rate * error.sum()
+        return cls(mean, scale, weights, bias, window_seconds=window_seconds)
+
+    def parameters(self):
+        """The model as plain lists and floats (JSON-serializable); FootstepClassifier(**parameters) rebuilds it."""
+        return {'mean': self.mean.tolist(), 'scale': self.scale.tolist(), 'weights': self.weights.tolist(),
+                'bias': self.bias, 'threshold': self.threshold, 'window_seconds': self.window_seconds}
+
+    def save(self, path):
+        """Write the model as a .npz file."""
+        np.savez(path, mean=self.mean, scale=self.scale, weights=self.weights, bias=self.bias,
+                 threshold=self.threshold, window_seconds=self.window_seconds,
+                 feature_names=np.array(FEATURE_NAMES))
+
+    @classmethod
+    def load(cls, path):
+        """
+        Read a model saved by save().
+
+        Raises:
+            ValueError: If the model was trained on different features
+        """
+        with np.load(path, allow_pickle=False) as data:
+            if tuple(data['feature_names'].tolist()) != FEATURE_NAMES:
+                raise ValueError(f"{path} was trained on different features")
+            return cls(data['mean'], data['scale'], data['weights'], float(data['bias']),
+                       float(data['threshold']), float(data['window_seconds']))
+
+
+class CandidateClassifier:
+    """
+    Real-time wrapper: keeps the newest window of mono audio and classifies it on demand.
+
+    push() runs on every chunk and only mixes it into a circular history
+    (no allocation). classify() runs only when the cheap detector fires;
+    its cost depends on the fixed window, not on the chunk size, so every
+    candidate costs the same bounded amount.
+    """
+
+    def __init__(self, model, sample_rate, channels):
+        """
+        Args:
+            model: FootstepClassifier
+            sample_rate: Sample rate in Hz
+            channels: Number of channels in each chunk
+        """
+        self.model = model
+        self.sample_rate = sample_rate
+        self.size = window_size(sample_rate, model.window_seconds)
+        self._mix = np.full(channels, 1.0 / channels)
+        self._frames = np.zeros((self.size, channels))
+        self._history = np.zeros(self.size)
+        self._window = np.zeros((1, self.size))
+        self._position = 0
+        self.candidates = 0
+        self.rejected = 0
+        self.seconds = 0.0
+
+    def reset(self):
+        """Forget the audio history, e.g. after the stream is reopened."""
+        self._history.fill(0.0)
+        self._position = 0
+
+    def push(self, frames):
+        """Add a (frames, channels) chunk to the history."""
+        # Only the newest window of a long chunk is kept
+        length = frames.shape[0]
+        if length > self.size:
+            frames = frames[length - self.size:]
+            length = self.size
+        # Converted into a float64 copy first, as matmul would allocate one for float32 input
+        staged = self._frames
+        np.copyto(staged[:length], frames[:length])
+        history = self._history
+        start = self._position
+        first = min(length, self.size - start)
+        np.matmul(staged[:first], self._mix, out=history[start:start + first])
+        if first < length:
+            np.matmul(staged[first:length], self._mix, out=history[:length - first])
+        self._position = (start + length) % self.size
+
+    def classify(self):
+        """Classify the newest window; True if it is a footstep."""
+        start = time.perf_counter()
+        oldest = self._position
+        window = self._window[0]
+        window[:self.size - oldest] = self._history[oldest:]
+        window[self.size - oldest:] = self._history[:oldest]
+        accepted = bool(self.model.accept(compute_features(self._window, self.sample_rate))[0])
+        self.candidates += 1
+        if not accepted:
+            self.rejected += 1
+        self.seconds += time.perf_counter() - start
+        return accepted
@@ -0,0 +1,366 @@
+"""
+Daemon Module for Footstep Sound Enhancer
+Runs the enhancer without a GUI, controlled and monitored over a local Unix-domain socket.
+
+The protocol is one JSON object per line in both directions. Requests:
+
+    {"command": "start"}
+    {"command": "stop"}
+    {"command": "set", "enhancement_factor": 3.0, "detection_threshold": 0.04}
+    {"command": "status"}
+    {"command": "subscribe", "rate": 20}      # telemetry events at up to 20 per second
+    {"command": "unsubscribe"}
+    {"command": "shutdown"}
+
+Every request is answered with {"ok": true, ...} or {"ok": false, "error": ...}.
+A subscription streams {"event": "telemetry", "telemetry": {...}, "dropped": n}
+lines until it is cancelled or the connection closes.
+
+Usage:
+    python main.py --daemon                            # serve on the default socket
+    python daemon.py status                            # one request, reply on stdout
+    python daemon.py set enhancement_factor=3.0
+    python daemon.py watch --rate 10                   # print telemetry until interrupted
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import signal
+import socket
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Settings the `set` command accepts: the processor method applying each, and
+# its allowed range (the same as the GUI sliders)
+SETTINGS = {
+    'enhancement_factor': ('set_enhancement_factor', 1.0, 5.0),
+    'detection_threshold': ('set_detection_threshold', 0.01, 0.2),
+}
+
+# Telemetry rates a subscriber may ask for (events per second)
+MIN_RATE = 0.1
+MAX_RATE = 100.0
+
+# Bytes a subscriber may leave unread before its events are dropped
+MAX_BUFFERED = 64 * 1024
+
+
+def default_socket_path():
+    """Per-user socket path: $XDG_RUNTIME_DIR if set, otherwise the temp directory."""
+    directory = os.environ.get('XDG_RUNTIME_DIR') or tempfile.gettempdir()
+    name = 'footstep-enhancer.sock'
+    if hasattr(os, 'getuid') and not os.environ.get('XDG_RUNTIME_DIR'):
+        name = f'footstep-enhancer-{os.getuid()}.sock'
+    return os.path.join(directory, name)
+
+
+def _json_default(value):
+    """Serialize numpy scalars that may appear in telemetry snapshots."""
+    if hasattr(value, 'item'):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _encode(message):
+    return (json.dumps(message, default=_json_default) + '\n').encode('utf-8')
+
+
+class EnhancerDaemon:
+    """
+    Serves one AudioProcessor (or WorkerAudioProcessor) to local clients.
+
+    The audio thread is untouched: it keeps publishing to the processor's
+    telemetry snapshot, and each subscriber polls that snapshot from the
+    event loop at its own rate. A subscriber that stops reading only fills
+    its own socket buffer; past MAX_BUFFERED bytes its events are dropped
+    and counted instead of queued. Control calls run on a single helper
+    thread, so opening the audio device never stalls the event loop.
+    """
+
+    def __init__(self, processor, socket_path=None):
+        """
+        Args:
+            processor: AudioProcessor or WorkerAudioProcessor to control
+            socket_path: Unix-domain socket to listen on (default: default_socket_path())
+        """
+        self.processor = processor
+        self.socket_path = socket_path or default_socket_path()
+        self.settings = {'enhancement_factor': 2.0, 'detection_threshold': 0.05}
+        self.status = "Stopped"
+        self.started_at = time.time()
+        self.dropped_events = 0
+        self._connections = {}
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='footstep-control')
+        self._server = None
+        self._stopping = None
+
+        # Only ever rebinds an attribute, whichever thread reports the status
+        processor.on_status_change = self._set_status
+
+    def _set_status(self, status):
+        self.status = status
+
+    async def _call(self, method, *args):
+        """Run a processor method on the control thread."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, lambda: getattr(self.processor, method)(*args))
+
+    def _state(self):
+        return {
+            'running': bool(self.processor.is_running),
+            'status': self.status,
+            'settings': dict(self.settings),
+        }
+
+    async def handle_request(self, request, subscription):
+        """
+        Execute one request.
+
+        Args:
+            request: Decoded request object
+            subscription: Per-connection dict holding the subscription task
+
+        Returns:
+            The reply object
+        """
+        command = request.get('command')
+        if command == 'start':
+            started = await self._call('start')
+            reply = {'ok': bool(started)}
+            if not started:
+                reply['error'] = "Audio processing could not be started"
+            reply.update(self._state())
+            return reply
+        if command == 'stop':
+            await self._call('stop')
+            return dict({'ok': True}, **self._state())
+        if command == 'set':
+            values = {name: request[name] for name in SETTINGS if name in request}
+            unknown = set(request) - set(SETTINGS) - {'command'}
+            if unknown or not values:
+                return {'ok': False, 'error': f"set takes {', '.join(SETTINGS)}"}
+            for name, value in values.items():
+                _, low, high = SETTINGS[name]
+                if isinstance(value, bool) or not isinstance(value, (int, float)) \
+                        or not math.isfinite(value) or not low <= value <= high:
+                    return {'ok': False, 'error': f"{name} must be a number from {low} to {high}"}
+            # Validated first, so a rejected request changes nothing
+            for name, value in values.items():
+                value = float(value)
+                await self._call(SETTINGS[name][0], value)
+                self.settings[name] = value
+            return dict({'ok': True}, **self._state())
+        if command == 'status':
+            reply = dict({'ok': True, 'telemetry': self.processor.telemetry.latest(),
+                          'uptime': time.time() - self.started_at, 'clients': len(self._connections),
+                          'dropped_events': self.dropped_events},
+                         **self._state())
+            return reply
+        if command == 'subscribe':
+            rate = request.get('rate', 10.0)
+            if isinstance(rate, bool) or not isinstance(rate, (int, float)) or not math.isfinite(rate):
+                return {'ok': False, 'error': "rate must be a number of events per second"}
+            rate = min(max(float(rate), MIN_RATE), MAX_RATE)
+            task = subscription.get('task')
+            if task is not None:
+                task.cancel()
+            subscription['task'] = asyncio.ensure_future(self._stream(subscription['writer'], rate))
+            return {'ok': True, 'rate': rate}
+        if command == 'unsubscribe':
+            task = subscription.pop('task', None)
+            if task is not None:
+                task.cancel()
+            return {'ok': True}
+        if command == 'shutdown':
+            self._stopping.set()
+            return {'ok': True}
+        return {'ok': False, 'error': f"Unknown command: {command}"}
+
+    async def _stream(self, writer, rate):
+        """Send the newest telemetry snapshot to one subscriber, at most `rate` times a second."""
+        interval = 1.0 / rate
+        telemetry = self.processor.telemetry
+        last_sequence = None
+        dropped = 0
+        next_time = time.perf_counter()
+        while True:
+            snapshot = telemetry.latest()
+            if snapshot['sequence'] != last_sequence:
+                if writer.transport.get_write_buffer_size() > MAX_BUFFERED:
+                    # The client is not reading; skip rather than queue
+                    dropped += 1
+                    self.dropped_events += 1
+                else:
+                    last_sequence = snapshot['sequence']
+                    writer.write(_encode({'event': 'telemetry', 'telemetry': snapshot,
+                                          'status': self.status, 'dropped': dropped}))
+            next_time += interval
+            await asyncio.sleep(max(0.0, next_time - time.perf_counter()))
+
+    async def _handle_client(self, reader, writer):
+        """Serve one connection until it closes."""
+        self._connections[asyncio.current_task()] = writer
+        subscription = {'writer': writer}
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("request must be a JSON object")
+                    reply = await self.handle_request(request, subscription)
+                except (ValueError, TypeError) as e:
+                    reply = {'ok': False, 'error': str(e)}
+                except Exception as e:
+                    reply = {'ok': False, 'error': f"{type(e).__name__}: {e}"}
+                writer.write(_encode(reply))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            del self._connections[asyncio.current_task()]
+            task = subscription.get('task')
+            if task is not None:
+                task.cancel()
+            writer.close()
+
+    def _remove_stale_socket(self):
+        """Delete a socket file left behind by a daemon that is no longer running."""
+        if not os.path.exists(self.socket_path):
+            return
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.socket_path)
+        except (ConnectionRefusedError, FileNotFoundError):
+            os.unlink(self.socket_path)
+        else:
+            raise RuntimeError(f"Another daemon is listening on {self.socket_path}")
+        finally:
+            probe.close()
+
+    async def serve(self):
+        """Listen until a shutdown request or SIGINT/SIGTERM, then stop processing and clean up."""
+        self._stopping = asyncio.Event()
+        self._remove_stale_socket()
+        # Created owner-only from the start: a chmod after binding would leave
+        # a window in which other local users could connect
+        umask = os.umask(0o177)
+        try:
+            self._server = await asyncio.start_unix_server(self._handle_client, path=self.socket_path)
+        finally:
+            os.umask(umask)
+
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self._stopping.set)
+            except (NotImplementedError, RuntimeError):
+                pass
+        print(f"Footstep enhancer daemon listening on {self.socket_path}")
+
+        try:
+            await self._stopping.wait()
+        finally:
+            self._server.close()
+            # Aborting a connection ends its handler with end-of-file; close()
+            # would wait for a client that stopped reading to drain its buffer
+            handlers = list(self._connections)
+            for writer in self._connections.values():
+                writer.transport.abort()
+            await asyncio.gather(*handlers, return_exceptions=True)
+            await self._server.wait_closed()
+            await self._call('close')
+            self._executor.shutdown()
+            try:
+                os.unlink(self.socket_path)
+            except FileNotFoundError:
+                pass
+
+
+def run_daemon(processor, socket_path=None):
+    """
+    Serve `processor` on a Unix-domain socket until shut down.
+
+    Returns:
+        Exit code: 0 after a clean shutdown, 1 if the daemon could not start
+    """
+    if not hasattr(asyncio, 'start_unix_server'):
+        print("Daemon mode needs Unix-domain sockets, which are not available on this platform")
+        processor.close()
+        return 1
+    daemon = EnhancerDaemon(processor, socket_path)
+    try:
+        asyncio.run(daemon.serve())
+    except Exception as e:
+        print(f"Error running daemon: {e}")
+        processor.close()
+        return 1
+    return 0
+
+
+def request(message, socket_path=None, timeout=10.0):
+    """
+    Send one request to a running daemon and return its reply.
+
+    Args:
+        message: Request object, e.g. {'command': 'status'}
+        socket_path: Daemon socket (default: default_socket_path())
+        timeout: Seconds to wait for the reply
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.settimeout(timeout)
+        client.connect(socket_path or default_socket_path())
+        client.sendall(_encode(message))
+        with client.makefile('rb') as replies:
+            return json.loads(replies.readline())
+
+
+def watch(rate=10.0, socket_path=None):
+    """Subscribe to telemetry and yield each event's snapshot."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(socket_path or default_socket_path())
+        client.sendall(_encode({'command': 'subscribe', 'rate': rate}))
+        with client.makefile('rb') as lines:
+            reply = json.loads(lines.readline())
+            if not reply.get('ok'):
+                raise RuntimeError(reply.get('error'))
+            for line in lines:
+                message = json.loads(line)
+                if message.get('event') == 'telemetry':
+                    yield message
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Control a running footstep enhancer daemon")
+    parser.add_argument('command', choices=('start', 'stop', 'status', 'set', 'watch', 'shutdown'))
+    parser.add_argument('values', nargs='*', metavar='NAME=VALUE', help="Settings for `set`")
+    parser.add_argument('--socket', help="Daemon socket (default: %(default)s)", default=default_socket_path())
+    parser.add_argument('--rate', type=float, default=10.0, help="Telemetry events per second for `watch`")
+    args = parser.parse_args(argv)
+
+    if args.command == 'watch':
+        try:
+            for message in watch(args.rate, args.socket):
+                print(json.dumps(message), flush=True)
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    message = {'command': args.command}
+    for item in args.values:
+        name, _, value = item.partition('=')
+        message[name] = float(value)
+    reply = request(message, args.socket)
+    print(json.dumps(reply, indent=2))
+    return 0 if reply.get('ok') else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,153 @@
+"""
+Direction Module for Footstep Sound Enhancer
+Estimates where a detected footstep came from, from inter-channel level and time differences.
+"""
+
+import numpy as np
+
+# Largest time difference between the ears considered, about the delay around a human head (seconds)
+MAX_ITD_SECONDS = 0.0008
+
+# Below this normalized GCC-PHAT peak the time difference is not trusted
+MIN_CONFIDENCE = 0.2
+
+
+class DirectionEstimator:
+    """
+    Azimuth of a footstep from one left/right channel pair.
+
+    Both cues come from a single zero-padded FFT of the pair, restricted
+    to the footstep band:
+
+    - Level difference (ILD): the band amplitudes of the two channels,
+      mapped to an angle with the tangent panning law.
+    - Time difference (ITD): the GCC-PHAT cross-correlation peak within
+      MAX_ITD_SECONDS, mapped through sin(azimuth) = delay / MAX_ITD. The
+      correlation is only evaluated at those lags, as one small product
+      of the whitened band cross-spectrum with a precomputed lag matrix,
+      instead of an inverse FFT over every lag.
+
+    Amplitude-panned game mixes carry no time difference, so the time cue
+    only takes part when the delay is non-zero, weighted by how clear the
+    correlation peak is. In surround layouts (FL FR FC LFE BL BR ...) the
+    louder of the front and back pairs is analysed, and a footstep that is
+    louder behind is mirrored to the back half (beyond +/-90 degrees).
+
+    The azimuth is in degrees: 0 straight ahead, -90 left, +90 right,
+    +/-180 behind. All FFT buffers are allocated once per stream layout.
+    """
+
+    def __init__(self, sample_rate, channels, chunk_size, band=(200, 800)):
+        """
+        Initialize the estimator.
+
+        Args:
+            sample_rate: Sample rate in Hz
+            channels: Number of interleaved channels (at least 2)
+            chunk_size: Largest block passed to process(), in frames
+            band: Footstep band (low_hz, high_hz) the cues are computed in
+        """
+        if channels < 2:
+            raise ValueError("Direction estimation needs at least two channels")
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.chunk_size = chunk_size
+        # Pairs analysed: the front pair, and the back pair of a surround layout
+        self._pairs = (slice(0, 2), slice(4, 6)) if channels >= 6 else (slice(0, 2),)
+        columns = 2 * len(self._pairs)
+
+        # Padding to twice the block makes the correlation linear, not circular
+        self.fft_size = 1 << (2 * chunk_size - 1).bit_length()
+        bins = self.fft_size // 2 + 1
+        self._padded = np.zeros((self.fft_size, columns))
+        self._spectrum = np.zeros((bins, columns), dtype=np.complex128)
+        self._amplitudes = np.zeros((bins, columns))
+        self._power = np.zeros(columns)
+        self.max_lag = max(1, int(round(MAX_ITD_SECONDS * sample_rate)))
+        self._scores = np.zeros(2 * self.max_lag + 1, dtype=np.complex128)
+        self.set_band(*band)
+        self.reset()
+
+    def set_band(self, low_hz, high_hz):
+        """
+        Restrict the cues to a new footstep band.
+
+        The band's buffers are built first and installed with one
+        assignment, so this is safe while the audio thread is estimating.
+        A band narrower than the bin spacing of a short chunk uses the bin
+        nearest its centre.
+        """
+        frequencies = np.fft.rfftfreq(self.fft_size, 1.0 / self.sample_rate)
+        indices = np.flatnonzero((frequencies >= low_hz) & (frequencies <= high_hz))
+        if not indices.size:
+            indices = np.array([np.argmin(np.abs(frequencies - 0.5 * (low_hz + high_hz)))])
+        band = slice(int(indices[0]), int(indices[-1]) + 1)
+        # Row l evaluates the inverse real FFT of the band bins at lag l - max_lag
+        lags = np.arange(-self.max_lag, self.max_lag + 1)
+        lag_matrix = (2.0 / self.fft_size) * np.exp(2j * np.pi * np.outer(lags, indices) / self.fft_size)
+        # Correlation peak of a clean delay after PHAT weighting, used to normalize it
+        full_peak = 2.0 * indices.size / self.fft_size
+        cross = np.zeros(indices.size, dtype=np.complex128)
+        self._band_state = (band, lag_matrix, cross, np.zeros(indices.size), full_peak)
+
+    def reset(self):
+        """Forget the last estimate."""
+        self.azimuth = None
+        self.level_difference_db = 0.0
+        self.time_difference = 0.0
+        self.confidence = 0.0
+
+    def process(self, frames):
+        """
+        Estimate the azimuth of a (frames, channels) block.
+
+        Returns:
+            Azimuth in degrees, also kept in self.azimuth
+        """
+        length = min(frames.shape[0], self.chunk_size)
+        padded = self._padded
+        for i, pair in enumerate(self._pairs):
+            padded[:length, 2 * i:2 * i + 2] = frames[:length, pair]
+        padded[length:] = 0.0
+        spectrum = self._spectrum
+        np.fft.rfft(padded, axis=0, out=spectrum)
+
+        band, lag_matrix, cross, magnitude, full_peak = self._band_state
+        amplitudes = self._amplitudes[band]
+        np.abs(spectrum[band], out=amplitudes)
+        power = self._power
+        np.vecdot(amplitudes.T, amplitudes.T, out=power)
+        behind = len(self._pairs) == 2 and power[2] + power[3] > power[0] + power[1]
+        left_column, right_column = (2, 3) if behind else (0, 1)
+        left_power, right_power = power[left_column], power[right_column]
+
+        # Level cue: tangent law on the band amplitudes
+        left_amplitude, right_amplitude = np.sqrt(left_power), np.sqrt(right_power)
+        level_azimuth = 2.0 * np.degrees(np.arctan2(right_amplitude - left_amplitude,
+                                                    right_amplitude + left_amplitude))
+        level_difference_db = 10.0 * np.log10((right_power + 1e-20) / (left_power + 1e-20))
+        self.level_difference_db = float(min(60.0, max(-60.0, level_difference_db)))
+
+        # Time cue: GCC-PHAT, the whitened cross-spectrum R * conj(L). A
+        # positive lag means the right channel is late, so the source is left
+        np.conjugate(spectrum[band, left_column], out=cross)
+        cross *= spectrum[band, right_column]
+        np.abs(cross, out=magnitude)
+        magnitude += 1e-20
+        cross /= magnitude
+        np.matmul(lag_matrix, cross, out=self._scores)
+        correlation = self._scores.real
+
+        max_lag = self.max_lag
+        index = int(np.argmax(correlation))
+        lag = index - max_lag
+        self.time_difference = lag / self.sample_rate
+        self.confidence = float(min(1.0, max(0.0, correlation[index] / full_peak)))
+        time_azimuth = -np.degrees(np.arcsin(min(1.0, max(-1.0, lag / max_lag))))
+
+        weight = self.confidence if lag != 0 and self.confidence >= MIN_CONFIDENCE else 0.0
+        azimuth = weight * time_azimuth + (1.0 - weight) * level_azimuth
+        if behind:
+            azimuth = (180.0 if azimuth >= 0.0 else -180.0) - azimuth
+        self.azimuth = float(azimuth)
+        return self.azimuth
@@ -0,0 +1,393 @@
+"""
+DSP Worker Module for Footstep Sound Enhancer
+Runs the AudioProcessor in a separate process so the real-time loop never waits on the Tk GIL.
+"""
+
+import multiprocessing
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from spectrogram import SpectrogramRing
+
+# Hot parameters the GUI changes continuously, by slot in the shared parameter block
+PARAMETERS = ('enhancement_factor', 'detection_threshold')
+
+# Numeric telemetry fields carried by the shared ring, in record order
+TELEMETRY_FIELDS = (
+    'sequence', 'level', 'footstep_detected', 'footstep_count', 'enhancement', 'noise_floor',
+    'threshold', 'latency', 'xruns', 'start_latency', 'stream_bits', 'device_rate', 'sample_rate',
+    'azimuth', 'direction_count', 'target_latency', 'chunk_size',
+)
+
+# Processor statuses (on_status_change values) by code in the telemetry ring header
+STATUSES = ('Stopped', 'Running', 'Error')
+
+# Telemetry ring header: newest record sequence, status change count, status code
+_HEADER_SLOTS = 3
+
+
+class SharedParameters:
+    """
+    Float64 parameter block in shared memory.
+
+    The GUI process writes a slot and bumps the version; the worker polls
+    the version and copies changed values into its processor. Each slot is
+    one aligned 8-byte store, so a reader never sees a torn value.
+    """
+
+    def __init__(self, name=None):
+        """Create the block, or attach to the one called `name`."""
+        size = 8 * (len(PARAMETERS) + 1)
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self._values = np.ndarray(len(PARAMETERS) + 1, dtype=np.float64, buffer=self.shm.buf)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @property
+    def version(self):
+        return self._values[-1]
+
+    def set(self, parameter, value):
+        """Write one parameter (GUI process)."""
+        self._values[PARAMETERS.index(parameter)] = value
+        self._values[-1] += 1
+
+    def get(self, parameter):
+        """Read one parameter (either process)."""
+        return float(self._values[PARAMETERS.index(parameter)])
+
+    def close(self):
+        del self._values
+        self.shm.close()
+
+
+class SharedTelemetryRing:
+    """
+    Ring of telemetry records in shared memory, written by the worker only.
+
+    The writer fills the slot after the newest one and then publishes its
+    sequence number in the header, so the reader always copies a complete
+    record that is not being written. Readers get the same snapshot dicts
+    as TelemetryChannel.latest(), so the GUI code does not change.
+
+    The header also carries the worker processor's status, so a processing
+    thread that dies in the worker is noticed by the next latest() call in
+    the GUI process, which passes the new status to on_status.
+    """
+
+    def __init__(self, name=None, slots=64):
+        """Create the ring, or attach to the one called `name`."""
+        size = 8 * (_HEADER_SLOTS + slots * len(TELEMETRY_FIELDS))
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        slots = (self.shm.size // 8 - _HEADER_SLOTS) // len(TELEMETRY_FIELDS)
+        self._header = np.ndarray(_HEADER_SLOTS, dtype=np.float64, buffer=self.shm.buf)
+        self._records = np.ndarray((slots, len(TELEMETRY_FIELDS)), dtype=np.float64,
+                                   buffer=self.shm.buf, offset=8 * _HEADER_SLOTS)
+        self._scratch = np.zeros(len(TELEMETRY_FIELDS))
+        self._sequence = 0
+        self._footsteps = 0
+        self._status_changes = int(self._header[1])
+
+        # Called by latest() with the worker's new status (GUI process)
+        self.on_status = None
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def publish(self, level, footstep_detected, enhancement, **extra):
+        """Same interface as TelemetryChannel.publish (worker process)."""
+        if footstep_detected:
+            self._footsteps += 1
+        self._sequence += 1
+        record = self._records[self._sequence % len(self._records)]
+        record[0] = self._sequence
+        record[1] = level
+        record[2] = bool(footstep_detected)
+        record[3] = self._footsteps
+        record[4] = enhancement
+        record[5] = extra.get('noise_floor', 0.0)
+        record[6] = extra.get('threshold', 0.0)
+        record[7] = extra.get('latency', 0.0)
+        record[8] = extra.get('xruns', 0)
+        record[9] = extra.get('start_latency', 0.0)
+        record[10] = 32 if extra.get('stream_format') == 'float32' else 16
+        record[11] = extra.get('device_rate', 0)
+        record[12] = extra.get('sample_rate', 0)
+        azimuth = extra.get('azimuth')
+        record[13] = np.nan if azimuth is None else azimuth
+        record[14] = extra.get('direction_count', 0)
+        record[15] = extra.get('target_latency', 0.0)
+        record[16] = extra.get('chunk_size', 0)
+        self._header[0] = self._sequence
+
+    def reset(self):
+        """Publish an idle record, e.g. after processing stops."""
+        self.publish(0.0, False, 1.0)
+
+    def publish_status(self, status):
+        """Publish a status change; same signature as on_status_change (worker process)."""
+        self._header[2] = STATUSES.index(status)
+        self._header[1] += 1
+
+    @property
+    def status(self):
+        """The worker's current status."""
+        return STATUSES[int(self._header[2])]
+
+    def _check_status(self):
+        changes = int(self._header[1])
+        if changes != self._status_changes:
+            self._status_changes = changes
+            if self.on_status:
+                self.on_status(STATUSES[int(self._header[2])])
+
+    def latest(self):
+        """Return the newest record as a snapshot dict (GUI process)."""
+        self._check_status()
+        sequence = int(self._header[0])
+        if sequence == 0:
+            return {'sequence': 0, 'level': 0.0, 'footstep_detected': False,
+                    'footstep_count': 0, 'enhancement': 1.0}
+        record = self._scratch
+        np.copyto(record, self._records[sequence % len(self._records)])
+        snapshot = dict(zip(TELEMETRY_FIELDS, record.tolist()))
+        snapshot['sequence'] = int(snapshot['sequence'])
+        snapshot['footstep_detected'] = bool(snapshot['footstep_detected'])
+        snapshot['footstep_count'] = int(snapshot['footstep_count'])
+        snapshot['xruns'] = int(snapshot['xruns'])
+        snapshot['device_rate'] = int(snapshot['device_rate'])
+        snapshot['sample_rate'] = int(snapshot['sample_rate'])
+        snapshot['direction_count'] = int(snapshot['direction_count'])
+        snapshot['chunk_size'] = int(snapshot['chunk_size'])
+        if np.isnan(snapshot['azimuth']):
+            snapshot['azimuth'] = None
+        if snapshot.pop('stream_bits') and snapshot['device_rate']:
+            snapshot['stream_format'] = 'float32' if record[10] == 32 else 'int16'
+        return snapshot
+
+    def close(self):
+        del self._header, self._records
+        self.shm.close()
+
+
+class SharedSpectrogramRing(SpectrogramRing):
+    """SpectrogramRing in shared memory: the worker writes the columns, the GUI process renders them."""
+
+    def __init__(self, name=None):
+        """Create the ring, or attach to the one called `name`."""
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=SpectrogramRing.nbytes())
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        super().__init__(buffer=self.shm.buf)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def close(self):
+        super().close()
+        self.shm.close()
+
+
+def _worker_main(connection, parameters_name, telemetry_name, spectrogram_name, backend_factory, setup):
+    """
+    Worker process entry point: owns the AudioProcessor and its audio threads.
+
+    Commands arrive over `connection` as (method name, args) and are
+    answered with (ok, result); parameters are polled from shared memory
+    between commands.
+    """
+    from audio_processor import AudioProcessor
+
+    parameters = SharedParameters(parameters_name)
+    telemetry = SharedTelemetryRing(telemetry_name)
+    spectrogram_ring = SharedSpectrogramRing(spectrogram_name)
+    backend = backend_factory() if backend_factory is not None else None
+    processor = AudioProcessor(audio_backend=backend)
+    processor.telemetry = telemetry
+    processor.spectrogram_ring = spectrogram_ring
+    processor.on_status_change = telemetry.publish_status
+    if setup is not None:
+        setup(processor)
+
+    version = None
+    running = True
+    while running:
+        if parameters.version != version:
+            version = parameters.version
+            processor.set_enhancement_factor(parameters.get('enhancement_factor'))
+            processor.set_detection_threshold(parameters.get('detection_threshold'))
+
+        if not connection.poll(0.005):
+            continue
+        try:
+            method, args = connection.recv()
+        except EOFError:
+            break
+        if method == 'close':
+            running = False
+        try:
+            result = getattr(processor, method)(*args)
+            connection.send((True, result))
+        except Exception as e:
+            connection.send((False, f"{type(e).__name__}: {e}"))
+
+    processor.stop()
+    processor.spectrogram = None
+    spectrogram_ring.close()
+    telemetry.close()
+    parameters.close()
+
+
+class WorkerAudioProcessor:
+    """
+    Drop-in stand-in for AudioProcessor that runs the real one in a worker process.
+
+    The GUI keeps calling start(), stop(), set_enhancement_factor() and
+    friends and polling telemetry.latest(). The two sliders write straight
+    into shared memory, telemetry comes back through a shared ring, and
+    everything else is forwarded over a pipe. The worker is started once
+    and kept alive across stop/start, so its PortAudio session persists.
+    """
+
+    def __init__(self, backend_factory=None, setup=None):
+        """
+        Args:
+            backend_factory: Optional picklable callable returning the audio
+                backend inside the worker (default: the imported pyaudio)
+            setup: Optional picklable callable(processor) run in the worker
+                before the first command, e.g. to select a mode
+        """
+        self.parameters = SharedParameters()
+        self.telemetry = SharedTelemetryRing()
+        self.telemetry.on_status = self._worker_status
+        self.spectrogram_ring = SharedSpectrogramRing()
+        self.parameters.set('enhancement_factor', 2.0)
+        self.parameters.set('detection_threshold', 0.05)
+        self.backend_factory = backend_factory
+        self.setup = setup
+        self.is_running = False
+        self._process = None
+        self._connection = None
+
+        # Same callback attribute as AudioProcessor; level and footstep
+        # updates, and status changes made by the worker itself, are polled
+        # from the telemetry ring
+        self.on_status_change = None
+
+    def _ensure_worker(self):
+        """Spawn the worker process if it is not running."""
+        if self._process is not None and self._process.is_alive():
+            return
+        context = multiprocessing.get_context('spawn')
+        self._connection, child = context.Pipe()
+        self._process = context.Process(
+            target=_worker_main, name='footstep-dsp', daemon=True,
+            args=(child, self.parameters.name, self.telemetry.name, self.spectrogram_ring.name,
+                  self.backend_factory, self.setup))
+        self._process.start()
+        child.close()
+
+    def call(self, method, *args, timeout=10.0):
+        """
+        Call an AudioProcessor method in the worker and return its result.
+
+        Raises:
+            RuntimeError: If the worker reported an error or did not answer in time
+        """
+        self._ensure_worker()
+        self._connection.send((method, args))
+        if not self._connection.poll(timeout):
+            raise RuntimeError(f"DSP worker did not answer {method}()")
+        ok, result = self._connection.recv()
+        if not ok:
+            raise RuntimeError(result)
+        return result
+
+    def __getattr__(self, name):
+        # Forward setters and other methods (set_detection_engine, ...) to the worker
+        if name.startswith('set_') or name in ('configure_stream', 'instrumentation_snapshot',
+                                                'dump_instrumentation'):
+            return lambda *args: self.call(name, *args)
+        raise AttributeError(name)
+
+    def _worker_status(self, status):
+        """
+        Status published by the worker, seen when telemetry is polled.
+
+        start() and stop() report their own status; this only catches the
+        worker stopping on its own, e.g. when its stream fails.
+        """
+        if status != "Running" and self.is_running:
+            self.is_running = False
+            if self.on_status_change:
+                self.on_status_change(status)
+
+    def set_enhancement_factor(self, value):
+        """Update the enhancement factor through shared memory."""
+        self.parameters.set('enhancement_factor', float(value))
+
+    def set_detection_threshold(self, value):
+        """Update the detection threshold through shared memory."""
+        self.parameters.set('detection_threshold', float(value))
+
+    def start(self):
+        """Start processing in the worker."""
+        if self.is_running:
+            return False
+        try:
+            started = self.call('start')
+        except Exception as e:
+            print(f"Error starting DSP worker: {e}")
+            started = False
+        self.is_running = bool(started)
+        if self.on_status_change:
+            self.on_status_change("Running" if started else "Error")
+        if started:
+            # The stream may already have failed while start() was answered
+            self._worker_status(self.telemetry.status)
+        return self.is_running
+
+    def stop(self):
+        """Stop processing in the worker; the worker itself keeps running."""
+        if not self.is_running:
+            return False
+        self.is_running = False
+        try:
+            self.call('stop')
+        except Exception as e:
+            print(f"Error stopping DSP worker: {e}")
+        if self.on_status_change:
+            self.on_status_change("Stopped")
+        return True
+
+    def close(self):
+        """Stop the worker process and free the shared memory (application exit)."""
+        self.is_running = False
+        if self._process is not None and self._process.is_alive():
+            try:
+                self.call('close', timeout=5.0)
+            except Exception as e:
+                print(f"Error closing DSP worker: {e}")
+            self._process.join(timeout=5.0)
+            if self._process.is_alive():
+                self._process.terminate()
+        self._process = None
+        for block in (self.telemetry, self.spectrogram_ring, self.parameters):
+            shm = block.shm
+            block.close()
+            try:
+                shm.unlink()
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,546 @@
+"""
+Evaluation Module for Footstep Sound Enhancer
+Scores the footstep detectors on a labeled synthetic corpus and sweeps their parameters.
+
+Usage:
+    python evaluation.py                                      # 5 minute corpus, every detector
+    python evaluation.py --minutes 20 --snr -6 0 6 12         # longer corpus at chosen SNRs
+    python evaluation.py --detector bandpass stft --threshold 0.03
+    python evaluation.py --sweep --thresholds 0.02,0.05,0.1 --bands 200-800,100-1000 \\
+        --factors 1.5,2,3 --jobs 4 -o sweep.csv               # grid over a process pool
+    python evaluation.py --classifier footstep_model.npz      # each detector with and without the classifier
+"""
+
+import argparse
+import csv
+import itertools
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from audio_processor import AudioProcessor, PyAudioDummy
+from dsp import cached_bandpass_sos, StreamingFilter
+
+# Lengths of the synthesized events (seconds)
+FOOTSTEP_SECONDS = 0.2
+GUNSHOT_SECONDS = 0.5
+
+# Band the footstep transients are drawn from (Hz); one of the precomputed filters
+FOOTSTEP_BAND = (100.0, 1000.0)
+
+# Background levels (RMS) of the ambience noise and the music bed
+NOISE_RMS = 0.01
+MUSIC_RMS = 0.02
+
+
+def _configure_bandpass(processor):
+    """RMS gate on the band-filtered signal (AudioProcessor._detect_footstep)."""
+
+
+def _configure_adaptive(processor):
+    processor.set_adaptive_threshold(True)
+
+
+def _configure_envelope(processor):
+    processor.set_gain_envelope(True)
+
+
+def _configure_stft(processor):
+    processor.set_detection_engine('stft')
+
+
+# Detector name -> function configuring a fresh AudioProcessor for it
+DETECTORS = {
+    'bandpass': _configure_bandpass,
+    'adaptive': _configure_adaptive,
+    'envelope': _configure_envelope,
+    'stft': _configure_stft,
+}
+
+# Detectors deciding with the per-chunk RMS gate, the only ones the second-stage classifier applies to
+GATED_DETECTORS = ('adaptive', 'bandpass')
+
+
+class LabeledCorpus:
+    """
+    Synthetic game audio with the position of every footstep and gunshot.
+
+    Attributes:
+        audio: float32 (frames, channels) samples
+        sample_rate: Sample rate in Hz
+        onsets, durations: Sample index and length of each footstep
+        snr_db: Signal-to-background ratio each footstep was mixed at
+        gunshots: Sample index of each gunshot (GUNSHOT_SECONDS long)
+    """
+
+    def __init__(self, audio, sample_rate, onsets, durations, snr_db, gunshots):
+        self.audio = audio
+        self.sample_rate = sample_rate
+        self.onsets = onsets
+        self.durations = durations
+        self.snr_db = snr_db
+        self.gunshots = gunshots
+
+    @property
+    def seconds(self):
+        return len(self.audio) / self.sample_rate
+
+    def save(self, directory):
+        """Write the corpus as audio.npy (memory-mappable) and labels.npz."""
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, 'audio.npy'), self.audio)
+        np.savez(os.path.join(directory, 'labels.npz'), sample_rate=self.sample_rate, onsets=self.onsets,
+                 durations=self.durations, snr_db=self.snr_db, gunshots=self.gunshots)
+
+    @classmethod
+    def load(cls, directory):
+        """Open a saved corpus; the audio is memory-mapped, not read."""
+        audio = np.load(os.path.join(directory, 'audio.npy'), mmap_mode='r')
+        with np.load(os.path.join(directory, 'labels.npz')) as labels:
+            return cls(audio, int(labels['sample_rate']), labels['onsets'], labels['durations'],
+                       labels['snr_db'], labels['gunshots'])
+
+
+def _pan_gains(rng, count, channels):
+    """Random constant-power pan of `count` events over the front pair, as (count, channels)."""
+    gains = np.zeros((count, channels))
+    if channels == 1:
+        gains[:, 0] = 1.0
+        return gains
+    angle = rng.uniform(0.0, np.pi / 2, count)
+    gains[:, 0] = np.cos(angle)
+    gains[:, 1] = np.sin(angle)
+    return gains
+
+
+def _footsteps(rng, count, sample_rate):
+    """
+    Synthesize `count` footstep transients at once.
+
+    Each is band-limited noise shaped by a heel and a toe impact with a
+    random spacing and decay, normalized to unit RMS over its labeled
+    duration.
+
+    Returns:
+        (bursts, durations): (count, length) waveforms and labeled lengths in samples
+    """
+    length = int(FOOTSTEP_SECONDS * sample_rate)
+    sos = cached_bandpass_sos(FOOTSTEP_BAND[0], FOOTSTEP_BAND[1], int(sample_rate), 4)
+    # Every event is one filter channel, so the whole batch is filtered in one call
+    noise = StreamingFilter(sos, count).process(rng.standard_normal((length, count))).T
+
+    t = np.arange(length) / sample_rate
+    decay = rng.uniform(0.010, 0.025, (count, 1))
+    toe = rng.uniform(0.03, 0.07, (count, 1))
+    envelope = (1.0 - np.exp(-t / 0.001)) * np.exp(-t / decay)
+    envelope += 0.6 * np.where(t >= toe, np.exp(-(t - toe) / decay), 0.0)
+    bursts = noise * envelope
+
+    durations = np.minimum(((toe + 4.0 * decay) * sample_rate).astype(np.int64)[:, 0], length)
+    inside = np.arange(length) < durations[:, None]
+    rms = np.sqrt((np.square(bursts) * inside).sum(axis=1) / durations)
+    return bursts / rms[:, None], durations
+
+
+def _gunshots(rng, count, sample_rate):
+    """
+    Synthesize `count` gunshots as (count, length), at unit RMS.
+
+    A broadband crack with most of its energy in the low mids, where it
+    overlaps the footstep band, over a low thump.
+    """
+    length = int(GUNSHOT_SECONDS * sample_rate)
+    t = np.arange(length) / sample_rate
+    sos = cached_bandpass_sos(FOOTSTEP_BAND[0], FOOTSTEP_BAND[1], int(sample_rate), 4)
+    noise = rng.standard_normal((length, count))
+    body = StreamingFilter(sos, count).process(noise).T
+    crack = (0.3 * noise.T + 3.0 * body) * np.exp(-t / rng.uniform(0.03, 0.09, (count, 1)))
+    thump = np.sin(2 * np.pi * rng.uniform(40.0, 80.0, (count, 1)) * t) * np.exp(-t / 0.12)
+    shots = (crack + 2.0 * thump) * (1.0 - np.exp(-t / 0.0005))
+    return shots / np.sqrt(np.mean(np.square(shots), axis=1, keepdims=True))
+
+
+def _music(rng, frames, sample_rate, section_seconds=1.5):
+    """A music bed of three-note chords changing every section, with continuous phase."""
+    section = int(section_seconds * sample_rate)
+    sections = -(-frames // section)
+    # Notes of the A minor pentatonic scale over three octaves from 110 Hz
+    scale = 110.0 * 2.0 ** (np.array([0, 3, 5, 7, 10]) / 12.0)
+    notes = (scale[None, :] * 2.0 ** np.arange(3)[:, None]).ravel()
+    chords = notes[rng.integers(0, notes.size, (sections, 3))]
+    frequency = np.repeat(chords, section, axis=0)[:frames]
+    phase = np.cumsum(2 * np.pi * frequency / sample_rate, axis=0)
+    within = (np.arange(frames) % section) / sample_rate
+    music = np.sin(phase).sum(axis=1) * (0.3 + np.exp(-within / 0.6))
+    return music * (MUSIC_RMS / np.sqrt(np.mean(np.square(music))))
+
+
+def generate_corpus(seconds=300.0, sample_rate=44100, channels=2, snrs_db=(-6.0, 0.0, 6.0, 12.0),
+                    footsteps_per_second=2.0, gunshots_per_minute=20.0, seed=0, batch_seconds=20.0):
+    """
+    Generate a labeled corpus of footsteps over gunfire, music and noise.
+
+    The audio is built in batches of batch_seconds; within a batch every
+    event type is synthesized as one (events, samples) array and mixed in
+    with a single indexed add. Each footstep gets an SNR from snrs_db
+    relative to the broadband RMS of the noise and music bed.
+
+    Returns:
+        LabeledCorpus
+    """
+    rng = np.random.default_rng(seed)
+    frames = int(seconds * sample_rate)
+    batch = int(batch_seconds * sample_rate)
+    audio = np.zeros((frames, channels), dtype=np.float32)
+    footstep_length = int(FOOTSTEP_SECONDS * sample_rate)
+    gunshot_length = int(GUNSHOT_SECONDS * sample_rate)
+    onsets, durations, snr_db, gunshots = [], [], [], []
+
+    for start in range(0, frames, batch):
+        length = min(batch, frames - start)
+        bed = NOISE_RMS * rng.standard_normal((length, channels)) + _music(rng, length, sample_rate)[:, None]
+        background_rms = float(np.sqrt(np.mean(np.square(bed))))
+
+        # Footsteps on a jittered grid, so they never overlap each other
+        spacing = int(sample_rate / footsteps_per_second)
+        count = max(0, (length - footstep_length) // spacing)
+        if count:
+            positions = np.arange(count) * spacing + rng.integers(0, spacing - footstep_length, count)
+            bursts, lengths = _footsteps(rng, count, sample_rate)
+            levels = rng.choice(np.asarray(snrs_db, dtype=np.float64), count)
+            bursts *= (background_rms * 10.0 ** (levels / 20.0))[:, None]
+            index = positions[:, None] + np.arange(footstep_length)
+            bed[index] += bursts[:, :, None] * _pan_gains(rng, count, channels)[:, None, :]
+            onsets.append(start + positions)
+            durations.append(lengths)
+            snr_db.append(levels)
+
+        # Gunshots at random times, louder than anything else in the mix
+        shots = rng.poisson(gunshots_per_minute * length / sample_rate / 60.0)
+        if shots and length > gunshot_length:
+            positions = np.sort(rng.integers(0, length - gunshot_length, shots))
+            waves = _gunshots(rng, shots, sample_rate) * (background_rms * 10.0 ** (rng.uniform(10, 20, shots) / 20.0))[:, None]
+            index = positions[:, None] + np.arange(gunshot_length)
+            np.add.at(bed, index, waves[:, :, None] * _pan_gains(rng, shots, channels)[:, None, :])
+            gunshots.append(start + positions)
+
+        audio[start:start + length] = np.clip(bed, -1.0, 1.0)
+
+    def joined(parts, dtype):
+        return np.concatenate(parts).astype(dtype) if parts else np.zeros(0, dtype=dtype)
+
+    return LabeledCorpus(audio, sample_rate, joined(onsets, np.int64), joined(durations, np.int64),
+                         joined(snr_db, np.float64), joined(gunshots, np.int64))
+
+
+def _make_processor(corpus, detector, detection_threshold, band, enhancement_factor, chunk_size,
+                    classifier=None):
+    """Create a headless AudioProcessor configured for one evaluation run."""
+    processor = AudioProcessor(audio_backend=PyAudioDummy())
+    processor.configure_stream(sample_rate=corpus.sample_rate, channels=corpus.audio.shape[1],
+                               chunk_size=chunk_size)
+    processor.set_footstep_band(*band)
+    processor.set_detection_threshold(detection_threshold)
+    processor.set_enhancement_factor(enhancement_factor)
+    DETECTORS[detector](processor)
+    processor.set_footstep_classifier(classifier)
+    return processor
+
+
+def _overlaps(starts, ends, chunk_size, chunks, mask):
+    """For each [start, end) sample span, whether any chunk set in `mask` overlaps it."""
+    counts = np.concatenate(([0], np.cumsum(mask)))
+    first = np.clip(starts // chunk_size, 0, chunks)
+    last = np.clip((ends - 1) // chunk_size + 1, 0, chunks)
+    return counts[last] > counts[first]
+
+
+def score(corpus, decisions, chunk_size, tolerance_ms=100.0):
+    """
+    Score per-chunk decisions against the corpus labels.
+
+    A footstep counts as found if a detected chunk overlaps it (or the
+    tolerance after it); its latency is from the onset to the end of the
+    first such chunk, when the decision is available. A run of detected
+    chunks is a true detection if it overlaps any footstep the same way.
+
+    Returns:
+        dict of precision, recall, F1, latency percentiles (ms), false
+        detections (runs overlapping no footstep) in total and per minute,
+        the share of gunshots that triggered, and recall per SNR
+    """
+    chunks = len(decisions)
+    tolerance = int(tolerance_ms * corpus.sample_rate / 1000.0)
+    starts = corpus.onsets
+    ends = corpus.onsets + corpus.durations + tolerance
+
+    found = _overlaps(starts, ends, chunk_size, chunks, decisions)
+    # First detected chunk at or after each onset; only looked up for found footsteps
+    detected_chunks = np.flatnonzero(decisions)
+    first = np.searchsorted(detected_chunks, starts[found] // chunk_size)
+    first = detected_chunks[first] if len(first) else first
+    latency_ms = ((first + 1) * chunk_size - starts[found]) * 1000.0 / corpus.sample_rate
+
+    # Chunks inside any footstep window, via a difference array over chunk indices
+    labeled = np.zeros(chunks + 1, dtype=np.int64)
+    np.add.at(labeled, np.clip(starts // chunk_size, 0, chunks), 1)
+    np.add.at(labeled, np.clip((ends - 1) // chunk_size + 1, 0, chunks), -1)
+    labeled = np.cumsum(labeled[:-1]) > 0
+
+    previous = np.concatenate(([False], decisions[:-1]))
+    following = np.concatenate((decisions[1:], [False]))
+    run_starts = np.flatnonzero(decisions & ~previous)
+    run_ends = np.flatnonzero(decisions & ~following) + 1
+    runs_labeled = np.concatenate(([0], np.cumsum(labeled)))
+    true_runs = runs_labeled[run_ends] > runs_labeled[run_starts]
+
+    gunshot_length = int(GUNSHOT_SECONDS * corpus.sample_rate)
+    triggered = _overlaps(corpus.gunshots, corpus.gunshots + gunshot_length, chunk_size, chunks,
+                          decisions & ~labeled)
+
+    precision = float(true_runs.mean()) if len(true_runs) else 0.0
+    recall = float(found.mean()) if len(found) else 0.0
+    return {
+        'precision': precision,
+        'recall': recall,
+        'f1': 2 * precision * recall / (precision + recall) if precision + recall else 0.0,
+        'latency_p50_ms': float(np.percentile(latency_ms, 50)) if len(latency_ms) else float('nan'),
+        'latency_p95_ms': float(np.percentile(latency_ms, 95)) if len(latency_ms) else float('nan'),
+        'false_positives': int((~true_runs).sum()),
+        'false_positives_per_minute': float((~true_runs).sum()) / (chunks * chunk_size / corpus.sample_rate / 60.0),
+        'gunshot_triggers': float(triggered.mean()) if len(triggered) else 0.0,
+        'recall_by_snr': {float(snr): float(found[corpus.snr_db == snr].mean())
+                          for snr in np.unique(corpus.snr_db)},
+    }
+
+
+def evaluate(corpus, detector='bandpass', detection_threshold=0.05, band=(200, 800), enhancement_factor=2.0,
+             chunk_size=1024, tolerance_ms=100.0, classifier=None):
+    """
+    Run a corpus through one detector chunk by chunk and score it.
+
+    Every chunk goes through AudioProcessor.enhance_block, which is
+    _detect_footstep followed by the enhancement for the bandpass
+    detector, so the CPU time is that of the real-time chain minus I/O.
+
+    Args:
+        classifier: Optional model file (or FootstepClassifier) for the
+            second-stage classifier
+
+    Returns:
+        The score() dict plus CPU seconds per audio hour, the realtime
+        factor, the average boost (dB) of footstep and of other chunks,
+        and with a classifier the candidates it saw and rejected
+    """
+    processor = _make_processor(corpus, detector, detection_threshold, band, enhancement_factor, chunk_size,
+                                classifier)
+    audio = corpus.audio
+    chunks = len(audio) // chunk_size
+    decisions = np.zeros(chunks, dtype=bool)
+    energy_in = np.zeros(chunks)
+    energy_out = np.zeros(chunks)
+    cpu = 0.0
+
+    for i in range(chunks):
+        block = np.asarray(audio[i * chunk_size:(i + 1) * chunk_size])
+        start = time.process_time()
+        enhanced = processor.enhance_block(block)
+        cpu += time.process_time() - start
+        decisions[i] = processor.footstep_detected
+        flat = block.reshape(-1)
+        energy_in[i] = np.vdot(flat, flat)
+        energy_out[i] = energy_in[i] if enhanced is None else np.vdot(enhanced, enhanced)
+    candidates = processor.footstep_classifier
+    processor.close()
+
+    result = score(corpus, decisions, chunk_size, tolerance_ms)
+    seconds = chunks * chunk_size / corpus.sample_rate
+    labeled = _overlaps(np.arange(chunks) * chunk_size, (np.arange(chunks) + 1) * chunk_size, 1,
+                        len(audio), _footstep_mask(corpus, len(audio)))
+
+    def boost_db(mask):
+        if not mask.any():
+            return 0.0
+        return float(10.0 * np.log10(energy_out[mask].sum() / max(energy_in[mask].sum(), 1e-20)))
+
+    result.update({
+        'cpu_seconds_per_audio_hour': cpu / seconds * 3600.0,
+        'realtime_factor': seconds / cpu if cpu > 0 else float('inf'),
+        'footstep_boost_db': boost_db(labeled),
+        'other_boost_db': boost_db(~labeled),
+    })
+    if candidates is not None:
+        result.update(classifier_candidates=candidates.candidates, classifier_rejected=candidates.rejected,
+                      classifier_us_per_candidate=candidates.seconds / max(candidates.candidates, 1) * 1e6)
+    return result
+
+
+def compare_classifier(corpus, classifier, detector='bandpass', **settings):
+    """
+    Evaluate one detector without and with the second-stage classifier.
+
+    Returns:
+        (without, with_classifier) evaluate() results
+    """
+    return evaluate(corpus, detector, **settings), evaluate(corpus, detector, classifier=classifier, **settings)
+
+
+def _print_classifier_comparison(name, without, with_classifier):
+    """Report the false-positive reduction against the added CPU time."""
+    reduction = 1.0 - with_classifier['false_positives'] / max(without['false_positives'], 1)
+    cpu = with_classifier['cpu_seconds_per_audio_hour'] - without['cpu_seconds_per_audio_hour']
+    candidates = with_classifier['classifier_candidates']
+    print(f"  {name:<10} false positives {without['false_positives']:4d} -> {with_classifier['false_positives']:4d} "
+          f"({reduction * 100:.0f}% fewer, {with_classifier['false_positives_per_minute']:.2f}/min)  "
+          f"recall {without['recall']:.3f} -> {with_classifier['recall']:.3f}  "
+          f"gunshots {without['gunshot_triggers'] * 100:.0f}% -> {with_classifier['gunshot_triggers'] * 100:.0f}%")
+    print(f"  {'':<10} CPU {without['cpu_seconds_per_audio_hour']:.1f} -> "
+          f"{with_classifier['cpu_seconds_per_audio_hour']:.1f} s/audio-hour ({cpu:+.1f}); "
+          f"{candidates} candidates, {with_classifier['classifier_rejected']} rejected, "
+          f"{with_classifier['classifier_us_per_candidate']:.0f} us each")
+
+
+def _footstep_mask(corpus, frames):
+    """Per-sample mask of the labeled footstep spans."""
+    edges = np.zeros(frames + 1, dtype=np.int64)
+    np.add.at(edges, corpus.onsets, 1)
+    np.add.at(edges, np.minimum(corpus.onsets + corpus.durations, frames), -1)
+    return np.cumsum(edges[:-1]) > 0
+
+
+# Corpus opened once per sweep worker process (see _open_worker_corpus)
+_worker_corpus = None
+
+
+def _open_worker_corpus(directory):
+    """Process pool initializer: memory-map the shared corpus."""
+    global _worker_corpus
+    _worker_corpus = LabeledCorpus.load(directory)
+
+
+def _evaluate_settings(settings):
+    """Evaluate one grid point on the worker's corpus."""
+    return evaluate(_worker_corpus, **settings)
+
+
+def sweep(corpus, detectors=('bandpass',), thresholds=(0.05,), bands=((200, 800),), factors=(2.0,),
+          chunk_size=1024, jobs=None):
+    """
+    Evaluate every combination of the given parameters in a process pool.
+
+    The corpus is written once to a temporary directory and memory-mapped
+    by each worker, so it is never pickled per task.
+
+    Yields:
+        (settings, result) per grid point, in grid order
+    """
+    grid = [
+        {'detector': detector, 'detection_threshold': threshold, 'band': band,
+         'enhancement_factor': factor, 'chunk_size': chunk_size}
+        for detector, threshold, band, factor in itertools.product(detectors, thresholds, bands, factors)
+    ]
+    with tempfile.TemporaryDirectory() as directory:
+        corpus.save(directory)
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_open_worker_corpus,
+                                 initargs=(directory,)) as executor:
+            for settings, result in zip(grid, executor.map(_evaluate_settings, grid)):
+                yield settings, result
+
+
+def _float_list(value):
+    return [float(v) for v in value.split(',')]
+
+
+def _band_list(value):
+    return [tuple(float(edge) for edge in band.split('-')) for band in value.split(',')]
+
+
+def _print_result(name, result):
+    print(f"  {name:<30} P {result['precision']:.3f}  R {result['recall']:.3f}  F1 {result['f1']:.3f}  "
+          f"latency p50 {result['latency_p50_ms']:5.1f} ms p95 {result['latency_p95_ms']:5.1f} ms  "
+          f"gunshots {result['gunshot_triggers'] * 100:4.0f}%  "
+          f"CPU {result['cpu_seconds_per_audio_hour']:6.1f} s/audio-hour")
+
+
+def main(argv=None):
+    """Command-line entry point for evaluation and sweeps."""
+    parser = argparse.ArgumentParser(description="Evaluate footstep detection on a labeled synthetic corpus.")
+    parser.add_argument('--minutes', type=float, default=5.0, help="Length of the generated corpus")
+    parser.add_argument('--snr', type=float, nargs='+', default=[-6.0, 0.0, 6.0, 12.0],
+                        help="Footstep SNRs (dB) to mix at")
+    parser.add_argument('--channels', type=int, default=2)
+    parser.add_argument('--sample-rate', type=int, default=44100)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--chunk-size', type=int, default=1024, help="Frames per processing block")
+    parser.add_argument('--detector', nargs='+', choices=sorted(DETECTORS), default=sorted(DETECTORS))
+    parser.add_argument('--threshold', type=float, default=0.05, help="Footstep detection threshold")
+    parser.add_argument('--band', type=_band_list, default=[(200.0, 800.0)], help="Footstep band, e.g. 200-800")
+    parser.add_argument('--enhancement-factor', type=float, default=2.0)
+    parser.add_argument('--classifier', metavar='MODEL',
+                        help="Compare each detector without and with this second-stage classifier "
+                             "(see train_classifier.py)")
+    parser.add_argument('--sweep', action='store_true', help="Evaluate the grid of the options below")
+    parser.add_argument('--thresholds', type=_float_list, default=[0.02, 0.05, 0.1])
+    parser.add_argument('--bands', type=_band_list, default=[(200.0, 800.0), (100.0, 1000.0)])
+    parser.add_argument('--factors', type=_float_list, default=[2.0])
+    parser.add_argument('-j', '--jobs', type=int, default=None, help="Number of worker processes")
+    parser.add_argument('-o', '--output', help="Write the sweep results to this CSV file")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    corpus = generate_corpus(args.minutes * 60.0, args.sample_rate, args.channels, args.snr, seed=args.seed)
+    print(f"Corpus: {corpus.seconds / 60.0:.1f} min, {len(corpus.onsets)} footsteps, "
+          f"{len(corpus.gunshots)} gunshots ({time.perf_counter() - start:.1f} s to generate)")
+
+    if args.classifier:
+        for detector in args.detector:
+            if detector not in GATED_DETECTORS:
+                print(f"  {detector:<10} does not use the RMS gate; the classifier does not apply")
+                continue
+            without, with_classifier = compare_classifier(
+                corpus, args.classifier, detector, detection_threshold=args.threshold, band=args.band[0],
+                enhancement_factor=args.enhancement_factor, chunk_size=args.chunk_size)
+            _print_classifier_comparison(detector, without, with_classifier)
+        return 0
+
+    if not args.sweep:
+        for detector in args.detector:
+            result = evaluate(corpus, detector, args.threshold, args.band[0], args.enhancement_factor,
+                              args.chunk_size)
+            _print_result(detector, result)
+            print("    recall by SNR: " + "  ".join(f"{snr:+.0f} dB {recall:.2f}"
+                                                   for snr, recall in result['recall_by_snr'].items()))
+        return 0
+
+    rows = []
+    start = time.perf_counter()
+    for settings, result in sweep(corpus, args.detector, args.thresholds, args.bands, args.factors,
+                                  args.chunk_size, args.jobs):
+        low, high = settings['band']
+        name = (f"{settings['detector']} t={settings['detection_threshold']:g} "
+                f"{low:g}-{high:g} Hz x{settings['enhancement_factor']:g}")
+        _print_result(name, result)
+        row = {key: value for key, value in settings.items() if key != 'band'}
+        row.update(band_low=low, band_high=high)
+        row.update({key: value for key, value in result.items() if key != 'recall_by_snr'})
+        row.update({f"recall_{snr:+g}dB": recall for snr, recall in result['recall_by_snr'].items()})
+        rows.append(row)
+    print(f"{len(rows)} settings in {time.perf_counter() - start:.1f} s")
+
+    best = max(rows, key=lambda row: row['f1'])
+    print(f"Best F1 {best['f1']:.3f}: {best['detector']} threshold {best['detection_threshold']:g}, "
+          f"band {best['band_low']:g}-{best['band_high']:g} Hz, factor {best['enhancement_factor']:g}")
+    if args.output:
+        with open(args.output, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,273 @@
+"""
+Filter Table for Footstep Sound Enhancer
+Precomputed Butterworth bandpass sections, so start-up never has to import scipy.
+
+Generated by generate_filter_table.py; do not edit.
+"""
+
+import numpy as np
+
+
+def lookup(low_hz, high_hz, sample_rate, order):
+    """Return the SOS array for a standard band, or None if it is not in the table."""
+    sections = SOS.get((low_hz, high_hz, sample_rate, order))
+    if sections is None:
+        return None
+    return np.array(sections, dtype=np.float64)
+
+
+# (low_hz, high_hz, sample_rate, order) -> sections of signal.butter(..., output='sos')
+SOS = {
+    (200, 800, 16000, 2): (
+        (0.011857682643241151, 0.023715365286482302, 0.011857682643241151, 1.0, -1.7098448175052656, 0.7775791356702043),
+        (1.0, -2.0, 1.0, 1.0, -1.9139742739106276, 0.921621788226715),
+    ),
+    (200, 800, 16000, 4): (
+        (0.00014412022407538327, 0.00028824044815076654, 0.00014412022407538327, 1.0, -1.6981956648357865, 0.7432815143014618),
+        (1.0, 2.0, 1.0, 1.0, -1.856999389662055, 0.8680103068612345),
+        (1.0, -2.0, 1.0, 1.0, -1.7821063867954245, 0.8683238568933948),
+        (1.0, -2.0, 1.0, 1.0, -1.9563272077420515, 0.9627529659358883),
+    ),
+    (200, 800, 16000, 6): (
+        (1.7414702403301993e-06, 3.4829404806603986e-06, 1.7414702403301993e-06, 1.0, -1.711250408500044, 0.748296902665971),
+        (1.0, 2.0, 1.0, 1.0, -1.7098448175052656, 0.7775791356702043),
+        (1.0, 2.0, 1.0, 1.0, -1.831290247169579, 0.8445832828787323),
+        (1.0, -2.0, 1.0, 1.0, -1.8174475548359998, 0.9084688376579251),
+        (1.0, -2.0, 1.0, 1.0, -1.9139742739106276, 0.921621788226715),
+        (1.0, -2.0, 1.0, 1.0, -1.9690642503260831, 0.9753168478475628),
+    ),
+    (200, 800, 22050, 2): (
+        (0.006507137401046261, 0.013014274802092522, 0.006507137401046261, 1.0, -1.7962311178439996, 0.8330542604130018),
+        (1.0, -2.0, 1.0, 1.0, -1.938513688534371, 0.9425862552647569),
+    ),
+    (200, 800, 22050, 4): (
+        (4.311769406379737e-05, 8.623538812759474e-05, 4.311769406379737e-05, 1.0, -1.7823601052255638, 0.8069306715866127),
+        (1.0, 2.0, 1.0, 1.0, -1.8558479381122854, 0.9022160529011393),
+        (1.0, -2.0, 1.0, 1.0, -1.8966807957558356, 0.9025896979763339),
+        (1.0, -2.0, 1.0, 1.0, -1.969470713524873, 0.9728725409640014),
+    ),
+    (200, 800, 22050, 6): (
+        (2.8447757653552436e-07, 5.689551530710487e-07, 2.8447757653552436e-07, 1.0, -1.790863823667011, 0.8110275871350767),
+        (1.0, 2.0, 1.0, 1.0, -1.7962311178439996, 0.8330542604130018),
+        (1.0, 2.0, 1.0, 1.0, -1.877781106598045, 0.8849371643450783),
+        (1.0, -2.0, 1.0, 1.0, -1.8836758298676095, 0.932376123003453),
+        (1.0, -2.0, 1.0, 1.0, -1.938513688534371, 0.9425862552647569),
+        (1.0, -2.0, 1.0, 1.0, -1.9787500826323954, 0.9820543807197942),
+    ),
+    (200, 800, 32000, 2): (
+        (0.003199828966843965, 0.00639965793368793, 0.003199828966843965, 1.0, -1.8637387928660014, 0.8816996711567416),
+        (1.0, -2.0, 1.0, 1.0, -1.958162061356789, 0.9601137467607542),
+    ),
+    (200, 800, 32000, 4): (
+        (1.0368619267843886e-05, 2.0737238535687772e-05, 1.0368619267843886e-05, 1.0, -1.8508354952810286, 0.862852783843977),
+        (1.0, 2.0, 1.0, 1.0, -1.9089866235237414, 0.9313819560793553),
+        (1.0, -2.0, 1.0, 1.0, -1.9290504661047978, 0.9319003879212848),
+        (1.0, -2.0, 1.0, 1.0, -1.979621623462702, 0.9812439759286756),
+    ),
+    (200, 800, 32000, 6): (
+        (3.3497245506427725e-08, 6.699449101285545e-08, 3.3497245506427725e-08, 1.0, -1.856079385729424, 0.8659315524031264),
+        (1.0, 2.0, 1.0, 1.0, -1.8637387928660014, 0.8816996711567416),
+        (1.0, 2.0, 1.0, 1.0, -1.9158797995245729, 0.9193405950132963),
+        (1.0, -2.0, 1.0, 1.0, -1.9293427247479564, 0.9527588708905907),
+        (1.0, -2.0, 1.0, 1.0, -1.958162061356789, 0.9601137467607542),
+        (1.0, -2.0, 1.0, 1.0, -1.9860366594307954, 0.9876102091198652),
+    ),
+    (200, 800, 44100, 2): (
+        (0.0017218748752441078, 0.0034437497504882157, 0.0017218748752441078, 1.0, -1.9030631198693524, 0.9126787135121979),
+        (1.0, -2.0, 1.0, 1.0, -1.9698748993288004, 0.9709083038928137),
+    ),
+    (200, 800, 44100, 4): (
+        (2.992153491159023e-06, 5.984306982318046e-06, 2.992153491159023e-06, 1.0, -1.8921302553475075, 0.8985767493553838),
+        (1.0, 2.0, 1.0, 1.0, -1.9377600828070694, 0.9496730894989376),
+        (1.0, -2.0, 1.0, 1.0, -1.948621523439438, 0.950136506813844),
+        (1.0, -2.0, 1.0, 1.0, -1.9855034722073963, 0.9863599592713993),
+    ),
+    (200, 800, 44100, 6): (
+        (5.18815961731794e-09, 1.037631923463588e-08, 5.18815961731794e-09, 1.0, -1.8956400240647828, 0.9009220172708103),
+        (1.0, 2.0, 1.0, 1.0, -1.9030631198693524, 0.9126787135121979),
+        (1.0, 2.0, 1.0, 1.0, -1.938996204432368, 0.9408390583025891),
+        (1.0, -2.0, 1.0, 1.0, -1.9530296726929524, 0.9654502211130273),
+        (1.0, -2.0, 1.0, 1.0, -1.9698748993288004, 0.9709083038928137),
+        (1.0, -2.0, 1.0, 1.0, -1.9901676349550927, 0.990997623323487),
+    ),
+    (200, 800, 48000, 2): (
+        (0.001460316305527734, 0.002920632611055468, 0.001460316305527734, 1.0, -1.9113319361759016, 0.9194777610443979),
+        (1.0, -2.0, 1.0, 1.0, -1.9723686172466026, 0.9732419668314588),
+    ),
+    (200, 800, 48000, 4): (
+        (2.15056873728801e-06, 4.30113747457602e-06, 2.15056873728801e-06, 1.0, -1.900968573046465, 0.9064322445782939),
+        (1.0, 2.0, 1.0, 1.0, -1.943579632456509, 0.9536573669275572),
+        (1.0, -2.0, 1.0, 1.0, -1.9528162428273361, 0.9540976768424779),
+        (1.0, -2.0, 1.0, 1.0, -1.98673867006111, 0.9874620427225849),
+    ),
+    (200, 800, 48000, 6): (
+        (3.160701390262687e-09, 6.321402780525374e-09, 3.160701390262687e-09, 1.0, -1.9041325779216847, 0.9086087433684632),
+        (1.0, 2.0, 1.0, 1.0, -1.9113319361759016, 0.9194777610443979),
+        (1.0, 2.0, 1.0, 1.0, -1.94395916732913, 0.9455185075558346),
+        (1.0, -2.0, 1.0, 1.0, -1.9577047521840012, 0.9682052834502511),
+        (1.0, -2.0, 1.0, 1.0, -1.9723686172466026, 0.9732419668314588),
+        (1.0, -2.0, 1.0, 1.0, -1.991025699879884, 0.9917265590374973),
+    ),
+    (200, 800, 88200, 2): (
+        (0.0004432730224945143, 0.0008865460449890286, 0.0004432730224945143, 1.0, -1.9528791313750269, 0.9553372752198567),
+        (1.0, -2.0, 1.0, 1.0, -1.9850915248103669, 0.985351795495483),
+    ),
+    (200, 800, 88200, 4): (
+        (1.973962232268216e-07, 3.947924464536432e-07, 1.973962232268216e-07, 1.0, -1.9463171080327408, 0.9479701665492536),
+        (1.0, 2.0, 1.0, 1.0, -1.9714708470717088, 0.974489018963133),
+        (1.0, -2.0, 1.0, 1.0, -1.9743773104226725, 0.9747608913764109),
+        (1.0, -2.0, 1.0, 1.0, -1.9929438240941109, 0.9931586922723843),
+    ),
+    (200, 800, 88200, 6): (
+        (8.780670304849794e-11, 1.7561340609699589e-10, 8.780670304849794e-11, 1.0, -1.9478616557162347, 0.9492151165646451),
+        (1.0, 2.0, 1.0, 1.0, -1.9528791313750269, 0.9553372752198567),
+        (1.0, 2.0, 1.0, 1.0, -1.9695173703883626, 0.9699850512305064),
+        (1.0, -2.0, 1.0, 1.0, -1.9794201968684557, 0.9825546975605213),
+        (1.0, -2.0, 1.0, 1.0, -1.9850915248103669, 0.985351795495483),
+        (1.0, -2.0, 1.0, 1.0, -1.9952820439518957, 0.9954900209076425),
+    ),
+    (200, 800, 96000, 2): (
+        (0.00037506961629696616, 0.0007501392325939323, 0.00037506961629696616, 1.0, -1.956811487077383, 0.95889020807183),
+        (1.0, -2.0, 1.0, 1.0, -1.9863143229828515, 0.9865341498631918),
+    ),
+    (200, 800, 96000, 4): (
+        (1.412726536246812e-07, 2.825453072493624e-07, 1.412726536246812e-07, 1.0, -1.9506981057068367, 0.9520963889687866),
+        (1.0, 2.0, 1.0, 1.0, -1.9739858100169438, 0.9765361834101496),
+        (1.0, -2.0, 1.0, 1.0, -1.9764640046089184, 0.9767881205836018),
+        (1.0, -2.0, 1.0, 1.0, -1.99353147737166, 0.9937128989613124),
+    ),
+    (200, 800, 96000, 6): (
+        (5.315748131089108e-11, 1.0631496262178215e-10, 5.315748131089108e-11, 1.0, -1.952100722903067, 0.9532455179040074),
+        (1.0, 2.0, 1.0, 1.0, -1.956811487077383, 0.95889020807183),
+        (1.0, 2.0, 1.0, 1.0, -1.971995304333724, 0.9723905586413997),
+        (1.0, -2.0, 1.0, 1.0, -1.9813119945360014, 0.9839598094531252),
+        (1.0, -2.0, 1.0, 1.0, -1.9863143229828515, 0.9865341498631918),
+        (1.0, -2.0, 1.0, 1.0, -1.9956801760844411, 0.9958557624461641),
+    ),
+    (100, 1000, 16000, 2): (
+        (0.024827907338755246, 0.04965581467751049, 0.024827907338755246, 1.0, -1.533513665752732, 0.6397616492175577),
+        (1.0, -2.0, 1.0, 1.0, -1.9466392130366441, 0.9484142011959444),
+    ),
+    (100, 1000, 16000, 4): (
+        (0.0006390282088877586, 0.0012780564177755172, 0.0006390282088877586, 1.0, -1.4765539405623134, 0.5598052385040952),
+        (1.0, 2.0, 1.0, 1.0, -1.655319567155438, 0.7859394650222887),
+        (1.0, -2.0, 1.0, 1.0, -1.9185676790251471, 0.9207041942086085),
+        (1.0, -2.0, 1.0, 1.0, -1.9731411623179922, 0.9747281215652033),
+    ),
+    (100, 1000, 16000, 6): (
+        (1.6310149419831588e-05, 3.2620298839663176e-05, 1.6310149419831588e-05, 1.0, -1.4697481439945852, 0.5468638952045245),
+        (1.0, 2.0, 1.0, 1.0, -1.533513665752732, 0.6397616492175577),
+        (1.0, 2.0, 1.0, 1.0, -1.7115145528682127, 0.8498522516735983),
+        (1.0, -2.0, 1.0, 1.0, -1.909987686221535, 0.912269032468562),
+        (1.0, -2.0, 1.0, 1.0, -1.9466392130366441, 0.9484142011959444),
+        (1.0, -2.0, 1.0, 1.0, -1.9816333161504531, 0.9831906978235976),
+    ),
+    (100, 1000, 22050, 2): (
+        (0.0138656189197456, 0.0277312378394912, 0.0138656189197456, 1.0, -1.6641439506951214, 0.7230805366613551),
+        (1.0, -2.0, 1.0, 1.0, -1.9613764179118631, 0.962318488390318),
+    ),
+    (100, 1000, 22050, 4): (
+        (0.00019746986838810597, 0.00039493973677621195, 0.00019746986838810597, 1.0, -1.6121018796228561, 0.658633625111081),
+        (1.0, 2.0, 1.0, 1.0, -1.7672858897287413, 0.8384529176917871),
+        (1.0, -2.0, 1.0, 1.0, -1.9406443255527501, 0.9417843882345589),
+        (1.0, -2.0, 1.0, 1.0, -1.9807772063941036, 0.9816158977213821),
+    ),
+    (100, 1000, 22050, 6): (
+        (2.794621502794878e-06, 5.589243005589756e-06, 2.794621502794878e-06, 1.0, -1.6051195285129711, 0.6482383352643973),
+        (1.0, 2.0, 1.0, 1.0, -1.6641439506951214, 0.7230805366613551),
+        (1.0, 2.0, 1.0, 1.0, -1.8128769017390551, 0.8876280928547929),
+        (1.0, -2.0, 1.0, 1.0, -1.9342553776346563, 0.9354751393114714),
+        (1.0, -2.0, 1.0, 1.0, -1.9613764179118631, 0.962318488390318),
+        (1.0, -2.0, 1.0, 1.0, -1.9869652071473753, 0.9877872266467091),
+    ),
+    (100, 1000, 32000, 2): (
+        (0.006925793172452106, 0.013851586344904212, 0.006925793172452106, 1.0, -1.7704843631935339, 0.7997563419186986),
+        (1.0, -2.0, 1.0, 1.0, -1.9734389194532516, 0.9738890857514404),
+    ),
+    (100, 1000, 32000, 4): (
+        (4.8873287547015954e-05, 9.774657509403191e-05, 4.8873287547015954e-05, 1.0, -1.727670442395848, 0.7509696392756687),
+        (1.0, 2.0, 1.0, 1.0, -1.850417009158114, 0.8851714928160608),
+        (1.0, -2.0, 1.0, 1.0, -1.9589545149415866, 0.9595015408201356),
+        (1.0, -2.0, 1.0, 1.0, -1.986903575524361, 0.9873029892378817),
+    ),
+    (100, 1000, 32000, 6): (
+        (3.4335270911123596e-07, 6.867054182224719e-07, 3.4335270911123596e-07, 1.0, -1.7214785021581318, 0.7430859247600955),
+        (1.0, 2.0, 1.0, 1.0, -1.7704843631935339, 0.7997563419186986),
+        (1.0, 2.0, 1.0, 1.0, -1.8844847886647165, 0.9207195970634066),
+        (1.0, -2.0, 1.0, 1.0, -1.9544648660749127, 0.9550509947939728),
+        (1.0, -2.0, 1.0, 1.0, -1.9734389194532516, 0.9738890857514404),
+        (1.0, -2.0, 1.0, 1.0, -1.9911826467570843, 0.99157372180423),
+    ),
+    (100, 1000, 44100, 2): (
+        (0.003764588430799515, 0.00752917686159903, 0.003764588430799515, 1.0, -1.8344621884093322, 0.850317682793793),
+        (1.0, -2.0, 1.0, 1.0, -1.9807494588633763, 0.9809873883517989),
+    ),
+    (100, 1000, 44100, 4): (
+        (1.4367403517116928e-05, 2.8734807034233857e-05, 1.4367403517116928e-05, 1.0, -1.8000059322097028, 0.8127003459932541),
+        (1.0, 2.0, 1.0, 1.0, -1.8965230075386303, 0.9151372442297776),
+        (1.0, -2.0, 1.0, 1.0, -1.9701537703155365, 0.9704435800376368),
+        (1.0, -2.0, 1.0, 1.0, -1.990562199495645, 0.9907728820465548),
+    ),
+    (100, 1000, 44100, 6): (
+        (5.465381639036754e-08, 1.0930763278073509e-07, 5.465381639036754e-08, 1.0, -1.7948194128965378, 0.8066005538813122),
+        (1.0, 2.0, 1.0, 1.0, -1.8344621884093322, 0.850317682793793),
+        (1.0, 2.0, 1.0, 1.0, -1.9223750822381604, 0.9416895021071323),
+        (1.0, -2.0, 1.0, 1.0, -1.9668592176433684, 0.9671699989453244),
+        (1.0, -2.0, 1.0, 1.0, -1.9807494588633763, 0.9809873883517989),
+        (1.0, -2.0, 1.0, 1.0, -1.993674043415415, 0.9938802014183583),
+    ),
+    (100, 1000, 48000, 2): (
+        (0.0031998289668439673, 0.006399657933687935, 0.0031998289668439673, 1.0, -1.8481268138563265, 0.8615934806652715),
+        (1.0, -2.0, 1.0, 1.0, -1.9823180118988983, 0.9825190113304737),
+    ),
+    (100, 1000, 48000, 4): (
+        (1.0368619267843884e-05, 2.073723853568777e-05, 1.0368619267843884e-05, 1.0, -1.8157694551908232, 0.8265659311334543),
+        (1.0, 2.0, 1.0, 1.0, -1.9059594924583851, 0.9217294219051297),
+        (1.0, -2.0, 1.0, 1.0, -1.9725665522013636, 0.972811500808563),
+        (1.0, -2.0, 1.0, 1.0, -1.9913418523948785, 0.9915197583717791),
+    ),
+    (100, 1000, 48000, 6): (
+        (3.3497245506427745e-08, 6.699449101285549e-08, 3.3497245506427745e-08, 1.0, -1.810858922036588, 0.8208804712353526),
+        (1.0, 2.0, 1.0, 1.0, -1.8481268138563265, 0.8615934806652715),
+        (1.0, 2.0, 1.0, 1.0, -1.9299301031965717, 0.9462759701923199),
+        (1.0, -2.0, 1.0, 1.0, -1.9695325886830755, 0.9697953070183758),
+        (1.0, -2.0, 1.0, 1.0, -1.9823180118988983, 0.9825190113304737),
+        (1.0, -2.0, 1.0, 1.0, -1.9942022265119272, 0.9943762891176716),
+    ),
+    (100, 1000, 88200, 2): (
+        (0.000982779312236613, 0.001965558624473226, 0.000982779312236613, 1.0, -1.9180052713934916, 0.9221251196595528),
+        (1.0, -2.0, 1.0, 1.0, -1.9903894419815948, 0.9904492191842584),
+    ),
+    (100, 1000, 88200, 4): (
+        (9.72529131414756e-07, 1.945058262829512e-06, 9.72529131414756e-07, 1.0, -1.8983278339648861, 0.9016558935462665),
+        (1.0, 2.0, 1.0, 1.0, -1.9517994435060242, 0.9565587868160873),
+        (1.0, -2.0, 1.0, 1.0, -1.9850363838487446, 0.9851094125137323),
+        (1.0, -2.0, 1.0, 1.0, -1.9953239037901789, 0.9953766987833695),
+    ),
+    (100, 1000, 88200, 6): (
+        (9.607992182857985e-10, 1.921598436571597e-09, 9.607992182857985e-10, 1.0, -1.8952191353638428, 0.8983116516891684),
+        (1.0, 2.0, 1.0, 1.0, -1.9180052713934916, 0.9221251196595528),
+        (1.0, 2.0, 1.0, 1.0, -1.9654432019202943, 0.970348884531959),
+        (1.0, -2.0, 1.0, 1.0, -1.9833658631794686, 0.9834442547356789),
+        (1.0, -2.0, 1.0, 1.0, -1.9903894419815948, 0.9904492191842584),
+        (1.0, -2.0, 1.0, 1.0, -1.9968844541073913, 0.9969360740488897),
+    ),
+    (100, 1000, 96000, 2): (
+        (0.0008325380595262238, 0.0016650761190524475, 0.0008325380595262238, 1.0, -1.924730726325692, 0.9282194168369194),
+        (1.0, -2.0, 1.0, 1.0, -1.9911713803514937, 0.99122185843843),
+    ),
+    (100, 1000, 96000, 4): (
+        (6.975201682593644e-07, 1.3950403365187289e-06, 6.975201682593644e-07, 1.0, -1.9064589986892615, 0.9092794240031928),
+        (1.0, 2.0, 1.0, 1.0, -1.955988817731231, 0.9600135060306031),
+        (1.0, -2.0, 1.0, 1.0, -1.9862491962588225, 0.9863108788010717),
+        (1.0, -2.0, 1.0, 1.0, -1.9957070153927807, 0.9957515882135631),
+    ),
+    (100, 1000, 96000, 6): (
+        (5.835132210679334e-10, 1.167026442135867e-09, 5.835132210679334e-10, 1.0, -1.9035615307776645, 0.9061826512260717),
+        (1.0, 2.0, 1.0, 1.0, -1.924730726325692, 0.9282194168369194),
+        (1.0, 2.0, 1.0, 1.0, -1.96857595451897, 0.972722091556172),
+        (1.0, -2.0, 1.0, 1.0, -1.9847127201330004, 0.9847789374423094),
+        (1.0, -2.0, 1.0, 1.0, -1.9911713803514937, 0.99122185843843),
+        (1.0, -2.0, 1.0, 1.0, -1.9971411212434436, 0.9971846992052184),
+    ),
+}
@@ -0,0 +1,331 @@
+"""
+Flight Recorder Module for Footstep Sound Enhancer
+Keeps the last minutes of raw input and per-chunk decisions in a memory-mapped ring file, and replays them.
+
+Usage:
+    python flight_recorder.py session.fsr --info                  # what was recorded
+    python flight_recorder.py session.fsr                         # replay with the recorded settings
+    python flight_recorder.py session.fsr --engine stft -o diff.csv  # diff a detector change
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+
+import numpy as np
+
+MAGIC = b'FSFLTREC'
+VERSION = 1
+HEADER_SIZE = 4096
+
+# Header fields after the magic, as int64: version, slots, chunks written, metadata length
+_HEADER_FIELDS = 4
+
+# Per-chunk decision record, as float64
+RECORD_FIELDS = ('sequence', 'time', 'rms', 'is_footstep', 'gain', 'threshold',
+                 'enhancement_factor', 'detection_threshold')
+
+
+class FlightRecorder:
+    """
+    Fixed-size ring of input chunks and decisions in a memory-mapped file.
+
+    The file is created at full size up front, so disk usage is bounded by
+    `slots` chunks. For each chunk the audio thread copies the raw input
+    buffer into the next slot (begin) and, after processing, stores eight
+    numbers and bumps the chunk counter in the header (commit). Nothing is
+    allocated and nothing is flushed on the audio thread; the OS writes the
+    pages back, so the ring survives a crash of the application.
+    """
+
+    def __init__(self, path, slots, chunk_samples, dtype, metadata):
+        """
+        Create (or truncate) the ring file.
+
+        Args:
+            path: Ring file to write
+            slots: Number of chunks kept
+            chunk_samples: Samples per chunk (device frames x channels)
+            dtype: Sample type of the stream buffers
+            metadata: JSON-serializable stream layout and settings (see
+                AudioProcessor._recorder_metadata)
+        """
+        self.path = path
+        self.slots = int(slots)
+        self.dtype = np.dtype(dtype)
+        self.chunk_samples = int(chunk_samples)
+        self.metadata = dict(metadata, dtype=self.dtype.str, chunk_samples=self.chunk_samples)
+
+        encoded = json.dumps(self.metadata).encode('utf-8')
+        if 8 * (1 + _HEADER_FIELDS) + len(encoded) > HEADER_SIZE:
+            raise ValueError("Flight recorder metadata does not fit in the header")
+        records_size = self.slots * len(RECORD_FIELDS) * 8
+        samples_size = self.slots * self.chunk_samples * self.dtype.itemsize
+        size = HEADER_SIZE + records_size + samples_size
+
+        # Write the whole file now, so the audio thread never extends it
+        with open(path, 'wb') as f:
+            zeros = bytes(1 << 20)
+            remaining = size
+            while remaining > 0:
+                f.write(zeros[:min(remaining, len(zeros))])
+                remaining -= len(zeros)
+
+        self._map = np.memmap(path, dtype=np.uint8, mode='r+', shape=(size,))
+        self._map[:8] = np.frombuffer(MAGIC, dtype=np.uint8)
+        start = 8 * (1 + _HEADER_FIELDS)
+        self._map[start:start + len(encoded)] = np.frombuffer(encoded, dtype=np.uint8)
+
+        # Plain ndarray views of the map: indexing a memmap subclass costs
+        # a Python-level __array_finalize__ per slot on the audio thread
+        self._header = np.ndarray(_HEADER_FIELDS, dtype=np.int64, buffer=self._map, offset=8)
+        self._header[:] = (VERSION, self.slots, 0, len(encoded))
+        self._records = np.ndarray((self.slots, len(RECORD_FIELDS)), dtype=np.float64,
+                                   buffer=self._map, offset=HEADER_SIZE)
+        self._samples = np.ndarray((self.slots, self.chunk_samples), dtype=self.dtype,
+                                   buffer=self._map, offset=HEADER_SIZE + records_size)
+        self._written = 0
+        self._slot = 0
+        self._started = None
+
+    def matches(self, path, chunk_samples, dtype, metadata):
+        """Whether a recording with these parameters can continue in this ring."""
+        return (path == self.path and int(chunk_samples) == self.chunk_samples
+                and np.dtype(dtype) == self.dtype
+                and dict(metadata, dtype=self.dtype.str, chunk_samples=self.chunk_samples) == self.metadata)
+
+    def begin(self, in_data, now):
+        """Copy one raw input buffer into the next slot (audio thread)."""
+        if self._started is None:
+            self._started = now
+        self._slot = self._written % self.slots
+        samples = np.frombuffer(in_data, dtype=self.dtype)
+        if samples.size == self.chunk_samples:
+            np.copyto(self._samples[self._slot], samples)
+            return True
+        return False
+
+    def commit(self, now, rms, is_footstep, gain, threshold, enhancement_factor, detection_threshold):
+        """Store the decisions for the chunk passed to begin() and publish it (audio thread)."""
+        record = self._records[self._slot]
+        self._written += 1
+        record[0] = self._written
+        record[1] = now - self._started
+        record[2] = rms
+        record[3] = is_footstep
+        record[4] = gain
+        record[5] = threshold
+        record[6] = enhancement_factor
+        record[7] = detection_threshold
+        self._header[2] = self._written
+
+    def close(self):
+        """Flush the ring to disk and unmap it."""
+        self._map.flush()
+        del self._header, self._records, self._samples, self._map
+
+
+class FlightRecording:
+    """Read-only view of a ring file written by FlightRecorder."""
+
+    def __init__(self, path):
+        self.path = path
+        self._map = np.memmap(path, dtype=np.uint8, mode='r')
+        if bytes(self._map[:8]) != MAGIC:
+            raise ValueError(f"{path} is not a flight recorder file")
+        version, self.slots, self.written, length = self._map[8:8 * (1 + _HEADER_FIELDS)].view(np.int64)
+        if version != VERSION:
+            raise ValueError(f"{path}: unsupported flight recorder version {version}")
+        start = 8 * (1 + _HEADER_FIELDS)
+        self.metadata = json.loads(bytes(self._map[start:start + length]).decode('utf-8'))
+
+        records_size = self.slots * len(RECORD_FIELDS) * 8
+        self.dtype = np.dtype(self.metadata['dtype'])
+        self._records = self._map[HEADER_SIZE:HEADER_SIZE + records_size].view(np.float64).reshape(
+            self.slots, len(RECORD_FIELDS))
+        self._samples = self._map[HEADER_SIZE + records_size:].view(self.dtype).reshape(
+            self.slots, self.metadata['chunk_samples'])
+
+    def __len__(self):
+        return min(int(self.written), int(self.slots))
+
+    def chunks(self):
+        """
+        Yield (record dict, raw samples) from the oldest chunk to the newest.
+
+        The newest slot may hold a chunk whose commit did not happen; it is
+        skipped by only reading up to the published chunk counter.
+        """
+        first = int(self.written) - len(self)
+        for sequence in range(first, int(self.written)):
+            slot = sequence % self.slots
+            record = dict(zip(RECORD_FIELDS, self._records[slot].tolist()))
+            record['sequence'] = int(record['sequence'])
+            record['is_footstep'] = bool(record['is_footstep'])
+            yield record, self._samples[slot]
+
+    def duration(self):
+        """Seconds of audio held by the ring."""
+        metadata = self.metadata
+        return len(self) * metadata['device_chunk_size'] / metadata['device_rate']
+
+
+def slots_for(seconds, device_rate, device_chunk_size):
+    """Number of ring slots holding at least `seconds` of audio."""
+    return max(1, int(math.ceil(seconds * device_rate / device_chunk_size)))
+
+
+def make_replay_processor(metadata, setup=None):
+    """
+    Create a headless AudioProcessor configured like the recorded one.
+
+    Args:
+        metadata: FlightRecording.metadata
+        setup: Optional callable(processor) applying the settings under test
+    """
+    from audio_processor import AudioProcessor, PyAudioDummy
+    from classifier import FootstepClassifier
+
+    audio_format = PyAudioDummy.paFloat32 if metadata['stream_format'] == 'float32' else PyAudioDummy.paInt16
+    backend = PyAudioDummy(native_rate=metadata['device_rate'], formats=(audio_format,))
+    processor = AudioProcessor(audio_backend=backend)
+    processor.follow_device_rate = metadata['sample_rate'] == metadata['device_rate']
+    processor.configure_stream(sample_rate=metadata['sample_rate'], channels=metadata['channels'],
+                               chunk_size=metadata['chunk_size'])
+    processor.filter_order = metadata['filter_order']
+    processor.set_footstep_band(*metadata['band'])
+    processor.set_detection_engine(metadata['detection_engine'])
+    if metadata['gain_envelope'] is not None:
+        processor.set_gain_envelope(True, *metadata['gain_envelope'])
+    if metadata['adaptive_threshold'] is not None:
+        processor.set_adaptive_threshold(True, *metadata['adaptive_threshold'])
+    processor.set_preallocated_mode(metadata['preallocated'])
+    processor.set_soft_clip_table(metadata['soft_clip_table'])
+    processor.set_per_channel_detection(metadata.get('per_channel_detection', False))
+    processor.set_channel_enhancement(metadata.get('channel_enhancement'))
+    if metadata.get('footstep_classifier') is not None:
+        processor.set_footstep_classifier(FootstepClassifier(**metadata['footstep_classifier']))
+    if setup is not None:
+        setup(processor)
+
+    processor._negotiate_stream()
+    processor._reset_stream_state()
+    if processor.device_chunk_size * processor.channels != metadata['chunk_samples']:
+        raise ValueError("The replay stream layout does not match the recording")
+    return processor
+
+
+def replay(path, setup=None, threshold=None, warmup=10):
+    """
+    Feed a recording back through an AudioProcessor and diff the decisions.
+
+    The recorded enhancement factor and detection threshold are applied
+    chunk by chunk, so slider moves during the recording replay as they
+    happened; `threshold` overrides the recorded threshold instead. A ring
+    that has wrapped starts mid-session with a cold filter and noise-floor
+    state, so the first `warmup` chunks are replayed but not compared.
+
+    Returns:
+        (summary dict, list of per-chunk comparison dicts)
+    """
+    recording = FlightRecording(path)
+    processor = make_replay_processor(recording.metadata, setup)
+    wrapped = recording.written > recording.slots
+    skip = warmup if wrapped else 0
+
+    rows = []
+    for index, (record, samples) in enumerate(recording.chunks()):
+        processor.set_enhancement_factor(record['enhancement_factor'])
+        processor.set_detection_threshold(record['detection_threshold'] if threshold is None else threshold)
+        processor._process_stream_buffer(np.array(samples))
+        if index < skip:
+            continue
+        rows.append({
+            'sequence': record['sequence'],
+            'time': record['time'],
+            'recorded_rms': record['rms'],
+            'replayed_rms': float(processor.current_level),
+            'recorded_footstep': record['is_footstep'],
+            'replayed_footstep': bool(processor.footstep_detected),
+            'recorded_gain': record['gain'],
+            'replayed_gain': float(processor.current_enhancement),
+        })
+
+    summary = {
+        'chunks': len(recording),
+        'compared': len(rows),
+        'duration': recording.duration(),
+        'wrapped': bool(wrapped),
+        'recorded_footsteps': sum(row['recorded_footstep'] for row in rows),
+        'replayed_footsteps': sum(row['replayed_footstep'] for row in rows),
+        'newly_detected': sum(row['replayed_footstep'] and not row['recorded_footstep'] for row in rows),
+        'no_longer_detected': sum(row['recorded_footstep'] and not row['replayed_footstep'] for row in rows),
+        'gain_changed': sum(row['replayed_gain'] != row['recorded_gain'] for row in rows),
+        'max_rms_delta': max((abs(row['replayed_rms'] - row['recorded_rms']) for row in rows), default=0.0),
+    }
+    return summary, rows
+
+
+def write_diff_csv(rows, path):
+    """Write the per-chunk comparison from replay() as CSV."""
+    import csv
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]) if rows else ['sequence'])
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def main(argv=None):
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Inspect or replay a flight recorder ring file.")
+    parser.add_argument('recording', help="Ring file written with --record / set_flight_recorder()")
+    parser.add_argument('--info', action='store_true', help="Print the recorded settings and exit")
+    parser.add_argument('--engine', choices=('bandpass', 'stft'), help="Replay with this detection engine")
+    parser.add_argument('--threshold', type=float, help="Replay with this fixed detection threshold")
+    parser.add_argument('--adaptive', choices=('on', 'off'), help="Replay with/without the adaptive threshold")
+    parser.add_argument('--envelope', choices=('on', 'off'), help="Replay with/without the gain envelope")
+    parser.add_argument('--band', type=float, nargs=2, metavar=('LOW', 'HIGH'), help="Footstep band in Hz")
+    parser.add_argument('--order', type=int, help="Bandpass filter order")
+    parser.add_argument('--warmup', type=int, default=10,
+                        help="Chunks replayed but not compared when the ring has wrapped")
+    parser.add_argument('-o', '--output', help="Write the per-chunk comparison to this CSV file")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.recording):
+        print(f"Error: {args.recording} not found")
+        return 1
+
+    if args.info:
+        recording = FlightRecording(args.recording)
+        print(json.dumps(dict(recording.metadata, chunks=len(recording), written=int(recording.written),
+                              duration=recording.duration()), indent=2))
+        return 0
+
+    def setup(processor):
+        if args.order is not None:
+            processor.set_filter_order(args.order)
+        if args.band is not None:
+            processor.set_footstep_band(*args.band)
+        if args.engine is not None:
+            processor.set_detection_engine(args.engine)
+        if args.adaptive is not None:
+            processor.set_adaptive_threshold(args.adaptive == 'on')
+        if args.envelope is not None:
+            processor.set_gain_envelope(args.envelope == 'on')
+
+    summary, rows = replay(args.recording, setup=setup, threshold=args.threshold, warmup=args.warmup)
+    print(f"{summary['chunks']} chunks ({summary['duration']:.1f} s), {summary['compared']} compared"
+          + (" (ring wrapped)" if summary['wrapped'] else ""))
+    print(f"  footstep chunks: recorded {summary['recorded_footsteps']}, replayed {summary['replayed_footsteps']}"
+          f" (+{summary['newly_detected']} / -{summary['no_longer_detected']})")
+    print(f"  gain changed in {summary['gain_changed']} chunks, max rms delta {summary['max_rms_delta']:.3g}")
+    if args.output:
+        write_diff_csv(rows, args.output)
+        print(f"Wrote {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
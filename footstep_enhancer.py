@@ -7,19 +7,39 @@ import tkinter as tk
 import sys
 from gui import FootstepEnhancerGUI
 from audio_processor import AudioProcessor
+from dsp_worker import WorkerAudioProcessor
 
 class FootstepEnhancerApp:
     """Main application class that connects the GUI with the audio processor."""
     
-    def __init__(self):
-        """Initialize the application."""
+    def __init__(self, use_worker_process=False, flight_recorder=None, flight_recorder_seconds=60.0,
+                 classifier=None):
+        """
+        Initialize the application.
+        
+        Args:
+            use_worker_process: Run audio processing in a separate process
+                (see dsp_worker) so GUI work never delays it
+            flight_recorder: Optional ring file recording the input and
+                detector decisions (see flight_recorder)
+            flight_recorder_seconds: Audio kept by the flight recorder
+            classifier: Optional model file of the second-stage footstep
+                classifier (see train_classifier.py)
+        """
         self.root = tk.Tk()
         self.root.title("Footstep Sound Enhancer")
         self.root.minsize(400, 300)
         self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         
         # Initialize the audio processor
-        self.audio_processor = AudioProcessor()
+        if use_worker_process:
+            self.audio_processor = WorkerAudioProcessor()
+        else:
+            self.audio_processor = AudioProcessor()
+        if flight_recorder:
+            self.audio_processor.set_flight_recorder(flight_recorder, flight_recorder_seconds)
+        if classifier:
+            self.audio_processor.set_footstep_classifier(classifier)
         
         # Initialize the GUI with a reference to the audio processor
         self.gui = FootstepEnhancerGUI(self.root, self.audio_processor)
@@ -35,9 +55,8 @@ class FootstepEnhancerApp:
     def on_close(self):
         """Handle application closing."""
         try:
-            # Stop the audio processor if it's running
-            if self.audio_processor.is_running:
-                self.audio_processor.stop()
+            # Stop the audio processor and release the audio device
+            self.audio_processor.close()
             
             # Destroy the Tkinter root
             self.root.destroy()
@@ -0,0 +1,100 @@
+"""
+Filter Table Generator for Footstep Sound Enhancer
+Writes filter_table.py, the precomputed bandpass coefficients loaded at start-up.
+
+Usage:
+    python generate_filter_table.py          # rewrite filter_table.py
+    python generate_filter_table.py --check  # fail if the table differs from scipy's designs
+"""
+
+import argparse
+import os
+import sys
+
+from scipy import signal
+
+# Bands (Hz), filter orders and sample rates covered by the table: the
+# footstep presets at every common device rate
+BANDS = ((200, 800), (100, 1000))
+ORDERS = (2, 4, 6)
+SAMPLE_RATES = (16000, 22050, 32000, 44100, 48000, 88200, 96000)
+
+TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'filter_table.py')
+
+HEADER = '''"""
+Filter Table for Footstep Sound Enhancer
+Precomputed Butterworth bandpass sections, so start-up never has to import scipy.
+
+Generated by generate_filter_table.py; do not edit.
+"""
+
+import numpy as np
+
+
+def lookup(low_hz, high_hz, sample_rate, order):
+    """Return the SOS array for a standard band, or None if it is not in the table."""
+    sections = SOS.get((low_hz, high_hz, sample_rate, order))
+    if sections is None:
+        return None
+    return np.array(sections, dtype=np.float64)
+
+
+# (low_hz, high_hz, sample_rate, order) -> sections of signal.butter(..., output='sos')
+SOS = {
+'''
+
+
+def design(low_hz, high_hz, sample_rate, order):
+    """Design one table entry exactly as dsp.design_bandpass_sos does."""
+    nyquist = 0.5 * sample_rate
+    return signal.butter(order, [low_hz / nyquist, high_hz / nyquist], btype='band', output='sos')
+
+
+def render():
+    """Return the source text of filter_table.py."""
+    lines = [HEADER]
+    for low_hz, high_hz in BANDS:
+        for sample_rate in SAMPLE_RATES:
+            for order in ORDERS:
+                lines.append(f"    ({low_hz}, {high_hz}, {sample_rate}, {order}): (\n")
+                for section in design(low_hz, high_hz, sample_rate, order):
+                    lines.append("        (" + ", ".join(repr(float(c)) for c in section) + "),\n")
+                lines.append("    ),\n")
+    lines.append("}\n")
+    return "".join(lines)
+
+
+def check():
+    """Compare the bundled table with fresh designs; returns the number of mismatches."""
+    import numpy as np
+    import filter_table
+
+    mismatches = 0
+    for low_hz, high_hz in BANDS:
+        for sample_rate in SAMPLE_RATES:
+            for order in ORDERS:
+                stored = filter_table.lookup(low_hz, high_hz, sample_rate, order)
+                expected = design(low_hz, high_hz, sample_rate, order)
+                if stored is None or not np.array_equal(stored, expected):
+                    print(f"Mismatch: {low_hz}-{high_hz} Hz, {sample_rate} Hz, order {order}")
+                    mismatches += 1
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate the precomputed bandpass filter table")
+    parser.add_argument('--check', action='store_true', help="Verify filter_table.py instead of writing it")
+    args = parser.parse_args()
+
+    if args.check:
+        mismatches = check()
+        print("Filter table is up to date" if not mismatches else f"{mismatches} stale entries")
+        sys.exit(1 if mismatches else 0)
+
+    with open(TABLE_PATH, 'w') as f:
+        f.write(render())
+    print(f"Wrote {len(BANDS) * len(ORDERS) * len(SAMPLE_RATES)} filters to {TABLE_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,11 +4,13 @@ Provides the user interface for controlling the footstep sound enhancement.
 """
 
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
 import math
+import time
 
 # Import to check if we're in fallback mode
 from audio_processor import PYAUDIO_AVAILABLE
+from spectrogram import SpectrogramImage
 
 class FootstepEnhancerGUI:
     """GUI class for the Footstep Sound Enhancer application."""
@@ -24,10 +26,25 @@ class FootstepEnhancerGUI:
         self.master = master
         self.audio_processor = audio_processor
         
-        # Register callbacks for audio processor events
-        self.audio_processor.on_level_change = self.update_level_meter
+        # Register callbacks for audio processor events. Level and footstep
+        # updates are polled from the telemetry channel on the Tk thread
+        # instead, so the audio thread never calls into Tk.
         self.audio_processor.on_status_change = self.update_status
-        self.audio_processor.on_footstep_detected = self.update_footstep_indicator
+        self._last_sequence = 0
+        self._last_footstep_count = 0
+        self._last_direction_count = 0
+        self._direction_hold = 0
+        self._bar_state = None
+        self._stream_text = ""
+        self._latency_text = ""
+        
+        # Spectrogram view: frames are rendered at most spectrogram_fps times a second
+        self.spectrogram_fps = 30
+        self.spectrogram_view = None
+        self._spectrogram_job = None
+        self._spectrogram_frames = 0
+        self._spectrogram_render_time = 0.0
+        self._spectrogram_since = 0.0
         
         # Apply a modern style
         self._configure_style()
@@ -89,6 +106,14 @@ class FootstepEnhancerGUI:
         self.status_label = ttk.Label(status_frame, text="Stopped", style="Status.TLabel")
         self.status_label.pack(side=tk.LEFT, padx=5)
         
+        # Negotiated stream format and rate, filled in from telemetry
+        self.stream_label = ttk.Label(status_frame, text="")
+        self.stream_label.pack(side=tk.RIGHT, padx=5)
+        
+        # Latency the chunk size aims for and the measured round trip
+        self.latency_label = ttk.Label(status_frame, text="")
+        self.latency_label.pack(side=tk.RIGHT, padx=5)
+        
         # Create a frame for the footstep indicator
         footstep_frame = ttk.Frame(main_frame)
         footstep_frame.pack(fill=tk.X, pady=5)
@@ -104,6 +129,19 @@ class FootstepEnhancerGUI:
         self.footstep_indicator.pack(side=tk.LEFT, padx=5)
         self.footstep_indicator.create_oval(2, 2, 18, 18, fill="gray", tags="indicator")
         
+        # Direction of the latest footstep: ahead is up, right is to the right
+        ttk.Label(footstep_frame, text="Direction:").pack(side=tk.LEFT, padx=(15, 5))
+        self.direction_indicator = tk.Canvas(
+            footstep_frame,
+            width=44,
+            height=44,
+            bg=self.bg_color,
+            highlightthickness=0
+        )
+        self.direction_indicator.pack(side=tk.LEFT, padx=5)
+        self.direction_indicator.create_oval(2, 2, 42, 42, outline="gray", tags="dial")
+        self.direction_indicator.create_line(22, 22, 22, 22, fill="gray", width=3, arrow=tk.LAST, tags="pointer")
+        
         # Level meter
         meter_frame = ttk.Frame(main_frame)
         meter_frame.pack(fill=tk.X, pady=10)
@@ -118,6 +156,23 @@ class FootstepEnhancerGUI:
             highlightbackground="gray"
         )
         self.level_meter.pack(side=tk.LEFT, padx=5, fill=tk.X, expand=True)
+        self.level_meter.create_rectangle(0, 0, 0, 0, fill="#00ff00", outline="", tags="bar")
+        
+        # Spectrogram panel, packed below the meter while enabled. The canvas
+        # holds a single image that is replaced in one call per frame.
+        self.meter_frame = meter_frame
+        self.spectrogram_frame = ttk.Frame(main_frame)
+        self.spectrogram_canvas = tk.Canvas(
+            self.spectrogram_frame,
+            bg="black",
+            highlightthickness=1,
+            highlightbackground="gray"
+        )
+        self.spectrogram_canvas.pack(padx=5)
+        self.spectrogram_image = tk.PhotoImage(master=self.master)
+        self.spectrogram_canvas.create_image(0, 0, anchor=tk.NW, image=self.spectrogram_image)
+        self.spectrogram_rate_label = ttk.Label(self.spectrogram_frame, text="")
+        self.spectrogram_rate_label.pack(anchor=tk.E, padx=5)
         
         # Enhancement controls
         control_frame = ttk.Frame(main_frame)
@@ -148,6 +203,24 @@ class FootstepEnhancerGUI:
         self.threshold_scale.set(0.05)  # Default threshold
         self.threshold_scale.grid(row=1, column=1, sticky=tk.EW, padx=5, pady=5)
         
+        # Adaptive latency: the chunk size follows the processing headroom
+        self.adaptive_latency_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            control_frame,
+            text="Adaptive latency",
+            variable=self.adaptive_latency_var,
+            command=self.on_adaptive_latency_change
+        ).grid(row=2, column=0, columnspan=2, sticky=tk.W, padx=5, pady=5)
+        
+        # Spectrogram view of the input, with the footstep band and detections
+        self.spectrogram_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            control_frame,
+            text="Spectrogram",
+            variable=self.spectrogram_var,
+            command=self.on_spectrogram_change
+        ).grid(row=3, column=0, columnspan=2, sticky=tk.W, padx=5, pady=5)
+        
         # Make column 1 expandable
         control_frame.columnconfigure(1, weight=1)
         
@@ -170,6 +243,13 @@ class FootstepEnhancerGUI:
         )
         self.stop_button.pack(side=tk.RIGHT, padx=5, expand=True, fill=tk.X)
         
+        ttk.Button(
+            main_frame,
+            text="Statistics",
+            command=self.show_statistics
+        ).pack(fill=tk.X, padx=5)
+        self.stats_window = None
+        
         # Information text
         info_frame = ttk.Frame(main_frame)
         info_frame.pack(fill=tk.X, pady=10)
@@ -193,9 +273,70 @@ class FootstepEnhancerGUI:
             self.start_button.config(state=tk.NORMAL)
             self.stop_button.config(state=tk.DISABLED)
             
-            # Reset the level meter and footstep indicator
+            # Reset the level meter and footstep and direction indicators
             self.update_level_meter(0.0)
             self.update_footstep_indicator(False)
+            self.update_direction_indicator(None, False)
+    
+    def show_statistics(self):
+        """Open the per-stage timing window; instrumentation runs only while it is open."""
+        if self.stats_window is not None:
+            self.stats_window.lift()
+            return
+        
+        self.audio_processor.set_instrumentation(True, True)
+        self.stats_window = tk.Toplevel(self.master)
+        self.stats_window.title("Processing Statistics")
+        self.stats_window.protocol("WM_DELETE_WINDOW", self._close_statistics)
+        
+        self.stats_text = tk.Text(self.stats_window, width=64, height=14, font=("Courier", 9))
+        self.stats_text.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        ttk.Button(self.stats_window, text="Save...", command=self._save_statistics).pack(pady=5)
+        self._refresh_statistics()
+    
+    def _refresh_statistics(self):
+        """Redraw the statistics table twice a second while the window is open."""
+        if self.stats_window is None:
+            return
+        try:
+            snapshot = self.audio_processor.instrumentation_snapshot()
+        except Exception as e:
+            print(f"Error reading statistics: {e}")
+            snapshot = None
+        
+        if snapshot is not None:
+            lines = [
+                f"Chunks {snapshot['chunks']}   detections {snapshot['detections']}   "
+                f"enhanced {snapshot['enhanced_ratio'] * 100:.1f}%   xruns {snapshot['xruns']}",
+                "",
+                f"{'stage':<10}{'count':>8}{'mean us':>10}{'p50 us':>10}{'p99 us':>10}{'max us':>10}",
+            ]
+            for stage, summary in snapshot['stages'].items():
+                if summary['count']:
+                    lines.append(f"{stage:<10}{summary['count']:>8}{summary['mean_us']:>10.1f}"
+                                 f"{summary['p50_us']:>10.1f}{summary['p99_us']:>10.1f}{summary['max_us']:>10.1f}")
+            self.stats_text.delete("1.0", tk.END)
+            self.stats_text.insert("1.0", "\n".join(lines))
+        self.stats_window.after(500, self._refresh_statistics)
+    
+    def _save_statistics(self):
+        """Dump the histograms to a JSON or CSV file chosen by the user."""
+        path = filedialog.asksaveasfilename(
+            parent=self.stats_window,
+            defaultextension=".json",
+            filetypes=[("JSON", "*.json"), ("CSV", "*.csv")]
+        )
+        if path:
+            try:
+                self.audio_processor.dump_instrumentation(path)
+            except Exception as e:
+                messagebox.showerror("Save Statistics", str(e), parent=self.stats_window)
+    
+    def _close_statistics(self):
+        """Close the statistics window and switch instrumentation off again."""
+        self.audio_processor.set_instrumentation(False)
+        self.stats_window.destroy()
+        self.stats_window = None
     
     def on_enhancement_change(self, value):
         """Handle changes to the enhancement factor slider."""
@@ -205,6 +346,62 @@ class FootstepEnhancerGUI:
         """Handle changes to the threshold slider."""
         self.audio_processor.set_detection_threshold(value)
     
+    def on_adaptive_latency_change(self):
+        """Handle the adaptive latency checkbox."""
+        self.audio_processor.set_adaptive_latency(self.adaptive_latency_var.get())
+    
+    def on_spectrogram_change(self):
+        """Show or hide the spectrogram panel."""
+        enabled = self.spectrogram_var.get()
+        try:
+            self.audio_processor.set_spectrogram(enabled)
+        except Exception as e:
+            print(f"Error switching the spectrogram: {e}")
+            self.spectrogram_var.set(False)
+            enabled = False
+        
+        if self._spectrogram_job is not None:
+            self.master.after_cancel(self._spectrogram_job)
+            self._spectrogram_job = None
+        if not enabled:
+            self.spectrogram_frame.pack_forget()
+            self.spectrogram_view = None
+            return
+        
+        view = SpectrogramImage(self.audio_processor.spectrogram_ring)
+        self.spectrogram_view = view
+        self.spectrogram_image.configure(width=view.width, height=view.height)
+        self.spectrogram_canvas.configure(width=view.width, height=view.height)
+        self.spectrogram_frame.pack(fill=tk.X, pady=5, after=self.meter_frame)
+        self._spectrogram_frames = 0
+        self._spectrogram_render_time = 0.0
+        self._spectrogram_since = time.perf_counter()
+        self._schedule_spectrogram()
+    
+    def _schedule_spectrogram(self):
+        """Render the spectrogram if new columns arrived, capped at spectrogram_fps."""
+        started = time.perf_counter()
+        if self.spectrogram_view.render():
+            # One bulk put of the whole frame
+            self.master.tk.call(self.spectrogram_image, 'put', bytes(self.spectrogram_view.ppm),
+                                '-format', 'ppm')
+            self._spectrogram_frames += 1
+        finished = time.perf_counter()
+        self._spectrogram_render_time += finished - started
+        
+        # Report the achieved frame rate and render cost about once a second
+        elapsed = finished - self._spectrogram_since
+        if elapsed >= 1.0:
+            frames = self._spectrogram_frames
+            cost = self._spectrogram_render_time / frames * 1000 if frames else 0.0
+            self.spectrogram_rate_label.config(text=f"{frames / elapsed:.0f} fps, {cost:.1f} ms/frame")
+            self._spectrogram_frames = 0
+            self._spectrogram_render_time = 0.0
+            self._spectrogram_since = finished
+        
+        delay = max(1, int(1000 / self.spectrogram_fps - (finished - started) * 1000))
+        self._spectrogram_job = self.master.after(delay, self._schedule_spectrogram)
+    
     def update_status(self, status):
         """Update the status label."""
         self.status_label.config(text=status)
@@ -212,9 +409,6 @@ class FootstepEnhancerGUI:
     def update_level_meter(self, level):
         """Update the audio level meter."""
         try:
-            # Clear the meter
-            self.level_meter.delete("bar")
-            
             # Calculate width based on level (logarithmic)
             if level > 0:
                 # Convert to dB scale (logarithmic)
@@ -238,22 +432,86 @@ class FootstepEnhancerGUI:
                 g = int(255 * (1 - (normalized_level - 0.5) * 2))
             
             color = f"#{r:02x}{g:02x}00"
+            height = self.level_meter.winfo_height()
             
-            self.level_meter.create_rectangle(
-                0, 0, width, self.level_meter.winfo_height(), 
-                fill=color, 
-                outline="", 
-                tags="bar"
-            )
+            # Move the existing bar rather than recreating it, and skip
+            # the Tk calls entirely when nothing visible changed
+            if self._bar_state != (width, height, color):
+                self._bar_state = (width, height, color)
+                self.level_meter.coords("bar", 0, 0, width, height)
+                self.level_meter.itemconfig("bar", fill=color)
         except Exception as e:
             print(f"Error updating level meter: {e}")
     
+    def update_stream_info(self, snapshot):
+        """Show the negotiated stream format and rate (and the processing rate if converted)."""
+        if 'stream_format' not in snapshot:
+            return
+        text = f"{snapshot['stream_format']} @ {snapshot['device_rate']} Hz"
+        if snapshot['sample_rate'] != snapshot['device_rate']:
+            text += f" (processing at {snapshot['sample_rate']} Hz)"
+        if text != self._stream_text:
+            self._stream_text = text
+            self.stream_label.config(text=text)
+    
+    def update_latency_info(self, snapshot):
+        """Show the latency the chunk size targets and the latency achieved."""
+        if not snapshot.get('target_latency'):
+            return
+        text = (f"Latency {snapshot['target_latency'] * 1000:.1f} ms target "
+                f"({snapshot['chunk_size']} frames), {snapshot['latency'] * 1000:.1f} ms achieved")
+        if text != self._latency_text:
+            self._latency_text = text
+            self.latency_label.config(text=text)
+    
     def update_footstep_indicator(self, detected):
         """Update the footstep detection indicator."""
         color = "#00ff00" if detected else "gray"
         self.footstep_indicator.itemconfig("indicator", fill=color)
     
+    def update_direction_indicator(self, azimuth, fresh):
+        """
+        Point the direction indicator at an azimuth in degrees (None hides the pointer).
+        
+        A fresh estimate is drawn highlighted; older ones fade to gray.
+        """
+        if azimuth is None:
+            self.direction_indicator.coords("pointer", 22, 22, 22, 22)
+            return
+        angle = math.radians(azimuth)
+        self.direction_indicator.coords(
+            "pointer", 22, 22, 22 + 17 * math.sin(angle), 22 - 17 * math.cos(angle))
+        self.direction_indicator.itemconfig("pointer", fill="#00ff00" if fresh else "gray")
+    
     def _schedule_updates(self):
         """Schedule periodic UI updates."""
         # Update the UI based on the current state
+        self._apply_telemetry(self.audio_processor.telemetry.latest())
         self.master.after(self.update_interval_ms, self._schedule_updates)
+    
+    def _apply_telemetry(self, snapshot):
+        """Update the meter and indicator from the latest telemetry snapshot."""
+        if snapshot['sequence'] == self._last_sequence:
+            return
+        self._last_sequence = snapshot['sequence']
+        
+        self.update_level_meter(snapshot['level'])
+        self.update_stream_info(snapshot)
+        self.update_latency_info(snapshot)
+        
+        # Light the indicator if a footstep is active now or occurred since the last poll
+        detected = (snapshot['footstep_detected']
+                    or snapshot['footstep_count'] != self._last_footstep_count)
+        self._last_footstep_count = snapshot['footstep_count']
+        self.update_footstep_indicator(detected)
+        
+        # Keep a new direction highlighted for about a second
+        direction_count = snapshot.get('direction_count', 0)
+        if direction_count != self._last_direction_count:
+            self._last_direction_count = direction_count
+            self._direction_hold = 1000 // self.update_interval_ms
+            self.update_direction_indicator(snapshot.get('azimuth'), True)
+        elif self._direction_hold:
+            self._direction_hold -= 1
+            if not self._direction_hold:
+                self.update_direction_indicator(snapshot.get('azimuth'), False)
@@ -0,0 +1,184 @@
+"""
+Instrumentation Module for Footstep Sound Enhancer
+Per-stage timing histograms and counters for the real-time processing chain.
+"""
+
+import csv
+import json
+import time
+
+# Hot-path stages, in processing order
+STAGES = ('read', 'convert', 'filter', 'detect', 'classify', 'direction', 'spectrogram', 'enhance', 'encode', 'write')
+
+
+class LogHistogram:
+    """
+    Fixed-size histogram of nanosecond durations with logarithmic buckets.
+
+    Each power of two is split into four buckets (about 19% wide), from a
+    few nanoseconds up to half an hour, so adding a sample is a couple of
+    integer operations on a preallocated list and never allocates a bucket.
+    """
+
+    BUCKETS = 160
+
+    def __init__(self):
+        self.counts = [0] * self.BUCKETS
+        self.total = 0
+        self.sum_ns = 0
+        self.max_ns = 0
+
+    @staticmethod
+    def bucket(ns):
+        """Return the bucket index of a duration."""
+        if ns < 4:
+            return max(ns, 0)
+        bits = ns.bit_length()
+        return min(((bits - 3) << 2) + (ns >> (bits - 3)), LogHistogram.BUCKETS - 1)
+
+    @staticmethod
+    def bucket_bounds(index):
+        """Return the [low, high) nanosecond range of a bucket."""
+        if index < 4:
+            return index, index + 1
+        shift = (index >> 2) - 1
+        low = ((index & 3) | 4) << shift
+        return low, low + (1 << shift)
+
+    def add(self, ns):
+        """Record one duration (audio thread)."""
+        # Same as bucket(ns), inlined: this runs several times per chunk
+        if ns >= 4:
+            bits = ns.bit_length()
+            index = ((bits - 3) << 2) + (ns >> (bits - 3))
+            if index >= self.BUCKETS:
+                index = self.BUCKETS - 1
+        else:
+            index = ns if ns > 0 else 0
+        self.counts[index] += 1
+        self.total += 1
+        self.sum_ns += ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+
+    def percentile(self, q):
+        """Return the upper bound (ns) of the bucket holding the q-th percentile."""
+        if not self.total:
+            return 0
+        target = q / 100.0 * self.total
+        cumulative = 0
+        for index, count in enumerate(list(self.counts)):
+            cumulative += count
+            if cumulative >= target:
+                return min(self.bucket_bounds(index)[1], self.max_ns)
+        return self.max_ns
+
+    def summary(self):
+        """Return count, mean, p50, p90, p99 and max in microseconds."""
+        return {
+            'count': self.total,
+            'mean_us': self.sum_ns / self.total / 1e3 if self.total else 0.0,
+            'p50_us': self.percentile(50) / 1e3,
+            'p90_us': self.percentile(90) / 1e3,
+            'p99_us': self.percentile(99) / 1e3,
+            'max_us': self.max_ns / 1e3,
+        }
+
+    def reset(self):
+        for index in range(self.BUCKETS):
+            self.counts[index] = 0
+        self.total = 0
+        self.sum_ns = 0
+        self.max_ns = 0
+
+
+class Instrumentation:
+    """
+    Stage timings and chunk counters of one AudioProcessor.
+
+    The audio thread calls start() at the top of each chunk and lap(stage)
+    after each stage, which records the time since the previous mark.
+    Every call site checks `enabled` first, so when instrumentation is off
+    the hot path pays one attribute test per stage. Readers (the GUI, a
+    dump) can call snapshot() from any thread.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.histograms = {stage: LogHistogram() for stage in STAGES}
+        self._last = 0
+        self.reset()
+
+    def start(self):
+        """Mark the start of a chunk (audio thread)."""
+        self._last = time.perf_counter_ns()
+
+    def lap(self, stage):
+        """Record the time since the previous mark as `stage` (audio thread)."""
+        now = time.perf_counter_ns()
+        self.histograms[stage].add(now - self._last)
+        self._last = now
+
+    def record(self, stage, ns):
+        """Record a duration measured elsewhere, e.g. by another pipeline thread."""
+        self.histograms[stage].add(ns)
+
+    def count_chunk(self, detected, enhanced, xruns):
+        """Count one processed chunk (audio thread)."""
+        self.chunks += 1
+        if detected:
+            self.detections += 1
+        if enhanced:
+            self.enhanced_chunks += 1
+        self.xruns = xruns
+
+    def reset(self):
+        """Clear all histograms and counters."""
+        for histogram in self.histograms.values():
+            histogram.reset()
+        self.chunks = 0
+        self.detections = 0
+        self.enhanced_chunks = 0
+        self.xruns = 0
+        self.started = time.time()
+
+    def snapshot(self):
+        """Return counters and per-stage summaries as a plain dict."""
+        return {
+            'enabled': self.enabled,
+            'since': self.started,
+            'chunks': self.chunks,
+            'detections': self.detections,
+            'enhanced_chunks': self.enhanced_chunks,
+            'enhanced_ratio': self.enhanced_chunks / self.chunks if self.chunks else 0.0,
+            'xruns': self.xruns,
+            'stages': {stage: self.histograms[stage].summary() for stage in STAGES},
+        }
+
+    def dump(self, path):
+        """
+        Write the counters and histograms to `path`.
+
+        A .csv file gets one row per non-empty bucket (stage, low_ns,
+        high_ns, count); anything else gets JSON with the summaries and the
+        raw bucket counts.
+        """
+        if path.lower().endswith('.csv'):
+            with open(path, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(['stage', 'low_ns', 'high_ns', 'count'])
+                for stage in STAGES:
+                    for index, count in enumerate(list(self.histograms[stage].counts)):
+                        if count:
+                            writer.writerow([stage, *LogHistogram.bucket_bounds(index), count])
+            return
+
+        report = self.snapshot()
+        report['buckets'] = {
+            stage: [[*LogHistogram.bucket_bounds(index), count]
+                    for index, count in enumerate(list(self.histograms[stage].counts)) if count]
+            for stage in STAGES
+        }
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
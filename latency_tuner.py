@@ -0,0 +1,142 @@
+"""
+Latency Tuner Module for Footstep Sound Enhancer
+Picks the processing chunk size from the measured processing headroom and xruns.
+"""
+
+# Chunk sizes (frames) the tuner moves between, smallest first
+CHUNK_SIZES = (128, 256, 512, 1024, 2048)
+
+
+class LatencyTuner:
+    """
+    Chooses the smallest chunk size the machine keeps up with, with hysteresis.
+
+    The audio thread reports every chunk's processing time and whether an
+    xrun occurred. The load of a chunk is its processing time over its
+    duration. The tuner then:
+
+    - steps up one size at once after an xrun, and at the end of a window
+      in which more than `overload_share` of the chunks exceeded
+      `grow_load`;
+    - steps down one size after `settle` consecutive windows in which no
+      more than `overload_share` of the chunks would have exceeded
+      `shrink_load` at the smaller size, assuming the processing cost does
+      not shrink with the chunk.
+
+    Counting shares rather than taking the peak keeps a single scheduler
+    hiccup from pinning the size in either direction.
+
+    Every step up caused by an xrun doubles the number of calm windows a
+    step down needs (up to `max_settle`), so a machine on the edge of a
+    size settles on the larger one instead of dropping out every few
+    seconds.
+    """
+
+    def __init__(self, sample_rate, sizes=CHUNK_SIZES, initial=256, window_seconds=1.0, grow_load=0.6,
+                 shrink_load=0.3, overload_share=0.05, settle=5, max_settle=80):
+        """
+        Initialize the tuner.
+
+        Args:
+            sample_rate: Processing sample rate in Hz
+            sizes: Chunk sizes to choose from
+            initial: Size to start from; the nearest of `sizes` is used
+            window_seconds: Audio per decision window
+            grow_load: Load above which a chunk counts as overloaded
+            shrink_load: Predicted load the smaller size must stay below
+            overload_share: Share of overloaded chunks that triggers a step up
+            settle: Calm windows needed before the first step down
+            max_settle: Upper bound on the calm windows after repeated xruns
+        """
+        self.sample_rate = sample_rate
+        self.sizes = tuple(sorted(set(int(size) for size in sizes)))
+        self.initial = self.nearest(initial)
+        self.window_seconds = window_seconds
+        self.grow_load = grow_load
+        self.shrink_load = shrink_load
+        self.overload_share = overload_share
+        self.base_settle = settle
+        self.max_settle = max_settle
+        self.reset()
+
+    def nearest(self, chunk_size):
+        """The size in `sizes` closest to chunk_size."""
+        return min(self.sizes, key=lambda size: abs(size - chunk_size))
+
+    def reset(self, chunk_size=None):
+        """Start over at the size nearest `chunk_size` (default: the initial size)."""
+        self.chunk_size = self.initial if chunk_size is None else self.nearest(chunk_size)
+        self.settle = self.base_settle
+        self.switches = 0
+        self.last_load = 0.0
+        self._start_window()
+
+    def _start_window(self):
+        """Begin a new decision window at the current chunk size."""
+        self.chunk_seconds = self.chunk_size / self.sample_rate
+        self._window_chunks = max(1, int(round(self.window_seconds / self.chunk_seconds)))
+        smaller = [size for size in self.sizes if size < self.chunk_size]
+        # Load at this size above which the next smaller size would be too busy
+        self._shrink_limit = self.shrink_load * smaller[-1] / self.chunk_size if smaller else -1.0
+        self._chunks = 0
+        self._overloaded = 0
+        self._busy = 0
+        self._calm = 0
+
+    @property
+    def target_latency(self):
+        """Latency of one chunk at the current size, in seconds."""
+        return self.chunk_seconds
+
+    def _step(self, direction):
+        """Move one size up (+1) or down (-1); returns the new size, or None at the end of the range."""
+        index = self.sizes.index(self.chunk_size) + direction
+        if not 0 <= index < len(self.sizes):
+            return None
+        self.chunk_size = self.sizes[index]
+        self.switches += 1
+        self._start_window()
+        return self.chunk_size
+
+    def update(self, seconds, xrun=False):
+        """
+        Report one processed chunk.
+
+        Args:
+            seconds: Time spent processing the chunk
+            xrun: Whether an overflow/underflow happened around it
+
+        Returns:
+            The chunk size to switch to before the next chunk, or None to keep the current one
+        """
+        load = seconds / self.chunk_seconds
+        self.last_load = load
+        if xrun:
+            self.settle = min(2 * self.settle, self.max_settle)
+            return self._step(1)
+
+        self._chunks += 1
+        if load > self.grow_load:
+            self._overloaded += 1
+        if load > self._shrink_limit:
+            self._busy += 1
+        if self._chunks < self._window_chunks:
+            return None
+
+        # End of a window: decide, then start the next one
+        allowed = self.overload_share * self._chunks
+        overloaded = self._overloaded > allowed
+        calm = self._busy <= allowed
+        self._chunks = 0
+        self._overloaded = 0
+        self._busy = 0
+        if overloaded:
+            return self._step(1)
+
+        if calm:
+            self._calm += 1
+            if self._calm >= self.settle:
+                return self._step(-1)
+        else:
+            self._calm = 0
+        return None
@@ -3,15 +3,82 @@ Footstep Sound Enhancer for Games - Main Entry Point
 Selectively enhances footstep sounds in games to improve audio cues.
 """
 
+import time
+_LAUNCHED = time.perf_counter()  # Before the application imports, for --startup-check
+
+import argparse
+import json
+import multiprocessing
 import sys
-from footstep_enhancer import FootstepEnhancerApp
+from audio_processor import AudioProcessor
+
+def startup_check(path):
+    """
+    Initialize the audio side as a normal launch would, write start-up timings and exit.
+
+    Used by `benchmark.py --startup` on both the source and the frozen build;
+    the GUI is not created, so no display is needed.
+    """
+    # The GUI is imported on demand (daemon mode runs without Tk); a normal launch imports it
+    import footstep_enhancer  # noqa: F401
+    imported = time.perf_counter()
+    processor = AudioProcessor()
+    ready = time.perf_counter()
+    processor.close()
+    report = {
+        'import_ms': (imported - _LAUNCHED) * 1e3,
+        'init_ms': (ready - imported) * 1e3,
+        'scipy_loaded': 'scipy' in sys.modules,
+        'modules': len(sys.modules),
+        'frozen': bool(getattr(sys, 'frozen', False)),
+    }
+    with open(path, 'w') as f:
+        json.dump(report, f)
 
 def main():
     """Main entry point for the application."""
-    app = FootstepEnhancerApp()
+    parser = argparse.ArgumentParser(description="Footstep Sound Enhancer")
+    parser.add_argument('--worker-process', action='store_true',
+                        help="Run audio processing in a separate process from the GUI")
+    parser.add_argument('--record', metavar='FILE',
+                        help="Keep the last minute of input and detector decisions in a ring file "
+                             "(replay it with flight_recorder.py)")
+    parser.add_argument('--record-seconds', type=float, default=60.0,
+                        help="Audio kept by --record (default 60 s)")
+    parser.add_argument('--classifier', metavar='MODEL',
+                        help="Confirm detected footsteps with a classifier trained by train_classifier.py "
+                             "(bandpass engine without the gain envelope only)")
+    parser.add_argument('--daemon', action='store_true',
+                        help="Run without the GUI, controlled over a local socket (see daemon.py)")
+    parser.add_argument('--socket', metavar='PATH',
+                        help="Socket for --daemon (default: footstep-enhancer.sock in the runtime directory)")
+    parser.add_argument('--startup-check', metavar='REPORT',
+                        help="Write start-up timings as JSON to REPORT and exit")
+    args = parser.parse_args()
+
+    if args.startup_check:
+        startup_check(args.startup_check)
+        return
+
+    if args.daemon:
+        from daemon import run_daemon
+        from dsp_worker import WorkerAudioProcessor
+        processor = WorkerAudioProcessor() if args.worker_process else AudioProcessor()
+        if args.record:
+            processor.set_flight_recorder(args.record, args.record_seconds)
+        if args.classifier:
+            processor.set_footstep_classifier(args.classifier)
+        sys.exit(run_daemon(processor, args.socket))
+
+    from footstep_enhancer import FootstepEnhancerApp
+    app = FootstepEnhancerApp(use_worker_process=args.worker_process,
+                              flight_recorder=args.record, flight_recorder_seconds=args.record_seconds,
+                              classifier=args.classifier)
     app.run()
 
 if __name__ == "__main__":
+    # Needed for the DSP worker process in frozen (PyInstaller) builds
+    multiprocessing.freeze_support()
     try:
         main()
     except Exception as e:
@@ -0,0 +1,370 @@
+"""
+Offline Processor Module for Footstep Sound Enhancer
+Enhances recorded gameplay audio files in bulk, without an audio device or GUI.
+
+Usage:
+    python offline_processor.py capture1.wav capture2.flac -o enhanced/ --jobs 4
+"""
+
+import argparse
+import os
+import struct
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from audio_processor import AudioProcessor, PyAudioDummy, DETECTION_ENGINES
+
+# FLAC support is optional; WAV files are handled with numpy alone
+SOUNDFILE_AVAILABLE = False
+try:
+    import soundfile
+    SOUNDFILE_AVAILABLE = True
+except ImportError:
+    soundfile = None
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+class WavInfo:
+    """Layout of the sample data inside a WAV file."""
+
+    def __init__(self, sample_rate, channels, dtype, data_offset, frames):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.dtype = dtype
+        self.data_offset = data_offset
+        self.frames = frames
+
+
+def read_wav_info(path):
+    """
+    Parse the RIFF chunks of a WAV file.
+
+    Only 16-bit PCM and 32-bit float sample data are supported, since those
+    can be memory-mapped directly as numpy arrays.
+    """
+    with open(path, 'rb') as f:
+        riff, _, wave_id = struct.unpack('<4sI4s', f.read(12))
+        if riff != b'RIFF' or wave_id != b'WAVE':
+            raise ValueError(f"{path} is not a RIFF/WAVE file")
+
+        fmt = None
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                raise ValueError(f"{path} has no data chunk")
+            chunk_id, chunk_size = struct.unpack('<4sI', header)
+
+            if chunk_id == b'fmt ':
+                fmt = f.read(chunk_size)
+                f.seek(chunk_size % 2, os.SEEK_CUR)
+            elif chunk_id == b'data':
+                data_offset = f.tell()
+                data_size = chunk_size
+                break
+            else:
+                # Chunks are word-aligned
+                f.seek(chunk_size + chunk_size % 2, os.SEEK_CUR)
+
+    if fmt is None:
+        raise ValueError(f"{path} has no fmt chunk")
+
+    format_tag, channels, sample_rate, _, _, bits = struct.unpack('<HHIIHH', fmt[:16])
+    if format_tag == WAVE_FORMAT_EXTENSIBLE and len(fmt) >= 26:
+        format_tag = struct.unpack('<H', fmt[24:26])[0]
+
+    if format_tag == WAVE_FORMAT_PCM and bits == 16:
+        dtype = np.dtype('<i2')
+    elif format_tag == WAVE_FORMAT_IEEE_FLOAT and bits == 32:
+        dtype = np.dtype('<f4')
+    else:
+        raise ValueError(f"{path}: unsupported WAV format (tag {format_tag}, {bits} bits)")
+
+    frames = data_size // (dtype.itemsize * channels)
+    return WavInfo(sample_rate, channels, dtype, data_offset, frames)
+
+
+def create_wav(path, sample_rate, channels, dtype, frames):
+    """
+    Create a WAV file of the given size and return a writable memory map of its samples.
+    """
+    dtype = np.dtype(dtype)
+    format_tag = WAVE_FORMAT_IEEE_FLOAT if dtype.kind == 'f' else WAVE_FORMAT_PCM
+    bits = dtype.itemsize * 8
+    block_align = channels * dtype.itemsize
+    data_size = frames * block_align
+
+    with open(path, 'wb') as f:
+        f.write(struct.pack('<4sI4s', b'RIFF', 36 + data_size, b'WAVE'))
+        f.write(struct.pack('<4sIHHIIHH', b'fmt ', 16, format_tag, channels, sample_rate,
+                            sample_rate * block_align, block_align, bits))
+        f.write(struct.pack('<4sI', b'data', data_size))
+        f.truncate(44 + data_size)
+
+    if frames == 0:
+        return np.zeros((0, channels), dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r+', offset=44, shape=(frames, channels))
+
+
+def _to_float(block):
+    """Convert a block of samples to float32 in the -1.0 to 1.0 range."""
+    if block.dtype.kind == 'f':
+        return np.ascontiguousarray(block, dtype=np.float32)
+    return block.astype(np.float32) / 32767.0
+
+
+def _from_float(block, dtype):
+    """Convert a float block back to the output sample type."""
+    if np.dtype(dtype).kind == 'f':
+        return block
+    return (block * 32767.0).astype(dtype)
+
+
+def _make_processor(sample_rate, channels, chunk_size, settings):
+    """Create an AudioProcessor that runs headless for the given file layout."""
+    processor = AudioProcessor(audio_backend=PyAudioDummy())
+    processor.configure_stream(sample_rate=sample_rate, channels=channels, chunk_size=chunk_size)
+    processor.set_enhancement_factor(settings['enhancement_factor'])
+    processor.set_detection_threshold(settings['detection_threshold'])
+    processor.set_detection_engine(settings['detection_engine'])
+    return processor
+
+
+def _process_blocks(processor, blocks, write_block):
+    """
+    Run each block through the processor; return (frames, enhanced_blocks).
+
+    write_block(block, enhanced) writes `enhanced`, or `block` unchanged if
+    `enhanced` is None.
+    """
+    if processor.detection_engine == 'stft':
+        return _process_blocks_delayed(processor, blocks, write_block, processor.stft_engine.latency_frames)
+    frames = 0
+    enhanced_blocks = 0
+    for block in blocks:
+        audio_float = _to_float(block)
+        enhanced = processor.enhance_block(audio_float)
+        if processor.current_enhancement != 1.0:
+            enhanced_blocks += 1
+        write_block(block, enhanced)
+        frames += len(block)
+    return frames, enhanced_blocks
+
+
+def _flushed(blocks, channels, chunk_size, latency):
+    """
+    Yield (float block, input frames in it), then `latency` frames of silence
+    in blocks of at most chunk_size.
+
+    The silence first fills up a short final block, which the engine pads to
+    a full chunk anyway, so it follows the last input frame directly.
+    """
+    pending = latency
+    for block in blocks:
+        audio_float = _to_float(block)
+        length = len(audio_float)
+        if length < chunk_size and pending:
+            pad = min(pending, chunk_size - length)
+            audio_float = np.concatenate((audio_float, np.zeros((pad, channels), dtype=np.float32)))
+            pending -= pad
+        yield audio_float, length
+    # The latency can exceed a chunk when the chunk is not a multiple of the hop
+    while pending:
+        pad = min(pending, chunk_size)
+        yield np.zeros((pad, channels), dtype=np.float32), 0
+        pending -= pad
+
+
+def _process_blocks_delayed(processor, blocks, write_block, latency):
+    """
+    _process_blocks for an engine that delays its output by `latency` frames.
+
+    There is no deadline offline, so the delay is removed: the first
+    `latency` output frames are dropped and the overlap-add tail is flushed
+    with silence at the end, keeping the output aligned with the input.
+    Blocks passed through unchanged are delayed by the same amount, so they
+    line up with the enhanced ones around them.
+    """
+    frames = 0
+    enhanced_blocks = 0
+    skip = latency
+    history = np.zeros((latency, processor.channels), dtype=np.float32)
+    for audio_float, length in _flushed(blocks, processor.channels, processor.chunk_size, latency):
+        enhanced = processor.enhance_block(audio_float)
+        if length and processor.current_enhancement != 1.0:
+            enhanced_blocks += 1
+        frames += length
+
+        delayed = np.concatenate((history, audio_float))
+        history = delayed[len(audio_float):]
+        if enhanced is None:
+            enhanced = delayed[:len(audio_float)]
+        if skip < len(enhanced):
+            write_block(None, enhanced[skip:])
+        skip = max(0, skip - len(enhanced))
+    return frames, enhanced_blocks
+
+
+def _close_memmap(array):
+    """
+    Flush and unmap a memory-mapped array now, instead of when it is collected.
+
+    Any view of it becomes invalid, so this is only called once processing is done.
+    """
+    if isinstance(array, np.memmap):
+        array.flush()
+        array._mmap.close()
+
+
+def _process_wav(input_path, output_path, chunk_size, settings):
+    """Stream a WAV file through memory maps so it never has to fit in RAM."""
+    info = read_wav_info(input_path)
+    if info.frames:
+        source = np.memmap(input_path, dtype=info.dtype, mode='r', offset=info.data_offset,
+                           shape=(info.frames, info.channels))
+    else:
+        source = np.zeros((0, info.channels), dtype=info.dtype)
+    target = None
+    try:
+        target = create_wav(output_path, info.sample_rate, info.channels, info.dtype, info.frames)
+        processor = _make_processor(info.sample_rate, info.channels, chunk_size, settings)
+
+        position = [0]
+
+        def write_block(block, enhanced):
+            data = block if enhanced is None else _from_float(enhanced, info.dtype)
+            start = position[0]
+            end = start + len(data)
+            target[start:end] = data
+            position[0] = end
+
+        blocks = (source[i:i + chunk_size] for i in range(0, info.frames, chunk_size))
+        frames, enhanced_blocks = _process_blocks(processor, blocks, write_block)
+    finally:
+        _close_memmap(source)
+        _close_memmap(target)
+    return frames, info.sample_rate, enhanced_blocks
+
+
+def _process_soundfile(input_path, output_path, chunk_size, settings):
+    """Stream a compressed file (e.g. FLAC) block by block through soundfile."""
+    if not SOUNDFILE_AVAILABLE:
+        raise RuntimeError("Processing non-WAV files requires the 'soundfile' package")
+
+    with soundfile.SoundFile(input_path) as source:
+        processor = _make_processor(source.samplerate, source.channels, chunk_size, settings)
+        with soundfile.SoundFile(output_path, 'w', samplerate=source.samplerate,
+                                 channels=source.channels, subtype=source.subtype,
+                                 format=source.format) as target:
+
+            def write_block(block, enhanced):
+                target.write(block if enhanced is None else enhanced)
+
+            blocks = source.blocks(blocksize=chunk_size, dtype='float32', always_2d=True)
+            frames, enhanced_blocks = _process_blocks(processor, blocks, write_block)
+        return frames, source.samplerate, enhanced_blocks
+
+
+def process_file(input_path, output_path, chunk_size=1024, enhancement_factor=2.0,
+                 detection_threshold=0.05, detection_engine='bandpass'):
+    """
+    Enhance footsteps in a recorded audio file.
+
+    Args:
+        input_path: WAV (16-bit PCM or 32-bit float) or, with soundfile installed, FLAC file
+        output_path: Where to write the enhanced file (same format as the input)
+        chunk_size: Frames per processing block, as in the real-time path
+        enhancement_factor: Gain applied to detected footstep blocks
+        detection_threshold: RMS threshold of the footstep band
+        detection_engine: 'bandpass' or 'stft' (see AudioProcessor.set_detection_engine)
+
+    Returns:
+        dict with the number of frames, audio duration, processing time,
+        realtime factor and enhanced block count
+    """
+    settings = {
+        'enhancement_factor': enhancement_factor,
+        'detection_threshold': detection_threshold,
+        'detection_engine': detection_engine,
+    }
+    start = time.perf_counter()
+    if input_path.lower().endswith('.wav'):
+        frames, sample_rate, enhanced_blocks = _process_wav(input_path, output_path, chunk_size, settings)
+    else:
+        frames, sample_rate, enhanced_blocks = _process_soundfile(input_path, output_path, chunk_size, settings)
+    elapsed = time.perf_counter() - start
+
+    duration = frames / sample_rate
+    return {
+        'input': input_path,
+        'output': output_path,
+        'frames': frames,
+        'duration': duration,
+        'elapsed': elapsed,
+        'realtime_factor': duration / elapsed if elapsed > 0 else float('inf'),
+        'enhanced_blocks': enhanced_blocks,
+    }
+
+
+def _output_path_for(input_path, output_dir):
+    """Build the output file name, e.g. capture.wav -> <output_dir>/capture_enhanced.wav."""
+    stem, ext = os.path.splitext(os.path.basename(input_path))
+    return os.path.join(output_dir, f"{stem}_enhanced{ext}")
+
+
+def process_files(input_paths, output_dir, jobs=None, **kwargs):
+    """
+    Enhance several files in parallel using a process pool.
+
+    Yields the result dict of each file as it completes; failures are
+    reported with an 'error' key instead of stopping the batch.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = {
+            executor.submit(process_file, path, _output_path_for(path, output_dir), **kwargs): path
+            for path in input_paths
+        }
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except Exception as e:
+                yield {'input': futures[future], 'error': str(e)}
+
+
+def main(argv=None):
+    """Command-line entry point for batch processing."""
+    parser = argparse.ArgumentParser(description="Enhance footstep sounds in recorded audio files.")
+    parser.add_argument('inputs', nargs='+', help="WAV or FLAC files to process")
+    parser.add_argument('-o', '--output-dir', default='enhanced', help="Directory for enhanced files")
+    parser.add_argument('-j', '--jobs', type=int, default=None, help="Number of worker processes")
+    parser.add_argument('--chunk-size', type=int, default=1024, help="Frames per processing block")
+    parser.add_argument('--enhancement-factor', type=float, default=2.0)
+    parser.add_argument('--threshold', type=float, default=0.05, help="Footstep detection threshold")
+    parser.add_argument('--engine', choices=DETECTION_ENGINES, default='bandpass',
+                        help="Footstep detection/enhancement engine")
+    args = parser.parse_args(argv)
+
+    failures = 0
+    for result in process_files(args.inputs, args.output_dir, jobs=args.jobs,
+                                chunk_size=args.chunk_size,
+                                enhancement_factor=args.enhancement_factor,
+                                detection_threshold=args.threshold,
+                                detection_engine=args.engine):
+        if 'error' in result:
+            failures += 1
+            print(f"{result['input']}: error: {result['error']}")
+        else:
+            print(f"{result['input']} -> {result['output']}: "
+                  f"{result['duration']:.1f}s audio in {result['elapsed']:.2f}s "
+                  f"({result['realtime_factor']:.1f}×RT, {result['enhanced_blocks']} blocks enhanced)")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
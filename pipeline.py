@@ -0,0 +1,274 @@
+"""
+Pipeline Module for Footstep Sound Enhancer
+Runs capture, DSP and playback as separate threads joined by lock-free ring buffers.
+"""
+
+import threading
+import time
+
+import numpy as np
+
+
+class FrameRing:
+    """
+    Fixed-size single-producer/single-consumer ring of equally sized sample blocks.
+
+    All blocks are preallocated. The producer only advances `_written` and
+    the consumer only advances `_read`, each after its copy is complete;
+    rebinding an int is atomic in CPython, so neither side ever takes a
+    lock or waits on the other.
+    """
+
+    def __init__(self, slots, block_samples, dtype):
+        """
+        Args:
+            slots: Number of blocks the ring holds
+            block_samples: Samples per block (frames x channels)
+            dtype: Sample type of the blocks
+        """
+        self.slots = slots
+        self._blocks = np.zeros((slots, block_samples), dtype=dtype)
+        self._written = 0
+        self._read = 0
+        self.peak_fill = 0
+
+    @property
+    def fill(self):
+        """Number of blocks waiting to be read."""
+        return self._written - self._read
+
+    def push(self, block):
+        """Copy one block in (producer only); returns False and drops it if the ring is full."""
+        fill = self._written - self._read
+        if fill >= self.slots:
+            return False
+        np.copyto(self._blocks[self._written % self.slots], np.frombuffer(block, dtype=self._blocks.dtype))
+        self._written += 1
+        if fill + 1 > self.peak_fill:
+            self.peak_fill = fill + 1
+        return True
+
+    def pop(self, out):
+        """Copy the oldest block into `out` (consumer only); returns False if the ring is empty."""
+        if self._written == self._read:
+            return False
+        np.copyto(out, self._blocks[self._read % self.slots])
+        self._read += 1
+        return True
+
+    def clear(self):
+        """Drop all blocks; only while neither side is running."""
+        self._written = self._read = 0
+        self.peak_fill = 0
+
+
+class StageStats:
+    """Counters of one pipeline stage, each written by that stage's thread only."""
+
+    def __init__(self):
+        self.blocks = 0
+        self.overflows = 0
+        self.underflows = 0
+
+    def as_dict(self, ring):
+        """Return the counters plus the fill level of the ring the stage feeds or drains."""
+        return {
+            'blocks': self.blocks,
+            'fill': ring.fill,
+            'peak_fill': ring.peak_fill,
+            'capacity': ring.slots,
+            'overflows': self.overflows,
+            'underflows': self.underflows,
+        }
+
+
+class AudioPipeline:
+    """
+    Capture -> DSP -> playback, each stage in its own thread.
+
+    - capture reads the input stream and pushes blocks into the capture
+      ring. A full ring drops the block and counts an overflow, and so does
+      an overflow reported by PortAudio, so a slow DSP stage no longer
+      stalls the device or loses input without a trace.
+    - dsp pops captured blocks, runs AudioProcessor._process_stream_buffer
+      and pushes the result into the playback ring.
+    - playback waits until `prefill` blocks are queued (the jitter buffer),
+      then writes one block per device period. If the ring has run dry it
+      never blocks: it plays the last block faded out, then silence, and
+      fades the next real block back in. Each concealed block counts as
+      an underflow. When the backlog then arrives all at once, blocks
+      beyond twice the prefill are skipped (counted as playback overflows)
+      so the latency returns to its target instead of staying high.
+    """
+
+    def __init__(self, processor, slots=8, prefill=2):
+        """
+        Args:
+            processor: Configured AudioProcessor (stream negotiated)
+            slots: Blocks per ring buffer
+            prefill: Blocks queued before playback starts
+        """
+        self.processor = processor
+        self.prefill = min(prefill, slots)
+        self.frames = processor.device_chunk_size
+        self.channels = processor.channels
+        self.dtype = np.float32 if processor._is_float_stream() else np.int16
+
+        samples = self.frames * self.channels
+        self.capture_ring = FrameRing(slots, samples, self.dtype)
+        self.playback_ring = FrameRing(slots, samples, self.dtype)
+        self.capture_stats = StageStats()
+        self.dsp_stats = StageStats()
+        self.playback_stats = StageStats()
+
+        self._dsp_block = np.zeros(samples, dtype=self.dtype)
+        self._play_block = np.zeros(samples, dtype=self.dtype)
+        self._last_block = np.zeros(samples, dtype=self.dtype)
+        self._silence = np.zeros(samples, dtype=self.dtype)
+        self._conceal_scratch = np.zeros((self.frames, self.channels), dtype=np.float32)
+        ramp = np.linspace(1.0, 0.0, self.frames, dtype=np.float32)[:, None]
+        self._fade_out = ramp
+        self._fade_in = ramp[::-1].copy()
+        self._concealing = False
+
+        self._poll_seconds = self.frames / processor.device_rate / 8
+        self._running = False
+        self._threads = []
+        self.input_stream = None
+        self.output_stream = None
+
+    def stats(self):
+        """Per-stage counters and ring fill levels (any thread)."""
+        return {
+            'capture': self.capture_stats.as_dict(self.capture_ring),
+            'dsp': self.dsp_stats.as_dict(self.playback_ring),
+            'playback': self.playback_stats.as_dict(self.playback_ring),
+        }
+
+    def start(self):
+        """Open the input and output streams and start the three stage threads."""
+        processor = self.processor
+        params = {
+            'format': processor.audio_format,
+            'channels': self.channels,
+            'rate': processor.device_rate,
+            'frames_per_buffer': self.frames,
+        }
+        self.input_stream = processor.session.open_stream(role='input', input=True, **params)
+        self.output_stream = processor.session.open_stream(role='output', output=True, **params)
+
+        self.capture_ring.clear()
+        self.playback_ring.clear()
+        self._concealing = False
+        self._running = True
+        self._threads = [
+            threading.Thread(target=target, name=name, daemon=True)
+            for name, target in (('capture', self._capture), ('dsp', self._dsp), ('playback', self._playback))
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        """Stop the stage threads; the session keeps the streams open for a restart."""
+        self._running = False
+        for thread in self._threads:
+            thread.join(timeout=1.0)
+        self._threads = []
+
+    def _capture(self):
+        """Capture stage: device -> capture ring."""
+        stats = self.capture_stats
+        instrumentation = self.processor.instrumentation
+        while self._running:
+            start = time.perf_counter_ns()
+            try:
+                data = self.input_stream.read(self.frames, exception_on_overflow=True)
+            except IOError:
+                # PortAudio discarded input because we read too late
+                stats.overflows += 1
+                continue
+            except Exception as e:
+                print(f"Error during audio capture: {e}")
+                time.sleep(0.1)
+                continue
+            self.processor._mark_first_sample()
+            if instrumentation.enabled:
+                instrumentation.record('read', time.perf_counter_ns() - start)
+            stats.blocks += 1
+            if not self.capture_ring.push(data):
+                stats.overflows += 1
+
+    def _dsp(self):
+        """DSP stage: capture ring -> processor -> playback ring."""
+        stats = self.dsp_stats
+        block = self._dsp_block
+        instrumentation = self.processor.instrumentation
+        while self._running:
+            if not self.capture_ring.pop(block):
+                time.sleep(self._poll_seconds)
+                continue
+            if instrumentation.enabled:
+                instrumentation.start()
+            try:
+                output = self.processor._process_stream_buffer(block)
+            except Exception as e:
+                print(f"Error during audio processing: {e}")
+                output = block
+            stats.blocks += 1
+            if not self.playback_ring.push(output):
+                stats.overflows += 1
+
+    def _playback(self):
+        """Playback stage: playback ring -> device, concealing underruns."""
+        stats = self.playback_stats
+        block = self._play_block
+        instrumentation = self.processor.instrumentation
+
+        # Fill the jitter buffer before the first write
+        while self._running and self.playback_ring.fill < self.prefill:
+            time.sleep(self._poll_seconds)
+
+        while self._running:
+            # After a stall the backlog arrives all at once; skip the late
+            # blocks so the latency returns to the prefill target
+            while self.playback_ring.fill > 2 * self.prefill:
+                self.playback_ring.pop(block)
+                stats.overflows += 1
+
+            if self.playback_ring.pop(block):
+                if self._concealing:
+                    self._apply_ramp(block, self._fade_in)
+                    self._concealing = False
+                np.copyto(self._last_block, block)
+                output = block
+            else:
+                stats.underflows += 1
+                output = self._conceal()
+            start = time.perf_counter_ns()
+            try:
+                self.output_stream.write(output, self.frames, exception_on_underflow=True)
+            except IOError:
+                # The device ran out of samples before this write arrived
+                stats.underflows += 1
+            except Exception as e:
+                print(f"Error during audio playback: {e}")
+                time.sleep(0.1)
+            if instrumentation.enabled:
+                instrumentation.record('write', time.perf_counter_ns() - start)
+            stats.blocks += 1
+
+    def _conceal(self):
+        """Return the block to play for a missing one: the last block faded out, then silence."""
+        if self._concealing:
+            return self._silence
+        self._concealing = True
+        np.copyto(self._play_block, self._last_block)
+        self._apply_ramp(self._play_block, self._fade_out)
+        return self._play_block
+
+    def _apply_ramp(self, block, ramp):
+        """Multiply an interleaved block by a per-frame gain ramp in place."""
+        scratch = self._conceal_scratch
+        np.copyto(scratch, block.reshape(self.frames, self.channels))
+        np.multiply(scratch, ramp, out=scratch)
+        np.copyto(block.reshape(self.frames, self.channels), scratch, casting='unsafe')
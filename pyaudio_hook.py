@@ -5,7 +5,7 @@ This ensures that PyAudio is properly included in the executable
 from PyInstaller.utils.hooks import collect_dynamic_libs
 
 # Force inclusion of the PyAudio module
-hiddenimports = ['pyaudio', '_portaudio', 'numpy', 'scipy', 'scipy.signal']
+hiddenimports = ['pyaudio', '_portaudio', 'numpy']
 
 # Collect all binary dependencies
 binaries = collect_dynamic_libs('pyaudio')
@@ -0,0 +1,302 @@
+"""
+Spectrogram Module for Footstep Sound Enhancer
+Turns every processed chunk into one magnitude column for the GUI's scrolling spectrogram.
+"""
+
+import numpy as np
+
+# Rows of a column, log-spaced between these frequencies (Hz), lowest first
+DISPLAY_ROWS = 128
+MIN_FREQUENCY = 50.0
+MAX_FREQUENCY = 5000.0
+
+# Columns kept by the ring; the view shows fewer, so the writer never catches up with the reader
+RING_COLUMNS = 512
+
+# Levels mapped to the darkest and brightest colour (dB relative to a full-scale sine)
+FLOOR_DB = -90.0
+CEILING_DB = -10.0
+
+# Shortest analysis window (frames); a column covers the newest samples, so
+# short chunks still get fine low-frequency rows
+MIN_FFT_SIZE = 2048
+
+# Columns shown by the view, and the height of the detection strip above them (pixels)
+VIEW_COLUMNS = 384
+MARK_HEIGHT = 4
+
+# Colour map anchors: (level 0-255, (r, g, b))
+PALETTE_ANCHORS = (
+    (0, (0, 0, 0)),
+    (64, (20, 20, 120)),
+    (128, (150, 30, 140)),
+    (192, (250, 120, 20)),
+    (255, (255, 255, 200)),
+)
+MARK_COLOUR = (0, 255, 0)
+BAND_COLOUR = (255, 255, 255)
+
+# Header slots of the ring, as int64
+_WRITTEN, _BAND_LOW, _BAND_HIGH = 0, 1, 2
+_HEADER_SLOTS = 4
+
+
+def row_frequencies(rows=DISPLAY_ROWS):
+    """Lower edge (Hz) of every row, lowest first."""
+    return MIN_FREQUENCY * (MAX_FREQUENCY / MIN_FREQUENCY) ** (np.arange(rows) / rows)
+
+
+def frequency_row(frequency, rows=DISPLAY_ROWS):
+    """Row showing `frequency`, clipped to the view."""
+    row = int(np.searchsorted(row_frequencies(rows), frequency, side='right')) - 1
+    return min(max(row, 0), rows - 1)
+
+
+def palette():
+    """256 x 3 uint8 colour map from PALETTE_ANCHORS."""
+    levels = [level for level, _ in PALETTE_ANCHORS]
+    colours = np.array([colour for _, colour in PALETTE_ANCHORS], dtype=float)
+    steps = np.arange(256)
+    return np.stack([np.interp(steps, levels, colours[:, i]) for i in range(3)], axis=1).round().astype(np.uint8)
+
+
+class SpectrogramRing:
+    """
+    Fixed-size ring of uint8 magnitude columns, one per chunk.
+
+    The audio thread is the only writer: it fills the column after the
+    newest one and then publishes the new count in the header, so the
+    GUI copies columns that are complete (the view shows fewer columns
+    than the ring holds). The ring also carries a detection mark per
+    column and the rows of the footstep band. It can live in a shared
+    memory buffer, so a worker process can fill it for the GUI process.
+    """
+
+    def __init__(self, columns=RING_COLUMNS, rows=DISPLAY_ROWS, buffer=None):
+        """
+        Args:
+            columns: Number of columns kept
+            rows: Values per column
+            buffer: Optional writable buffer of at least nbytes(columns, rows)
+                bytes to place the ring in (e.g. SharedMemory.buf)
+        """
+        self.columns = columns
+        self.rows = rows
+        if buffer is None:
+            buffer = bytearray(self.nbytes(columns, rows))
+        header_size = 8 * _HEADER_SLOTS
+        self._header = np.ndarray(_HEADER_SLOTS, dtype=np.int64, buffer=buffer)
+        self.marks = np.ndarray(columns, dtype=np.uint8, buffer=buffer, offset=header_size)
+        self.values = np.ndarray((columns, rows), dtype=np.uint8, buffer=buffer, offset=header_size + columns)
+
+    @staticmethod
+    def nbytes(columns=RING_COLUMNS, rows=DISPLAY_ROWS):
+        """Bytes needed to hold a ring of this size."""
+        return 8 * _HEADER_SLOTS + columns + columns * rows
+
+    @property
+    def written(self):
+        """Number of columns written so far."""
+        return int(self._header[_WRITTEN])
+
+    @property
+    def band_rows(self):
+        """(low, high) rows of the footstep band."""
+        return int(self._header[_BAND_LOW]), int(self._header[_BAND_HIGH])
+
+    def set_band(self, low_hz, high_hz):
+        """Record the footstep band for the view (writer side)."""
+        self._header[_BAND_LOW] = frequency_row(low_hz, self.rows)
+        self._header[_BAND_HIGH] = frequency_row(high_hz, self.rows)
+
+    def next_column(self):
+        """The column to fill next (writer side); publish it with commit()."""
+        return self.values[self.written % self.columns]
+
+    def commit(self, detected):
+        """Publish the column filled since next_column(), with its detection mark."""
+        written = self.written
+        self.marks[written % self.columns] = bool(detected)
+        self._header[_WRITTEN] = written + 1
+
+    def clear(self):
+        """Forget all columns; only while the writer is idle."""
+        self.values.fill(0)
+        self.marks.fill(0)
+        self._header[_WRITTEN] = 0
+
+    def close(self):
+        """Drop the views, so a shared memory buffer can be closed."""
+        del self._header, self.marks, self.values
+
+
+class SpectrogramAnalyzer:
+    """
+    Audio-side producer of spectrogram columns.
+
+    Each chunk is mixed to mono into a circular history of fft_size
+    samples, which is Hann-windowed and transformed once per chunk; the
+    bins are pooled (maximum) into log-spaced rows and mapped from dB to
+    0-255. Every step writes into buffers allocated here, so the audio
+    thread does not allocate.
+    """
+
+    def __init__(self, sample_rate, channels, chunk_size, ring, band=(200, 800)):
+        """
+        Args:
+            sample_rate: Sample rate in Hz
+            channels: Number of channels in each chunk
+            chunk_size: Frames per chunk
+            ring: SpectrogramRing receiving the columns
+            band: Footstep band (low_hz, high_hz) marked in the view
+        """
+        self.sample_rate = sample_rate
+        self.chunk_size = chunk_size
+        self.ring = ring
+        self.fft_size = max(MIN_FFT_SIZE, 1 << (chunk_size - 1).bit_length())
+        bins = self.fft_size // 2 + 1
+
+        self.window = np.hanning(self.fft_size)
+        self._mix = np.full(channels, 1.0 / channels)
+        self._frames = np.zeros((chunk_size, channels))
+        self._history = np.zeros(self.fft_size)
+        self._position = 0
+        self._windowed = np.zeros(self.fft_size)
+        self._spectrum = np.zeros(bins, dtype=np.complex128)
+        self._magnitude = np.zeros(bins)
+        self._rows = np.zeros(ring.rows)
+
+        # First bin of every row, and the bin past the top row; rows
+        # narrower than a bin repeat the nearest one
+        bin_hz = sample_rate / self.fft_size
+        self._end = min(bins, int(np.ceil(MAX_FREQUENCY / bin_hz)) + 1)
+        starts = np.rint(row_frequencies(ring.rows) / bin_hz).astype(np.intp)
+        self._row_starts = np.minimum(starts, self._end - 1)
+        # dB = 20 log10(magnitude * 2 / sum(window)); then FLOOR_DB..CEILING_DB -> 0..255
+        self._scale = 255.0 / (CEILING_DB - FLOOR_DB)
+        self._offset = (20.0 * np.log10(2.0 / self.window.sum()) - FLOOR_DB) * self._scale
+        ring.set_band(*band)
+
+    def set_band(self, low_hz, high_hz):
+        """Mark a new footstep band."""
+        self.ring.set_band(low_hz, high_hz)
+
+    def process(self, frames, detected):
+        """
+        Push the column of one (frames, channels) block into the ring.
+
+        Args:
+            frames: Input block; only its first chunk_size frames are used
+            detected: Whether a footstep was detected in the block
+        """
+        # Mix into the circular history, wrapping at most once; float32
+        # input is converted into a float64 copy first, as matmul would
+        # allocate one for the conversion
+        history = self._history
+        size = self.fft_size
+        start = self._position
+        length = min(frames.shape[0], self.chunk_size)
+        first = min(length, size - start)
+        staged = self._frames
+        np.copyto(staged[:length], frames[:length])
+        np.matmul(staged[:first], self._mix, out=history[start:start + first])
+        if first < length:
+            np.matmul(staged[first:length], self._mix, out=history[:length - first])
+        self._position = (start + length) % size
+
+        # Window the history oldest sample first, then transform
+        oldest = self._position
+        windowed = self._windowed
+        np.multiply(history[oldest:], self.window[:size - oldest], out=windowed[:size - oldest])
+        np.multiply(history[:oldest], self.window[size - oldest:], out=windowed[size - oldest:])
+        np.fft.rfft(windowed, out=self._spectrum)
+        magnitude = np.abs(self._spectrum, out=self._magnitude)
+
+        rows = self._rows
+        np.maximum.reduceat(magnitude[:self._end], self._row_starts, out=rows)
+        rows += 1e-12
+        np.log10(rows, out=rows)
+        rows *= 20.0 * self._scale
+        rows += self._offset
+        np.clip(rows, 0.0, 255.0, out=rows)
+        np.copyto(self.ring.next_column(), rows, casting='unsafe')
+        self.ring.commit(detected)
+
+
+class SpectrogramImage:
+    """
+    Renders the newest columns of a SpectrogramRing as one PPM image.
+
+    Column lookup, colour mapping, the detection strip and the band edges
+    are done with numpy into buffers allocated here, so the GUI hands Tk
+    the whole frame in a single call instead of drawing pixels or items.
+    Time runs left to right, low frequencies are at the bottom.
+    """
+
+    def __init__(self, ring, width=VIEW_COLUMNS, mark_height=MARK_HEIGHT):
+        """
+        Args:
+            ring: SpectrogramRing to read
+            width: Columns shown; must be smaller than the ring
+            mark_height: Height of the detection strip in pixels
+        """
+        if width >= ring.columns:
+            raise ValueError("The view must show fewer columns than the ring holds")
+        self.ring = ring
+        self.width = width
+        self.mark_height = mark_height
+        self.height = ring.rows + mark_height
+
+        header = f"P6 {width} {self.height} 255\n".encode('ascii')
+        self.ppm = bytearray(len(header) + self.height * width * 3)
+        self.ppm[:len(header)] = header
+        self.pixels = np.ndarray((self.height, width, 3), dtype=np.uint8, buffer=self.ppm, offset=len(header))
+
+        self.palette = palette()
+        self._mark_colours = np.array([(0, 0, 0), MARK_COLOUR], dtype=np.uint8)
+        self._band_colour = np.array(BAND_COLOUR, dtype=np.uint8)
+        self._offsets = np.arange(-width, 0)
+        self._index = np.zeros(width, dtype=np.intp)
+        self._columns = np.zeros((width, ring.rows), dtype=np.uint8)
+        self._levels = np.zeros((ring.rows, width), dtype=np.intp)
+        self._marks = np.zeros(width, dtype=np.uint8)
+        self._strip = np.zeros((width, 3), dtype=np.uint8)
+        self.written = -1
+
+    def render(self):
+        """
+        Build the frame for the newest columns.
+
+        Returns:
+            True if the image changed since the last call, False if no column was added
+        """
+        ring = self.ring
+        written = ring.written
+        if written == self.written:
+            return False
+        self.written = written
+
+        # Ring slot of every view column, oldest on the left
+        index = self._index
+        np.add(self._offsets, written, out=index)
+        np.remainder(index, ring.columns, out=index)
+        np.take(ring.values, index, axis=0, out=self._columns, mode='clip')
+        np.take(ring.marks, index, out=self._marks, mode='clip')
+        if written < self.width:
+            # Slots not written yet show as silence
+            self._columns[:self.width - written] = 0
+            self._marks[:self.width - written] = 0
+
+        body = self.pixels[self.mark_height:]
+        # Transpose to rows, highest frequency first; take() wants intp indices
+        np.copyto(self._levels, self._columns.T[::-1])
+        np.take(self.palette, self._levels, axis=0, out=body, mode='clip')
+        np.take(self._mark_colours, self._marks, axis=0, out=self._strip, mode='clip')
+        self.pixels[:self.mark_height] = self._strip
+
+        # Dashed lines on the edges of the footstep band
+        for row in ring.band_rows:
+            line = body[ring.rows - 1 - row]
+            line[0::4] = self._band_colour
+            line[1::4] = self._band_colour
+        return True
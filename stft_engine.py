@@ -0,0 +1,258 @@
+"""
+STFT Engine Module for Footstep Sound Enhancer
+Multiband spectral footstep detector with bin-selective overlap-add enhancement.
+"""
+
+import math
+
+import numpy as np
+
+
+class STFTEngine:
+    """
+    Detects footsteps from short-time spectra and boosts only the footstep bins.
+
+    The input is cut into 50%-overlapping frames with a sqrt-Hann window
+    (whose square overlap-adds to one), transformed with a real FFT and
+    analysed per frame:
+
+    - band energy: RMS-equivalent energy of the footstep bins
+    - band ratio: share of the total energy in the footstep bins, which
+      rejects broadband sounds such as gunfire and explosions
+    - spectral flux: normalized positive magnitude change in the footstep
+      bins, which rejects steady sounds such as music or engine hum
+
+    A frame that passes all three starts (or extends) an enhancement hold.
+    Gain is applied only to the footstep bins of held frames, and the
+    frames are resynthesized with overlap-add. All frame, spectrum and
+    window buffers are preallocated; numpy's FFT caches its plan per size,
+    so the same plan is reused on every chunk.
+
+    The hop does not depend on the chunk size. When a chunk is not a
+    multiple of the hop (e.g. the 1029-frame chunks of a resampled
+    stream), the samples past the last whole hop wait for the next chunk,
+    and a short output queue keeps every chunk exactly chunk_size frames.
+
+    By default the features are summed over all channels and every channel
+    gets the same gain. With per_channel they are computed for each
+    channel along the channel axis, and each channel holds and boosts on
+    its own detections.
+
+    The engine adds fft_size - hop frames of latency, plus less than a hop
+    when chunk_size is not a multiple of the hop (see latency_frames).
+    """
+
+    def __init__(self, sample_rate, channels, chunk_size, band=(200, 800), fft_size=512,
+                 min_band_ratio=0.5, min_flux=0.3, hold_seconds=0.1, per_channel=False):
+        """
+        Initialize the engine.
+
+        Args:
+            sample_rate: Sample rate in Hz
+            channels: Number of channels in each chunk
+            chunk_size: Frames per chunk
+            band: (low, high) footstep band in Hz
+            fft_size: Frame length; halved for chunks shorter than half of it
+            min_band_ratio: Minimum share of frame energy inside the band
+            min_flux: Minimum normalized spectral flux to start a detection
+            hold_seconds: How long a detection keeps the gain applied
+            per_channel: Detect and hold each channel separately
+        """
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.chunk_size = chunk_size
+        # Largest power-of-two hop up to half the frame that fits in a chunk
+        self.hop = min(fft_size // 2, 1 << (chunk_size.bit_length() - 1))
+        self.fft_size = 2 * self.hop
+        self.min_band_ratio = min_band_ratio
+        self.min_flux = min_flux
+        self.per_channel = per_channel
+        self.hold_frames = max(1, int(round(hold_seconds * sample_rate / self.hop)))
+
+        bins = self.fft_size // 2 + 1
+        self.set_band(*band)
+
+        # Periodic sqrt-Hann: analysis x synthesis windows sum to one at 50% overlap
+        n = np.arange(self.fft_size)
+        self.window = np.sqrt(0.5 - 0.5 * np.cos(2 * np.pi * n / self.fft_size))
+
+        # Scale from one-sided band energy to a time-domain RMS, so the
+        # processor's detection_threshold keeps its meaning
+        detectors = channels if per_channel else 1
+        self._energy_scale = 4.0 / (self.fft_size * self.fft_size * (1 if per_channel else channels))
+
+        # Input left over past the last whole hop plus output queued for the
+        # next chunk; their sum stays at this delay, which is zero when the
+        # hop divides chunk_size
+        self._default_delay = self.hop - math.gcd(chunk_size, self.hop)
+
+        # Sized for a full hop of leftover input, as an engine continued
+        # from another chunk size may carry
+        frames = (chunk_size + self.hop - 1) // self.hop
+        self._history = np.zeros((self.fft_size - 1 + chunk_size, channels))
+        self._queue = np.zeros(((frames + 1) * self.hop, channels))
+        self._frames = np.zeros((frames, channels, self.fft_size))
+        self._spectrum = np.zeros((frames, channels, bins), dtype=np.complex128)
+        self._magnitude = np.zeros((frames, channels, bins))
+        self._power = np.zeros((frames, channels, bins))
+        self._resynthesized = np.zeros((frames, channels, self.fft_size))
+        self._output = np.zeros((chunk_size, channels))
+        self._gains = np.ones((frames, detectors))
+        self._hold = np.zeros(detectors, dtype=np.int64)
+        self._previous_magnitude = np.zeros((channels, bins))
+        self._tail = np.zeros((self.hop, channels))
+        self.reset()
+
+    def set_band(self, low_hz, high_hz):
+        """Select the footstep bins; takes effect from the next chunk."""
+        frequencies = np.fft.rfftfreq(self.fft_size, 1.0 / self.sample_rate)
+        band_bins = np.flatnonzero((frequencies >= low_hz) & (frequencies <= high_hz))
+        # A single slice assignment, so a chunk never sees half an update
+        self._band = slice(band_bins[0], band_bins[-1] + 1) if band_bins.size else slice(0, 0)
+
+    @property
+    def latency_frames(self):
+        """Delay, in frames, that the overlap-add adds to the signal path."""
+        return self.fft_size - self.hop + self._delay
+
+    def reset(self):
+        """Clear all carried state, e.g. after the stream is reopened."""
+        self._history.fill(0.0)
+        self._queue.fill(0.0)
+        self._delay = self._default_delay
+        self._history_frames = self.fft_size - self.hop
+        self._queued_frames = self._delay
+        self._previous_magnitude.fill(0.0)
+        self._tail.fill(0.0)
+        self._hold.fill(0)
+        self.last_band_ratio = 0.0
+        self.last_flux = 0.0
+        self.last_channel_levels = np.zeros(self._hold.size)
+        self.last_channel_detected = np.zeros(self._hold.size, dtype=bool)
+
+    def continue_from(self, previous):
+        """
+        Take over the signal state of an engine with another chunk size.
+
+        With the same frame length the output continues exactly where
+        `previous` stopped, so the chunk size can change mid-stream without
+        a gap; otherwise the engine starts clean. If this chunk size needs
+        more queued output than `previous` carried, the difference is
+        inserted as silence once.
+        """
+        if previous.fft_size != self.fft_size or previous.channels != self.channels:
+            return
+        carried = previous._history_frames
+        self._history[:carried] = previous._history[:carried]
+        self._history_frames = carried
+
+        padding = max(0, self._default_delay - previous._delay)
+        self._delay = previous._delay + padding
+        self._queue[:padding] = 0.0
+        queued = previous._queued_frames
+        self._queue[padding:padding + queued] = previous._queue[:queued]
+        self._queued_frames = padding + queued
+        self._previous_magnitude[:] = previous._previous_magnitude
+        self._tail[:] = previous._tail
+        if previous._hold.size == self._hold.size:
+            self._hold[:] = previous._hold
+
+    def process(self, frames, enhancement_factor, threshold, channel_mask=None):
+        """
+        Analyse and enhance one (chunk_size, channels) block.
+
+        Args:
+            frames: Input block
+            enhancement_factor: Gain of the footstep bins in held frames
+            threshold: Band level a frame must exceed
+            channel_mask: Optional per-channel bools; channels that are
+                False are never boosted, whatever was detected
+
+        Returns:
+            (output, is_footstep, level): the delayed, enhanced block (an
+            internal buffer reused on the next call), whether any frame
+            was detected, and the footstep-band RMS level of the chunk.
+            Per-detector levels and detections are left in
+            last_channel_levels and last_channel_detected.
+        """
+        hop = self.hop
+        keep = self.fft_size - hop
+
+        # Append the chunk to the carried history and frame every whole hop
+        # without copying; the rest is carried to the next chunk
+        history = self._history
+        start = self._history_frames
+        end = start + self.chunk_size
+        history[start:end] = frames
+        count = (end - keep) // hop
+        views = np.lib.stride_tricks.sliding_window_view(history[:end], self.fft_size, axis=0)[::hop]
+        windowed = np.multiply(views[:count], self.window, out=self._frames[:count])
+
+        spectrum = np.fft.rfft(windowed, axis=-1, out=self._spectrum[:count])
+        magnitude = np.abs(spectrum, out=self._magnitude[:count])
+        power = np.square(magnitude, out=self._power[:count])
+
+        # Per-frame features as (frames, detectors): summed over the bins,
+        # and over the channels unless each channel is detected separately
+        band = self._band
+        axes = 2 if self.per_channel else (1, 2)
+        band_energy = power[:, :, band].sum(axis=axes, keepdims=True)[..., 0]
+        total_energy = power.sum(axis=axes, keepdims=True)[..., 0] + 1e-12
+        band_ratio = band_energy / total_energy
+        level = np.sqrt(band_energy * self._energy_scale)
+
+        previous = np.concatenate((self._previous_magnitude[None, :, band], magnitude[:-1, :, band]))
+        rise = np.maximum(magnitude[:, :, band] - previous, 0.0).sum(axis=axes, keepdims=True)[..., 0]
+        flux = rise / (previous.sum(axis=axes, keepdims=True)[..., 0]
+                       + magnitude[:, :, band].sum(axis=axes, keepdims=True)[..., 0] + 1e-12)
+        self._previous_magnitude[:] = magnitude[-1]
+
+        onset = (level > threshold) & (band_ratio > self.min_band_ratio) & (flux > self.min_flux)
+        sustained = (level > threshold) & (band_ratio > self.min_band_ratio)
+
+        # Hold the gain for hold_frames after each onset while the band
+        # stays active; every detector is updated at once
+        gains = self._gains[:count]
+        hold = self._hold
+        for i in range(count):
+            np.copyto(hold, 0, where=~sustained[i])
+            np.copyto(hold, self.hold_frames, where=onset[i])
+            active = hold > 0
+            gains[i] = np.where(active, enhancement_factor, 1.0)
+            hold -= active
+
+        self.last_channel_levels = np.sqrt(np.mean(level * level, axis=0))
+        self.last_channel_detected = (gains > 1.0).any(axis=0)
+        if channel_mask is not None:
+            gains = np.where(channel_mask, gains, 1.0)
+
+        # Boost only the footstep bins, then resynthesize
+        spectrum[:, :, band] *= gains[:, :, None]
+        resynthesized = np.fft.irfft(spectrum, n=self.fft_size, axis=-1, out=self._resynthesized[:count])
+        resynthesized *= self.window
+
+        # Overlap-add behind the queued output: each hop-sized segment is the
+        # first half of its frame plus the second half of the previous frame
+        halves = resynthesized.transpose(0, 2, 1)
+        queued = self._queued_frames
+        output = self._queue[queued:queued + count * hop].reshape(count, hop, self.channels)
+        np.copyto(output, halves[:, :hop])
+        output[0] += self._tail
+        output[1:] += halves[:-1, hop:]
+        self._tail[:] = halves[-1, hop:]
+
+        # Hand out one chunk and keep the rest of the queue and the input
+        # still needed for the next frames
+        chunk_size = self.chunk_size
+        queued += count * hop - chunk_size
+        self._output[:] = self._queue[:chunk_size]
+        self._queue[:queued] = self._queue[chunk_size:chunk_size + queued]
+        self._queued_frames = queued
+        consumed = count * hop
+        history[:end - consumed] = history[consumed:end]
+        self._history_frames = end - consumed
+
+        self.last_band_ratio = float(band_ratio.max())
+        self.last_flux = float(flux.max())
+        is_footstep = bool(self.last_channel_detected.any())
+        return self._output, is_footstep, float(np.sqrt(np.mean(level * level)))
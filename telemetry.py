@@ -0,0 +1,62 @@
+"""
+Telemetry Module for Footstep Sound Enhancer
+Passes processing statistics from the audio thread to the GUI without blocking.
+"""
+
+import itertools
+
+
+class TelemetryChannel:
+    """
+    Single-writer snapshot channel between the audio thread and its readers.
+
+    The audio thread publishes a fresh snapshot dict after every chunk by
+    rebinding one attribute, which is atomic in CPython, so publishing never
+    takes a lock and never waits on a reader. Readers (the Tk timer, for
+    example) poll latest() at their own rate and always see a complete
+    snapshot. Short events such as a single-chunk footstep are not lost
+    between polls because the snapshot carries running counters.
+    """
+
+    def __init__(self):
+        """Initialize the channel with an idle snapshot."""
+        self._sequence = itertools.count(1)
+        self._footsteps = 0
+        self._snapshot = {
+            'sequence': 0,
+            'level': 0.0,
+            'footstep_detected': False,
+            'footstep_count': 0,
+            'enhancement': 1.0,
+        }
+
+    def publish(self, level, footstep_detected, enhancement, **extra):
+        """
+        Publish the state after one processed chunk (audio thread only).
+
+        Args:
+            level: RMS level of the footstep band
+            footstep_detected: Whether this chunk was detected as a footstep
+            enhancement: Gain applied to this chunk
+            **extra: Additional named values to include in the snapshot
+        """
+        if footstep_detected:
+            self._footsteps += 1
+        snapshot = {
+            'sequence': next(self._sequence),
+            'level': float(level),
+            'footstep_detected': bool(footstep_detected),
+            'footstep_count': self._footsteps,
+            'enhancement': float(enhancement),
+        }
+        if extra:
+            snapshot.update(extra)
+        self._snapshot = snapshot
+
+    def latest(self):
+        """Return the most recent snapshot (any thread)."""
+        return self._snapshot
+
+    def reset(self):
+        """Publish an idle snapshot, e.g. after processing stops."""
+        self.publish(0.0, False, 1.0)
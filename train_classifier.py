@@ -0,0 +1,182 @@
+"""
+Classifier Training Module for Footstep Sound Enhancer
+Fits the second-stage footstep classifier on the candidates the RMS gate finds in recorded clips.
+
+Usage:
+    python train_classifier.py --footsteps clips/footsteps --other clips/other -o footstep_model.npz
+    python train_classifier.py --corpus-minutes 20 --seed 1 -o footstep_model.npz   # synthetic corpus
+    python evaluation.py --classifier footstep_model.npz                              # then score it
+
+Clips are WAV files (16-bit PCM or 32-bit float). Every chunk of a clip
+under --footsteps that the gate accepts is a positive example, every one
+under --other (gunfire, music, ambience, ...) a negative one.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+from audio_processor import AudioProcessor, PyAudioDummy
+from classifier import compute_features, FEATURE_NAMES, FootstepClassifier, window_size, WINDOW_SECONDS
+from offline_processor import read_wav_info
+
+
+def gate_candidates(audio, sample_rate, chunk_size=1024, detection_threshold=0.05, band=(200, 800)):
+    """
+    Run the RMS gate (AudioProcessor._detect_footstep, via enhance_block) over `audio` chunk by chunk.
+
+    Returns:
+        Indices of the chunks the gate accepted
+    """
+    processor = AudioProcessor(audio_backend=PyAudioDummy())
+    processor.configure_stream(sample_rate=sample_rate, channels=audio.shape[1], chunk_size=chunk_size)
+    processor.set_footstep_band(*band)
+    processor.set_detection_threshold(detection_threshold)
+    chunks = len(audio) // chunk_size
+    accepted = np.zeros(chunks, dtype=bool)
+    for i in range(chunks):
+        processor.enhance_block(np.asarray(audio[i * chunk_size:(i + 1) * chunk_size], dtype=np.float32))
+        accepted[i] = processor.footstep_detected
+    processor.close()
+    return np.flatnonzero(accepted)
+
+
+def candidate_windows(audio, sample_rate, chunks, chunk_size, window_seconds=WINDOW_SECONDS):
+    """
+    Mono feature windows ending with each of the given chunks, as the real-time classifier sees them.
+
+    Returns:
+        (len(chunks), window) array; audio before the start is zero
+    """
+    size = window_size(sample_rate, window_seconds)
+    mono = np.concatenate((np.zeros(size), np.asarray(audio, dtype=np.float64).mean(axis=1)))
+    ends = (np.asarray(chunks) + 1) * chunk_size + size
+    return mono[ends[:, None] - size + np.arange(size)]
+
+
+def clip_features(path, chunk_size, detection_threshold, band):
+    """Features of the gate candidates of one WAV clip."""
+    info = read_wav_info(path)
+    audio = np.memmap(path, dtype=info.dtype, mode='r', offset=info.data_offset,
+                      shape=(info.frames, info.channels))
+    audio = np.asarray(audio, dtype=np.float32)
+    if info.dtype.kind != 'f':
+        audio /= 32767.0
+    chunks = gate_candidates(audio, info.sample_rate, chunk_size, detection_threshold, band)
+    if not len(chunks):
+        return np.zeros((0, len(FEATURE_NAMES)))
+    return compute_features(candidate_windows(audio, info.sample_rate, chunks, chunk_size), info.sample_rate)
+
+
+def _wav_files(directory):
+    return sorted(os.path.join(directory, name) for name in os.listdir(directory)
+                  if name.lower().endswith('.wav'))
+
+
+def corpus_examples(corpus, chunk_size, detection_threshold, band):
+    """
+    Features and labels of the gate candidates of a LabeledCorpus.
+
+    A candidate is a footstep if its chunk overlaps a labeled footstep.
+    """
+    from evaluation import _footstep_mask
+
+    chunks = gate_candidates(corpus.audio, corpus.sample_rate, chunk_size, detection_threshold, band)
+    mask = _footstep_mask(corpus, len(corpus.audio))
+    inside = np.concatenate(([0], np.cumsum(mask)))
+    labels = inside[(chunks + 1) * chunk_size] > inside[chunks * chunk_size]
+    windows = candidate_windows(corpus.audio, corpus.sample_rate, chunks, chunk_size)
+    return compute_features(windows, corpus.sample_rate), labels
+
+
+def choose_threshold(probabilities, labels, keep=0.95):
+    """Highest decision threshold that still keeps `keep` of the footstep candidates."""
+    footsteps = np.sort(probabilities[labels])
+    if not len(footsteps):
+        return 0.5
+    return float(footsteps[int(np.floor((1.0 - keep) * len(footsteps)))])
+
+
+def train(features, labels, keep=0.95, validation=0.2, seed=0):
+    """
+    Fit a model on a random split and report it on the held-out part.
+
+    Returns:
+        (model, report): the model refitted on every example, and a dict of
+        validation footstep retention and false-candidate rejection
+    """
+    rng = np.random.default_rng(seed)
+    order = rng.permutation(len(labels))
+    held_out = order[:int(validation * len(labels))]
+    fitted = order[int(validation * len(labels)):]
+
+    model = FootstepClassifier.fit(features[fitted], labels[fitted])
+    model.threshold = choose_threshold(model.probability(features[fitted]), labels[fitted], keep)
+    accepted = model.accept(features[held_out])
+    truth = labels[held_out]
+    report = {
+        'footsteps_kept': float(accepted[truth].mean()) if truth.any() else float('nan'),
+        'others_rejected': float((~accepted[~truth]).mean()) if (~truth).any() else float('nan'),
+        'validation_examples': len(held_out),
+    }
+
+    final = FootstepClassifier.fit(features, labels)
+    final.threshold = choose_threshold(final.probability(features), labels, keep)
+    return final, report
+
+
+def main(argv=None):
+    """Command-line entry point for training."""
+    parser = argparse.ArgumentParser(description="Train the second-stage footstep classifier.")
+    parser.add_argument('--footsteps', help="Directory of WAV clips of footsteps")
+    parser.add_argument('--other', help="Directory of WAV clips without footsteps")
+    parser.add_argument('--corpus-minutes', type=float,
+                        help="Train on a synthetic corpus of this length instead (see evaluation.py)")
+    parser.add_argument('--seed', type=int, default=1,
+                        help="Corpus seed; evaluation.py scores seed 0 by default, so keep them apart")
+    parser.add_argument('--chunk-size', type=int, default=1024, help="Frames per gate decision")
+    parser.add_argument('--threshold', type=float, default=0.05, help="Gate detection threshold")
+    parser.add_argument('--band', default='200-800', help="Gate footstep band, e.g. 200-800")
+    parser.add_argument('--keep', type=float, default=0.95,
+                        help="Share of footstep candidates the decision threshold keeps")
+    parser.add_argument('-o', '--output', default='footstep_model.npz', help="Model file to write")
+    args = parser.parse_args(argv)
+    band = tuple(float(edge) for edge in args.band.split('-'))
+
+    start = time.perf_counter()
+    if args.corpus_minutes:
+        from evaluation import generate_corpus
+        corpus = generate_corpus(args.corpus_minutes * 60.0, seed=args.seed)
+        features, labels = corpus_examples(corpus, args.chunk_size, args.threshold, band)
+    elif args.footsteps and args.other:
+        positives = [clip_features(path, args.chunk_size, args.threshold, band)
+                     for path in _wav_files(args.footsteps)]
+        negatives = [clip_features(path, args.chunk_size, args.threshold, band)
+                     for path in _wav_files(args.other)]
+        features = np.concatenate(positives + negatives)
+        labels = np.concatenate([np.ones(len(f), dtype=bool) for f in positives]
+                                + [np.zeros(len(f), dtype=bool) for f in negatives])
+    else:
+        parser.error("give --footsteps and --other, or --corpus-minutes")
+
+    if labels.all() or not labels.any():
+        print("Error: the gate found candidates of only one class; nothing to train on")
+        return 1
+    print(f"{len(labels)} candidates ({labels.sum()} footsteps, {(~labels).sum()} other), "
+          f"features in {time.perf_counter() - start:.1f} s")
+
+    model, report = train(features, labels, args.keep)
+    model.save(args.output)
+    print(f"Validation ({report['validation_examples']} candidates): footsteps kept "
+          f"{report['footsteps_kept'] * 100:.1f}%, other candidates rejected {report['others_rejected'] * 100:.1f}%")
+    for name, weight in sorted(zip(FEATURE_NAMES, model.weights), key=lambda item: -abs(item[1])):
+        print(f"  {name:<14} {weight:+.2f}")
+    print(f"Model written to {args.output} (threshold {model.threshold:.3f})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())